@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHAINS_DIR = os.path.join(ROOT, 'graph', 'tools', 'chains')
+RESULTS_FILE = os.path.join(ROOT, 'benchmarks', 'results.jsonl')
+
+# Modüller birbirini 'from realtime_selector import ...' şeklinde import ediyor
+if CHAINS_DIR not in sys.path:
+    sys.path.insert(0, CHAINS_DIR)
+
+
+def measure(func, repeat=5):
+    """Best and mean wall time of func() over `repeat` runs, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), sum(times) / len(times)
+
+
+_commit = []
+
+
+def commit():
+    """Short hash of the checked-out commit, so results can be compared over time"""
+    if not _commit:
+        try:
+            _commit.append(subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                          text=True, timeout=5).stdout.strip() or None)
+        except Exception:
+            _commit.append(None)
+    return _commit[0]
+
+
+def report(name, best, mean=None, **extra):
+    """Prints one benchmark result and appends it to results.jsonl"""
+    record = {'name': name, 'best_s': round(best, 6), 'mean_s': round(mean if mean is not None else best, 6),
+              'time': datetime.now().isoformat(timespec='seconds'), 'commit': commit(), **extra}
+    print(json.dumps(record))
+    with open(RESULTS_FILE, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    return record
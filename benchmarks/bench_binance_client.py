@@ -0,0 +1,42 @@
+"""Sequential bare requests.get vs pooled async fan-out for klines of 50 symbols"""
+import asyncio
+import argparse
+import requests
+import _common
+from _common import measure, report
+from stub_server import start_stub_server
+from binance_client import BinanceClient, AsyncBinanceClient
+
+SYMBOLS = [f'C{i}USDT' for i in range(50)]
+
+
+def sequential_bare(base_url):
+    for symbol in SYMBOLS:
+        requests.get(f'{base_url}/klines', params={'symbol': symbol, 'interval': '1m', 'limit': 100}).json()
+
+
+def sequential_pooled(client):
+    for symbol in SYMBOLS:
+        client.get_json('/klines', {'symbol': symbol, 'interval': '1m', 'limit': 100})
+
+
+async def fan_out(base_url, concurrency):
+    async with AsyncBinanceClient(base_url=base_url, concurrency=concurrency) as client:
+        await client.gather(('/klines', {'symbol': symbol, 'interval': '1m', 'limit': 100})
+                            for symbol in SYMBOLS)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.02, help='stub response delay (s)')
+    parser.add_argument('--concurrency', type=int, default=10)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    client = BinanceClient(base_url=base_url)
+    extra = {'symbols': len(SYMBOLS), 'latency_s': args.latency}
+    report('klines_50_sequential_bare', *measure(lambda: sequential_bare(base_url), 3), **extra)
+    report('klines_50_sequential_pooled', *measure(lambda: sequential_pooled(client), 3), **extra)
+    report('klines_50_async_fan_out', *measure(lambda: asyncio.run(fan_out(base_url, args.concurrency)), 3),
+           concurrency=args.concurrency, **extra)
+    server.shutdown()
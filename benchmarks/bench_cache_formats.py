@@ -0,0 +1,37 @@
+"""cache.json vs binary snapshot vs shared ticker table: write/read time and file size"""
+import json
+import os
+import tempfile
+import _common
+from _common import measure, report, ROOT
+from ticker_snapshot import write_json, write_snapshot, read_cache_file
+from ticker_table import publish, read_table
+
+FIXTURE = os.path.join(ROOT, 'cache.json')
+
+
+if __name__ == '__main__':
+    with open(FIXTURE, 'r') as f:
+        records = json.load(f)
+    extra = {'tickers': len(records)}
+    tmp = tempfile.mkdtemp()
+    paths = {
+        'json': os.path.join(tmp, 'cache.json'),
+        'npz': os.path.join(tmp, 'cache.npz'),
+        'npz-compressed': os.path.join(tmp, 'cache_z.npz'),
+        'table': os.path.join(tmp, 'cache.tbl'),
+    }
+    writers = {
+        'json': lambda: write_json(records, paths['json']),
+        'npz': lambda: write_snapshot(records, paths['npz']),
+        'npz-compressed': lambda: write_snapshot(records, paths['npz-compressed'], compress=True),
+    }
+    table = publish(records, paths['table'])
+    writers['table'] = lambda: table.write(records)
+
+    for fmt, write in writers.items():
+        report(f'cache_write_{fmt}', *measure(write, 10), bytes=os.path.getsize(paths[fmt]), **extra)
+    for fmt in ('json', 'npz', 'npz-compressed', 'table'):
+        report(f'cache_read_{fmt}_records', *measure(lambda: read_cache_file(paths[fmt]), 10), **extra)
+    # Vektörel tüketiciler dict listesine hiç dönmeden sütunları okur
+    report('cache_read_table_view', *measure(lambda: read_table(paths['table']), 10), **extra)
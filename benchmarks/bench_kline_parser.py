@@ -0,0 +1,70 @@
+"""/klines payload parsing: the original DataFrame path, per-column lists, and kline_parser (orjson, typed columns)"""
+import argparse
+import json
+import numpy as np
+import _common
+from _common import measure, report
+from fixtures import random_walk_klines
+from kline_store import KLINE_COLUMNS
+from kline_parser import parse_klines, EXTENDED_COLUMNS
+
+OHLCV = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time']
+
+
+def payloads(symbols, rows):
+    """Raw /klines bodies as Binance sends them (numbers as 8-decimal strings)"""
+    bodies = []
+    for columns in random_walk_klines([f'C{i:03d}USDT' for i in range(symbols)], rows).values():
+        data = [[int(columns['timestamp'][i]), *(f'{columns[n][i]:.8f}' for n in ('open', 'high', 'low', 'close',
+                                                                                  'volume')),
+                 int(columns['close_time'][i]), f"{columns['quote_volume'][i]:.8f}", int(columns['trades_count'][i]),
+                 f"{columns['taker_buy_volume'][i]:.8f}", f"{columns['taker_buy_quote_volume'][i]:.8f}", '0']
+                for i in range(rows)]
+        bodies.append(json.dumps(data, separators=(',', ':')).encode())
+    return bodies
+
+
+def dataframe_path(body):
+    # İlk get_data: string sütunlu DataFrame, beş sütun tek tek astype(float)
+    import pandas as pd
+    df = pd.DataFrame(json.loads(body), columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+                                                 'quote_volume', 'trades_count', 'taker_buy_volume',
+                                                 'taker_buy_quote_volume', 'ignore'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        df[col] = df[col].astype(float)
+    return df
+
+
+def lists_path(body):
+    # kline_parser öncesi: requests'in json çözmesi + sütun başına liste -> np.array
+    rows = json.loads(body)
+    return {name: np.array([row[j] for row in rows], dtype=dtype) for j, (name, dtype) in enumerate(KLINE_COLUMNS)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    bodies = payloads(args.symbols, args.rows)
+    reference = lists_path(bodies[0])
+    for name, values in parse_klines(bodies[0]).items():
+        assert np.array_equal(values, reference[name]), name
+
+    paths = {
+        'dataframe': dataframe_path,
+        'lists': lists_path,
+        'parser_stdlib_json': lambda body: parse_klines(json.loads(body)),
+        'parser_all': parse_klines,
+        'parser_ohlcv_extended': lambda body: parse_klines(body, OHLCV + EXTENDED_COLUMNS),
+        'parser_ohlcv': lambda body: parse_klines(body, OHLCV),
+        'parser_ohlcv_float32': lambda body: parse_klines(body, OHLCV, np.float32),
+    }
+    extra = {'suite': 'kline_parser', 'payloads': len(bodies), 'rows': args.rows,
+             'bytes': sum(len(body) for body in bodies)}
+    for name, parse in paths.items():
+        best, mean = measure(lambda: [parse(body) for body in bodies], args.repeat)
+        report(f'parse_klines_{name}', best, mean, rows_per_s=round(len(bodies) * args.rows / best), **extra)
@@ -0,0 +1,70 @@
+"""LLM prompt payload: old DataFrame repr / raw cache list vs token-budgeted TSV (tokens, build time, LLM latency)"""
+import argparse
+import json
+import os
+import re
+import time
+import _common
+from _common import measure, report, ROOT
+import pandas as pd
+from scoring import TickerArrays, SELECTOR_V2_PROFILE, CHOOSER_PROFILE, score
+from prompt_serializer import (market_table, count_tokens, SELECTOR_PROMPT_COLUMNS, CHOOSER_PROMPT_COLUMNS,
+                               PROMPT_TOKEN_BUDGET, _encoding, TOKEN_MODEL)
+
+FIXTURE = os.path.join(ROOT, 'cache.json')
+
+
+def old_selector_payload(records, scored):
+    # realtime_selector_v2'nin eski user mesajı: filtrelenmiş DataFrame'in tüm sütunlarıyla repr'i
+    by_symbol = {r['symbol']: r for r in records}
+    df = pd.DataFrame([by_symbol[s] for s in scored.arrays.symbols])
+    for name in ('momentum', 'volatility', 'volume_score', 'trade_score', 'total_score'):
+        df[name] = scored.components[name]
+    return f"{df}"
+
+
+def visible_rows(text):
+    # pandas repr'i uzun tabloları kırpar, LLM yalnızca görünen satırları görür
+    return len(re.findall(r'^\d+\s', text, re.M))
+
+
+def invoke_latency(text, model):
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_openai import ChatOpenAI
+    chain = ChatPromptTemplate.from_messages([('user', '{coin_data}\n\nEn uygun 3 coini seç, sadece sembolleri yaz.')]) \
+        | ChatOpenAI(model=model, temperature=0)
+    start = time.perf_counter()
+    chain.invoke({'coin_data': text})
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget', type=int, default=PROMPT_TOKEN_BUDGET)
+    parser.add_argument('--live', action='store_true', help='Gerçek LLM gecikmesini de ölç (OPENAI_API_KEY gerekir)')
+    parser.add_argument('--model', default=TOKEN_MODEL)
+    args = parser.parse_args()
+
+    with open(FIXTURE, 'r') as f:
+        records = json.load(f)
+    arrays = TickerArrays.from_records(records)
+    tokenizer = 'tiktoken' if _encoding(args.model) is not None else 'approx'
+    extra = {'tickers': len(records), 'tokenizer': tokenizer, 'budget': args.budget}
+
+    selector = score(arrays, SELECTOR_V2_PROFILE)
+    chooser = score(arrays, CHOOSER_PROFILE)
+    payloads = {
+        'selector_v2_old': (lambda: old_selector_payload(records, selector), visible_rows),
+        'selector_v2_tsv': (lambda: market_table(selector, SELECTOR_PROMPT_COLUMNS, args.budget, args.model)[0], None),
+        'choose_coins_old': (lambda: str(records), len(records)),
+        'choose_coins_tsv': (lambda: market_table(chooser, CHOOSER_PROMPT_COLUMNS, args.budget, args.model)[0], None),
+    }
+    for name, (build, rows) in payloads.items():
+        text = build()
+        rows = rows(text) if callable(rows) else rows if rows is not None else text.count('\n')
+        best, mean = measure(build, 5)
+        candidates = len(selector if name.startswith('selector') else chooser)
+        result = dict(extra, candidates=candidates, tokens=count_tokens(text, args.model), chars=len(text), rows=rows)
+        if args.live:
+            result['llm_latency_s'] = round(invoke_latency(text, args.model), 3)
+        report(f'prompt_{name}', best, mean, **result)
@@ -0,0 +1,77 @@
+"""Cold-start import time of each entry point (python -X importtime), with its heaviest top-level imports"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import _common
+from _common import report, ROOT, CHAINS_DIR
+
+# (isim, import edilen modül); main.py chains dizinini kendisi sys.path'e ekler
+ENTRY_POINTS = [
+    ('main', 'main'),
+    ('graph', 'graph'),
+    ('pipeline', 'pipeline'),
+    ('realtime_cache', 'realtime_cache'),
+    ('realtime_selector', 'realtime_selector'),
+    ('realtime_selector_v2', 'realtime_selector_v2'),
+    ('crypto_choose_v2', 'crypto_choose_v2'),
+    ('crypto_chooser', 'crypto_chooser'),
+    ('crypto_analyzer', 'crypto_analyzer'),
+    ('news_analyzer', 'news_analyzer'),
+]
+HEAVY = ('pandas', 'ta', 'langchain_core', 'langchain_openai', 'openai', 'requests', 'aiohttp', 'dotenv')
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_profile(module, cwd):
+    """
+    One cold import: (wall seconds, cumulative import seconds, {module it imports
+    directly: cumulative seconds}, every module loaded)
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, CHAINS_DIR]))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total, direct, children, loaded = 0.0, {}, {}, set()
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        name, depth = match.group(4), (len(match.group(3)) - 1) // 2   # her seviye 2 boşluk girinti
+        loaded.add(name)
+        if depth == 1:
+            children[name] = int(match.group(2)) / 1e6
+        elif depth == 0:
+            # Alt importlar üst modülün satırından önce yazılır
+            if name == module:
+                total, direct = int(match.group(2)) / 1e6, children
+            children = {}
+    return wall, total, direct, loaded
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', help='Yalnızca bu giriş noktaları')
+    args = parser.parse_args()
+
+    # Import sırasında dosya okuyan/yazan modüller repo dizinini etkilemesin
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    for name, module in ENTRY_POINTS:
+        if args.only and name not in args.only:
+            continue
+        runs = [import_profile(module, workdir) for _ in range(args.repeat)]
+        walls = [run[0] for run in runs]
+        _, total, direct, loaded = min(runs, key=lambda run: run[0])
+        heaviest = sorted(direct.items(), key=lambda kv: -kv[1])[:3]
+        report(f'startup_{name}', min(walls), sum(walls) / len(walls),
+               import_s=round(total, 4),
+               heaviest={k: round(v, 4) for k, v in heaviest},
+               heavy_loaded=[m for m in HEAVY if m in loaded],
+               suite='startup')
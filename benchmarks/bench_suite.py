@@ -0,0 +1,176 @@
+"""Hot-path benchmark suite replaying fixtures (fixtures.py): indicators, selectors, cache load, pipeline, backtest
+
+Kayıtlı fixture yoksa klines ve haberler sentetiktir; her sonuç satırının
+'data' alanı hangi kaynağın kullanıldığını gösterir.
+
+Her sonuç results.jsonl'e bir JSON satırı olarak eklenir (suite, group, commit alanlarıyla),
+böylece aynı isimli ölçümler commitler arasında karşılaştırılabilir.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import _common
+from _common import measure, report
+from fixtures import fixture_sources, load_tickers, load_klines, load_news, replay_klines, random_walk_klines
+from stub_server import start_stub_server
+
+GROUPS = ('indicators', 'selectors', 'load_cache', 'pipeline', 'backtest')
+CANDLES = (100, 1000, 10000)
+PIPELINE_COINS = ['BTC', 'ETH', 'BNB', 'SOL', 'XRP', 'DOGE', 'ADA', 'AVAX', 'LINK', 'DOT', 'LTC', 'TRX']
+BACKTEST_SYMBOLS = 200
+BACKTEST_DAYS = 30
+
+
+def measure_with_setup(setup, func, repeat=5):
+    """measure() where every run gets a fresh setup() result that is not timed"""
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        func(state)
+        times.append(time.perf_counter() - start)
+    return min(times), sum(times) / len(times)
+
+
+def quiet(func):
+    # Seçiciler sonuçlarını yazdırır, ölçüm çıktısı karışmasın
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return run
+
+
+def bench_indicators(repeat, extra):
+    import pandas as pd
+    from kline_parser import parse_klines
+    from crypto_analyzer import CryptoAnalyzer
+    analyzer = CryptoAnalyzer(store_dir=None)
+    for n in CANDLES:
+        df = pd.DataFrame(parse_klines(load_klines('BTCUSDT', '1m', n + 1)))
+        window = df.iloc[:n].reset_index(drop=True)
+        shifted = df.iloc[1:].reset_index(drop=True)
+        report(f'calculate_indicators_{n}', *measure(lambda: analyzer.calculate_indicators(window.copy()), repeat),
+               candles=n, **extra)
+        report(f'update_indicators_cold_{n}',
+               *measure(lambda: CryptoAnalyzer(store_dir=None).update_indicators('BTCUSDT', '1m', window), repeat),
+               candles=n, **extra)
+
+        def seeded():
+            warm = CryptoAnalyzer(store_dir=None)
+            warm.update_indicators('BTCUSDT', '1m', window)
+            return warm
+        # Pencere bir mum kaydığında (yeni kapanan mum) artımlı güncelleme
+        report(f'update_indicators_next_{n}',
+               *measure_with_setup(seeded, lambda a: a.update_indicators('BTCUSDT', '1m', shifted), repeat),
+               candles=n, **extra)
+
+
+def bench_selectors(repeat, extra):
+    import realtime_selector
+    import realtime_selector_v2
+    from crypto_choose_v2 import CryptoChooser, choose_coins
+    report('select_potential_coins', *measure(quiet(realtime_selector.select_potential_coins), repeat), **extra)
+    report('select_potential_coins_v2', *measure(quiet(realtime_selector_v2.select_potential_coins), repeat),
+           llm='fake', **extra)
+    chooser = CryptoChooser()
+    report('get_tradeable_coins', *measure(quiet(chooser.get_tradeable_coins), repeat), source='stub', **extra)
+    report('choose_coins', *measure(quiet(choose_coins), repeat), source='stub', llm='fake', **extra)
+
+
+def bench_load_cache(repeat, extra):
+    import realtime_selector
+    from ticker_snapshot import write_snapshot, SNAPSHOT_FILE
+    report('load_cache_json', *measure(quiet(realtime_selector.load_cache), repeat), **extra)
+    report('load_ticker_arrays_json', *measure(quiet(realtime_selector.load_ticker_arrays), repeat), **extra)
+    write_snapshot(load_tickers(), SNAPSHOT_FILE)
+    try:
+        report('load_cache_npz', *measure(quiet(realtime_selector.load_cache), repeat), **extra)
+        report('load_ticker_arrays_npz', *measure(quiet(realtime_selector.load_ticker_arrays), repeat), **extra)
+    finally:
+        os.remove(SNAPSHOT_FILE)
+
+
+def bench_pipeline(repeat, extra, base_url, coins):
+    import pipeline
+    from news_store import get_news_store
+
+    def run():
+        # Her turda haberler yeniden çekilir (depo boşaltılır), LLM cache kapalı
+        store = get_news_store()
+        with store.lock:
+            store.db.executescript('DELETE FROM articles; DELETE FROM article_coins; DELETE FROM queries;')
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(pipeline.run_pipeline(coins=coins, refresh=False, base_url=base_url))
+
+    best, mean = measure(run, repeat)
+    results, stages = run()
+    errors = sum(1 for item in results if item['errors'])
+    report('pipeline_throughput', best, mean, coins=len(coins), coins_per_s=round(len(coins) / best, 2),
+           errors=errors, llm='fake', **extra)
+
+
+def bench_backtest(repeat, extra):
+    from backtest import KlineMatrix, TickerReplay, run_backtest
+    from scoring import PROFILES
+    # Bir aylık 1m rastgele yürüyüş, yüzlerce çift
+    columns = random_walk_klines([f'C{i:03d}USDT' for i in range(BACKTEST_SYMBOLS)], BACKTEST_DAYS * 1440)
+    extra = dict(extra, symbols=BACKTEST_SYMBOLS, days=BACKTEST_DAYS)
+    matrix = KlineMatrix.from_columns(columns)
+    report('backtest_matrix', *measure(lambda: KlineMatrix.from_columns(columns), repeat), **extra)
+    report('backtest_replay', *measure(lambda: TickerReplay(matrix), repeat), **extra)
+    replay = TickerReplay(matrix)
+    for name, profile in PROFILES.items():
+        summary, _ = run_backtest(matrix, profile, replay)
+        report(f'backtest_{name}', *measure(lambda: run_backtest(matrix, profile, replay), repeat),
+               trades=summary['trades'], **extra)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help='stub Binance/NewsAPI gecikmesi (s)')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='sahte LLM cevap gecikmesi (s)')
+    args = parser.parse_args()
+
+    tickers = load_tickers()
+    server, base_url = start_stub_server(latency=args.latency, tickers=tickers,
+                                         news=load_news(PIPELINE_COINS), klines=replay_klines)
+    # Modüller göreli dosyalar kullanır (cache.json, news.sqlite, llm_cache.sqlite): geçici dizinde çalışılır
+    workdir = tempfile.mkdtemp(prefix='bench_suite_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    with open('cache.json', 'w') as f:
+        json.dump(tickers, f)
+    os.environ.update({'LLM_FAKE': '1', 'LLM_FAKE_LATENCY': str(args.llm_latency), 'LLM_CACHE': '0',
+                       'NEWS_API_URL': server.news_url, 'NEWS_DB_FILE': os.path.join(workdir, 'news.sqlite')})
+    import binance_client
+    # Süreç genelindeki istemci stub'a yönlendirilir (seçiciler get_client() kullanır)
+    binance_client._client = binance_client.BinanceClient(base_url=base_url)
+
+    sources = fixture_sources()
+    if 'synthetic' in sources.values():
+        print(f"Uyarı: kayıtlı fixture yok, sentetik veri kullanılıyor: {sources}")
+    extra = {'suite': 'hot_paths', 'tickers': len(tickers), 'latency_s': args.latency, 'data': sources}
+    try:
+        if 'indicators' in args.only:
+            bench_indicators(args.repeat, dict(extra, group='indicators'))
+        if 'selectors' in args.only:
+            bench_selectors(args.repeat, dict(extra, group='selectors', llm_latency_s=args.llm_latency))
+        if 'load_cache' in args.only:
+            bench_load_cache(args.repeat, dict(extra, group='load_cache'))
+        if 'pipeline' in args.only:
+            bench_pipeline(args.repeat, dict(extra, group='pipeline', llm_latency_s=args.llm_latency),
+                           base_url, PIPELINE_COINS)
+        if 'backtest' in args.only:
+            bench_backtest(args.repeat, dict(extra, group='backtest'))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        server.shutdown()
@@ -0,0 +1,166 @@
+"""Binance /ticker/24hr, /klines and NewsAPI payloads for benchmark replay
+
+Repoda kayıtlı fixture yok (benchmarks/fixtures/ commit edilmedi): tickers
+repo kökündeki cache.json'dan (gerçek bir /ticker/24hr cevabı), klines ve
+haberler ise sabit bir zamana göre sentetik olarak üretilir
+(stub_server.make_klines, make_articles). `python fixtures.py --record ...`
+canlı cevapları benchmarks/fixtures/ altına kaydeder; kayıt varsa o kullanılır.
+Hangi kaynağın kullanıldığı fixture_sources() ile sonuçlara yazılır.
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timedelta, timezone
+import _common
+from _common import ROOT
+from stub_server import make_klines, make_articles
+
+FIXTURES_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+TICKERS_FIXTURE = os.path.join(FIXTURES_DIR, 'ticker_24hr.json')
+NEWS_FIXTURE = os.path.join(FIXTURES_DIR, 'news.json')
+KLINES_DIR = os.path.join(FIXTURES_DIR, 'klines')
+FIXED_NOW_MS = 1735689600000   # 2025-01-01 00:00 UTC, üretilen klines bu ana kadar
+INTERVAL_MS = {'1m': 60000, '3m': 180000, '5m': 300000, '15m': 900000, '30m': 1800000,
+               '1h': 3600000, '2h': 7200000, '4h': 14400000, '1d': 86400000}
+
+_klines = {}
+
+
+def load_tickers():
+    """Recorded /ticker/24hr payload, else the repo's cache.json"""
+    path = TICKERS_FIXTURE if os.path.exists(TICKERS_FIXTURE) else os.path.join(ROOT, 'cache.json')
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _klines_path(symbol, interval):
+    return os.path.join(KLINES_DIR, f'{symbol}_{interval}.json')
+
+
+def load_klines(symbol, interval, limit):
+    """Last `limit` recorded rows for (symbol, interval), generated ones when not recorded"""
+    key = (symbol, interval)
+    if key not in _klines:
+        path = _klines_path(symbol, interval)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                _klines[key] = json.load(f)
+        else:
+            _klines[key] = None
+    rows = _klines[key]
+    if rows is None or len(rows) < limit:
+        return make_klines(limit, step=INTERVAL_MS[interval], now_ms=FIXED_NOW_MS)
+    return rows[-limit:]
+
+
+def replay_klines(symbol, interval, limit, start_time=None, end_time=None):
+    """stub_server klines hook: recorded rows filtered like /klines, None when not recorded"""
+    if not os.path.exists(_klines_path(symbol, interval)):
+        return None
+    with open(_klines_path(symbol, interval), 'r') as f:
+        rows = json.load(f)
+    if start_time is not None:
+        return [r for r in rows if r[0] >= start_time][:limit]
+    if end_time is not None:
+        rows = [r for r in rows if r[0] <= end_time]
+    return rows[-limit:]
+
+
+def fixture_sources():
+    """Where each payload comes from: 'recorded' fixtures or 'cache.json'/'synthetic' fallbacks"""
+    recorded = os.path.isdir(KLINES_DIR) and any(name.endswith('.json') for name in os.listdir(KLINES_DIR))
+    return {'tickers': 'recorded' if os.path.exists(TICKERS_FIXTURE) else 'cache.json',
+            'klines': 'recorded' if recorded else 'synthetic',
+            'news': 'recorded' if os.path.exists(NEWS_FIXTURE) else 'synthetic'}
+
+
+def random_walk_klines(symbols, bars, interval='1m', seed=0):
+    """
+    Deterministic random-walk klines for many symbols, {symbol: typed columns}
+    ending at FIXED_NOW_MS; every symbol gets its own volatility, volume and
+    trend so the selectors have something to rank (backtest benchmarks)
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    step = INTERVAL_MS[interval]
+    times = FIXED_NOW_MS - step * np.arange(bars, 0, -1, dtype=np.int64)
+    out = {}
+    for symbol in symbols:
+        sigma = rng.uniform(0.0005, 0.006)
+        drift = rng.normal(0, sigma / 20)
+        close = rng.uniform(0.01, 100) * np.exp(np.cumsum(rng.normal(drift, sigma, bars)))
+        open_ = np.concatenate([close[:1], close[:-1]])
+        spread = np.abs(rng.normal(0, sigma, bars)) * close
+        volume = rng.lognormal(np.log(rng.uniform(1e3, 1e6)), 0.5, bars)
+        trades = rng.poisson(rng.uniform(5, 200), bars)
+        out[symbol] = {
+            'timestamp': times,
+            'open': open_,
+            'high': np.maximum(open_, close) + spread,
+            'low': np.minimum(open_, close) - spread,
+            'close': close,
+            'volume': volume,
+            'close_time': times + step - 1,
+            'quote_volume': volume * close,
+            'trades_count': trades,
+            'taker_buy_volume': volume / 2,
+            'taker_buy_quote_volume': volume * close / 2,
+        }
+    return out
+
+
+def load_news(coins, per_coin=8):
+    """
+    Recorded NewsAPI articles (re-dated so the newest is now, the news window
+    is relative to the current time), else generated ones for coins
+    """
+    if not os.path.exists(NEWS_FIXTURE):
+        return make_articles(coins, per_coin)
+    with open(NEWS_FIXTURE, 'r') as f:
+        articles = json.load(f)
+    parse = lambda s: datetime.strptime(s, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    newest = max((parse(a['publishedAt']) for a in articles), default=None)
+    if newest is None:
+        return articles
+    shift = datetime.now(timezone.utc) - newest - timedelta(minutes=1)
+    return [dict(a, publishedAt=(parse(a['publishedAt']) + shift).strftime('%Y-%m-%dT%H:%M:%SZ'))
+            for a in articles]
+
+
+def record(symbols, intervals, limit, coins):
+    """Saves live /ticker/24hr, /klines and (NEWS_API_KEY varsa) NewsAPI payloads as fixtures"""
+    import requests
+    from binance_client import BinanceClient
+    from news_analyzer import NEWS_URL
+    client = BinanceClient()
+    os.makedirs(KLINES_DIR, exist_ok=True)
+    with open(TICKERS_FIXTURE, 'w') as f:
+        json.dump(client.get_json('/ticker/24hr'), f)
+    for symbol in symbols:
+        for interval in intervals:
+            rows = client.get_json('/klines', {'symbol': symbol, 'interval': interval, 'limit': limit})
+            with open(_klines_path(symbol, interval), 'w') as f:
+                json.dump(rows, f)
+            print(f"{symbol} {interval}: {len(rows)} mum kaydedildi")
+    api_key = os.getenv('NEWS_API_KEY')
+    if coins and api_key:
+        articles = []
+        for coin in coins:
+            response = requests.get(NEWS_URL, params={'q': f'(cryptocurrency OR crypto) AND {coin}',
+                                                      'language': 'en', 'pageSize': 10, 'apiKey': api_key})
+            articles.extend(response.json().get('articles', []))
+        with open(NEWS_FIXTURE, 'w') as f:
+            json.dump(articles, f)
+        print(f"{len(articles)} haber kaydedildi")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--record', action='store_true', help='Canlı Binance/NewsAPI cevaplarını kaydet')
+    parser.add_argument('--symbols', nargs='+', default=['BTCUSDT', 'ETHUSDT'])
+    parser.add_argument('--intervals', nargs='+', default=['1m', '1h'])
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--coins', nargs='+', default=['BTC', 'ETH'])
+    args = parser.parse_args()
+    if args.record:
+        record(args.symbols, args.intervals, args.limit, args.coins)
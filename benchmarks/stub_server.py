@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+STEP_MS = 60000
+
+
+def make_klines(limit, start_time=None, end_time=None, step=STEP_MS, now_ms=None):
+    """Deterministic kline rows in /api/v3/klines format"""
+    now_ms = now_ms or int(time.time() * 1000)
+    last_open = now_ms // step * step
+    if start_time is not None:
+        first = max(start_time + (-start_time) % step, 0)
+        opens = [t for t in range(first, last_open + 1, step)][:limit]
+    else:
+        last = last_open if end_time is None else min(last_open, end_time // step * step)
+        opens = list(range(last - (limit - 1) * step, last + 1, step))
+    rows = []
+    for t in opens:
+        price = 100 + (t // step) % 97 * 0.1
+        rows.append([t, f'{price:.8f}', f'{price * 1.01:.8f}', f'{price * 0.99:.8f}', f'{price:.8f}',
+                     '12.50000000', t + step - 1, '1250.00000000', 42, '6.00000000', '600.00000000', '0'])
+    return rows
+
+
+def make_articles(coins, per_coin=8, now=None, spacing=3600):
+    """NewsAPI style articles, per_coin for each coin, one every `spacing` seconds back from now"""
+    now = now or time.time()
+    articles = []
+    for coin in coins:
+        for i in range(per_coin):
+            published = datetime.fromtimestamp(now - i * spacing, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            articles.append({
+                'source': {'id': None, 'name': 'Stub News'}, 'author': None,
+                'title': f'{coin} crypto update #{i}', 'description': f'{coin} moved today ({i})',
+                'url': f'https://news.example/{coin.lower()}/{i}', 'publishedAt': published,
+                'content': f'{coin} ...',
+            })
+    return articles
+
+
+def news_payload(articles, query):
+    # /v2/everything: 'q' içindeki son kelime coin, 'from' dahil, en yeni önce
+    coin = query.get('q', '').split()[-1].lower() if query.get('q') else ''
+    since = query.get('from', '')
+    matches = [a for a in articles
+               if coin in (a['title'] + ' ' + a['description']).lower() and a['publishedAt'] >= since]
+    matches.sort(key=lambda a: a['publishedAt'], reverse=True)
+    return {'status': 'ok', 'totalResults': len(matches), 'articles': matches[:int(query.get('pageSize', 100))]}
+
+
+class StubBinanceHandler(BaseHTTPRequestHandler):
+    # Keep-alive için HTTP/1.1 ve Content-Length gerekli; başlık ve gövde tek
+    # pakette gitmezse Nagle + delayed ACK her isteğe ~40ms ekler
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = 1 << 16
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        time.sleep(self.server.latency)
+        self.server.requests += 1
+        status = 200
+        if url.path.endswith('/klines'):
+            self.server.kline_symbols.append(query.get('symbol'))
+            args = (int(query.get('limit', 500)),
+                    int(query['startTime']) if 'startTime' in query else None,
+                    int(query['endTime']) if 'endTime' in query else None)
+            payload = None
+            if self.server.klines is not None:
+                payload = self.server.klines(query.get('symbol'), query.get('interval'), *args)
+            if self.server.symbols and query.get('symbol') not in self.server.symbols:
+                # Binance gibi: bilinmeyen çift (ör. BTCUSDTUSDT) 400 döner
+                status, payload = 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+            if payload is None:
+                payload = make_klines(*args)
+        elif url.path.endswith('/ticker/24hr'):
+            payload = self.server.tickers
+            if 'symbol' in query:
+                payload = next((t for t in payload if t['symbol'] == query['symbol']), {})
+            elif 'symbols' in query:
+                wanted = set(json.loads(query['symbols']))
+                payload = [t for t in payload if t['symbol'] in wanted]
+        elif url.path.endswith('/everything'):
+            self.server.news_requests.append(query)
+            payload = news_payload(self.server.news, query)
+        else:
+            payload = {'code': -1, 'msg': 'not found'}
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-MBX-USED-WEIGHT-1M', str(self.server.requests))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(latency=0.02, tickers=None, port=0, news=None, klines=None):
+    """
+    Starts the stub in a daemon thread, returns (server, base_url); NewsAPI stub at server.news_url
+
+    klines: optional (symbol, interval, limit, start_time, end_time) -> rows replaying recorded
+    payloads, None from it falls back to generated klines
+
+    /klines requests for symbols missing from tickers are answered with Binance's
+    400 "Invalid symbol." (any symbol is accepted without tickers); the requested
+    symbols are kept in server.kline_symbols
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubBinanceHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.tickers = tickers or []
+    server.symbols = {t['symbol'] for t in server.tickers}
+    server.kline_symbols = []
+    server.requests = 0
+    server.news = news or []
+    server.klines = klines
+    server.news_requests = []
+    server.news_url = f'http://127.0.0.1:{server.server_port}/v2/everything'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/api/v3'
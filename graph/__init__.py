@@ -1,3 +1,9 @@
-from realtime_selector import select_potential_coins, load_cache
-
+# Seçici ilk erişimde yüklenir; `import graph` numpy/cache okuma maliyeti getirmez
 __all__ = ['select_potential_coins', 'load_cache']
+
+
+def __getattr__(name):
+    if name in __all__:
+        import realtime_selector
+        return getattr(realtime_selector, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
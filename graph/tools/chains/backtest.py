@@ -0,0 +1,426 @@
+import argparse
+import time
+import numpy as np
+from kline_store import KlineStore, KLINE_STORE_DIR
+from scoring import TickerArrays, PROFILES, score
+from instrumentation import span
+
+# Prompt'lardaki scalping kuralları: %1-2 kar hedefi, %0.5-1 stop, en fazla 6 saat pozisyon
+TAKE_PROFIT = 1.5     # %
+STOP_LOSS = 0.75      # %
+MAX_HOLD = 360        # dakika
+FEE = 0.1             # işlem başına komisyon, % (giriş ve çıkışta ayrı ayrı)
+STEP = 15             # seçiciler kaç dakikada bir çalıştırılır
+SIDES = ('long', 'short', 'trend')
+# Seçilen coinlerin hareket ettiği ufuklar (dakika)
+MOVE_HORIZONS = {'15m': 15, '1h': 60, '6h': 360}
+INTERVAL_MINUTES = {'1m': 1, '3m': 3, '5m': 5, '15m': 15, '30m': 30, '1h': 60}
+DAY_MINUTES = 1440
+HOUR_MINUTES = 60
+CHUNK = 20000         # simülasyonda tek seferde işlenen işlem sayısı ([chunk, max_hold] pencereler)
+
+
+class KlineMatrix:
+    """
+    Klines of many symbols aligned on one time grid.
+
+    fields maps open/high/low/close/volume/quote_volume/trades to [T, S]
+    float64 arrays (row = bar open time, column = symbol); bars a symbol has
+    no data for (not listed yet, gaps) are NaN.
+    """
+    FIELDS = {'open': 'open', 'high': 'high', 'low': 'low', 'close': 'close',
+              'volume': 'volume', 'quote_volume': 'quote_volume', 'trades': 'trades_count'}
+
+    def __init__(self, times, symbols, fields, interval='1m'):
+        self.times = times
+        self.symbols = symbols
+        self.fields = fields
+        self.interval = interval
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getattr__(self, name):
+        fields = self.__dict__.get('fields', {})
+        if name in fields:
+            return fields[name]
+        raise AttributeError(name)
+
+    @property
+    def minutes(self):
+        return INTERVAL_MINUTES[self.interval]
+
+    def bars(self, minutes):
+        """Number of bars covering `minutes` (at least 1)"""
+        return max(int(round(minutes / self.minutes)), 1)
+
+    @classmethod
+    def from_columns(cls, columns, interval='1m', start=None, end=None):
+        """From {symbol: kline columns} (KlineStore.read / parse_klines output), open times in ms"""
+        step = INTERVAL_MINUTES[interval] * 60000
+        symbols = sorted(s for s, c in columns.items() if len(c['timestamp']))
+        if not symbols:
+            raise ValueError("Backtest için kline verisi yok")
+        first = min(int(columns[s]['timestamp'][0]) for s in symbols)
+        last = max(int(columns[s]['timestamp'][-1]) for s in symbols)
+        if start is not None:
+            first = max(first, start + (-start) % step)
+        if end is not None:
+            last = min(last, end)
+        times = np.arange(first, last + 1, step, dtype=np.int64)
+        # Sembol başına satırlar [S, T] üzerinde ardışık yazılır, sonra [T, S]'ye çevrilir
+        fields = {name: np.full((len(symbols), len(times)), np.nan) for name in cls.FIELDS}
+        for j, symbol in enumerate(symbols):
+            c = columns[symbol]
+            rows = (np.asarray(c['timestamp']) - first) // step
+            keep = (rows >= 0) & (rows < len(times))
+            for name, column in cls.FIELDS.items():
+                fields[name][j, rows[keep]] = c[column][keep]
+        fields = {name: np.ascontiguousarray(values.T) for name, values in fields.items()}
+        return cls(times, np.array(symbols), fields, interval)
+
+    @classmethod
+    def from_store(cls, store, symbols=None, interval='1m', start=None, end=None):
+        """From a KlineStore; symbols are pairs (BTCUSDT), None takes every stored pair with the interval"""
+        if symbols is None:
+            symbols = sorted({s for s, i in store.keys() if i == interval})
+        return cls.from_columns({s: store.read(s, interval) for s in symbols}, interval, start, end)
+
+
+def rolling_sum(cumulative, rows, window):
+    """Sums over the `window` rows ending at rows from a zero-filled cumsum, NaN where the window is incomplete"""
+    before = rows - window
+    out = cumulative[rows] - np.where((before >= 0)[:, None], cumulative[np.maximum(before, 0)], 0)
+    out[before < -1] = np.nan
+    return out
+
+
+def rolling_extreme(values, window, func=np.fmax):
+    """
+    func (np.fmax / np.fmin) over the last `window` rows for every row, NaN
+    until the first full window. van Herk/Gil-Werman: a prefix and a suffix
+    scan inside blocks of `window` rows, so the cost does not grow with window.
+    """
+    n = len(values)
+    out = np.full(values.shape, np.nan)
+    if n < window:
+        return out
+    pad = -n % window
+    blocks = np.concatenate([values, np.full((pad,) + values.shape[1:], np.nan)])
+    blocks = blocks.reshape((-1, window) + values.shape[1:])
+    prefix = func.accumulate(blocks, axis=1).reshape((-1,) + values.shape[1:])[:n]
+    suffix = func.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape((-1,) + values.shape[1:])[:n]
+    # [t-w+1, t] penceresi: başladığı bloğun sonuna kadar (suffix) + bittiği bloğun başından (prefix)
+    out[window - 1:] = func(suffix[:n - window + 1], prefix[window - 1:])
+    return out
+
+
+class ReplayHistory:
+    """TickerHistory stand-in for one replayed timestamp, features() from precomputed per-symbol arrays"""
+
+    def __init__(self, index, features):
+        self.index = index
+        self.values = features
+
+    def features(self, symbols):
+        rows = np.fromiter((self.index[s] for s in symbols), dtype=np.int64, count=len(symbols))
+        return {name: values[rows] for name, values in self.values.items()}
+
+
+class TickerReplay:
+    """
+    /ticker/24hr rebuilt from klines at every evaluation row.
+
+    columns holds the scoring.NUMERIC_FIELDS as [E, S] arrays: rolling 24h
+    volume, quote volume, trade count, high and low, the 24h price change
+    from the open of the first bar in the window, and the last close.
+    features holds change_1h / volume_accel_1h as the cache's TickerHistory
+    would have computed them from snapshots one hour apart.
+    """
+
+    def __init__(self, matrix, step=STEP):
+        day, hour = matrix.bars(DAY_MINUTES), matrix.bars(HOUR_MINUTES)
+        step = matrix.bars(step)
+        # İlk tam 24 saatlik pencereden itibaren; son satırdan sonra giriş mumu olmadığı için hariç
+        rows = np.arange(day - 1, len(matrix) - 1, step)
+        with span('backtest_replay', rows=len(rows)):
+            volume = np.cumsum(np.nan_to_num(matrix.volume), axis=0)
+            quote_volume = np.cumsum(np.nan_to_num(matrix.quote_volume), axis=0)
+            trades = np.cumsum(np.nan_to_num(matrix.trades), axis=0)
+            first_open = matrix.open[rows - day + 1]
+            last = matrix.close[rows]
+            c = {
+                'volume': rolling_sum(volume, rows, day),
+                'quoteVolume': rolling_sum(quote_volume, rows, day),
+                'count': rolling_sum(trades, rows, day),
+                'highPrice': rolling_extreme(matrix.high, day, np.fmax)[rows],
+                'lowPrice': rolling_extreme(matrix.low, day, np.fmin)[rows],
+                'lastPrice': last,
+                'priceChange': last - first_open,
+            }
+            with np.errstate(divide='ignore', invalid='ignore'):
+                c['priceChangePercent'] = c['priceChange'] / first_open * 100
+                hour_ago = np.maximum(rows - hour, 0)
+                volume_then = rolling_sum(volume, hour_ago, day)
+                volume_then[rows - hour < day - 1] = np.nan
+                features = {
+                    'change_1h': (last / matrix.close[hour_ago] - 1) * 100,
+                    # TickerHistory.deltas: son 1 saatin hacmi / 24 saatlik ortalama tempo
+                    'volume_accel_1h': 1 + (c['volume'] - volume_then) / (c['volume'] * hour / day),
+                }
+        self._attach(matrix, rows, c, features)
+
+    def _attach(self, matrix, rows, columns, features):
+        self.matrix = matrix
+        self.rows = rows
+        self.columns = columns
+        self.features = features
+        self.symbols = matrix.symbols
+        self.coins = np.char.replace(matrix.symbols, 'USDT', '')
+        self.index = {s: i for i, s in enumerate(self.symbols.tolist())}
+
+    @classmethod
+    def from_arrays(cls, matrix, rows, columns, features):
+        """Replay over already computed arrays (e.g. views on shared memory in sweep workers)"""
+        replay = cls.__new__(cls)
+        replay._attach(matrix, rows, columns, features)
+        return replay
+
+    def __len__(self):
+        return len(self.rows)
+
+    def arrays(self, i):
+        return TickerArrays(self.symbols, self.coins, {name: values[i] for name, values in self.columns.items()})
+
+    def history(self, i):
+        return ReplayHistory(self.index, {name: values[i] for name, values in self.features.items()})
+
+    def forward_moves(self, horizons=MOVE_HORIZONS):
+        """
+        Largest move (%) up or down from the close at every evaluation row
+        within each horizon, [E, S] per horizon; NaN past the end of the data
+        """
+        m = self.matrix
+        close = m.close[self.rows]
+        moves = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, minutes in horizons.items():
+                bars = m.bars(minutes)
+                ahead = self.rows + bars
+                inside = ahead < len(m)
+                ahead = np.minimum(ahead, len(m) - 1)
+                high = rolling_extreme(m.high, bars, np.fmax)[ahead]
+                low = rolling_extreme(m.low, bars, np.fmin)[ahead]
+                move = np.fmax(high / close - 1, 1 - low / close) * 100
+                move[~inside] = np.nan
+                moves[name] = move
+        return moves
+
+
+def select(replay, profile, top_k=None):
+    """
+    Runs scoring.score on every replayed snapshot
+
+    Returns:
+    - (evaluation index, symbol column, direction) arrays, direction +1 when
+      the short-term change (1h, else 24h) is up and -1 when it is down
+    """
+    top_k = profile.top_k if top_k is None else top_k
+    evals, columns, directions = [], [], []
+    for i in range(len(replay)):
+        scored = score(replay.arrays(i), profile, replay.history(i), top_k=top_k)
+        if len(scored) == 0:
+            continue
+        evals.append(np.full(len(scored), i))
+        columns.append(np.fromiter((replay.index[s] for s in scored.arrays.symbols.tolist()), dtype=np.int64))
+        directions.append(np.where(scored.components['short_term_change'] < 0, -1, 1))
+    if not evals:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    return np.concatenate(evals), np.concatenate(columns), np.concatenate(directions)
+
+
+def _first(hits):
+    # İlk True'nun sütunu, hiç yoksa pencere uzunluğu
+    return np.where(hits.any(axis=1), hits.argmax(axis=1), hits.shape[1])
+
+
+def simulate(matrix, rows, columns, sides, take_profit=TAKE_PROFIT, stop_loss=STOP_LOSS, max_hold=MAX_HOLD,
+             fee=FEE, overlap=False):
+    """
+    Simulates the scalping rules for signals at (row, symbol column, side)
+
+    Every trade enters at the open of the bar after the signal and exits at
+    the target or stop level in the first bar whose high/low reaches it (the
+    stop when both are reached in the same bar), else at the last close
+    within max_hold minutes. All trades are evaluated at once on [n, max_hold]
+    high/low windows gathered with fancy indexing. Without overlap a signal
+    for a symbol that is still in a trade is dropped.
+
+    Returns:
+    - dict of per-trade arrays: row, column, side, entry, exit_row, outcome
+      (1 target, -1 stop, 0 time), gross and net return (%), bars held
+    """
+    hold = matrix.bars(max_hold)
+    entry_rows = rows + 1
+    valid = entry_rows < len(matrix)
+    entry = np.full(len(rows), np.nan)
+    entry[valid] = matrix.open[entry_rows[valid], columns[valid]]
+    valid &= ~np.isnan(entry)
+    rows, columns, sides, entry_rows, entry = (a[valid] for a in (rows, columns, sides, entry_rows, entry))
+
+    n = len(rows)
+    outcome = np.zeros(n, dtype=np.int8)
+    gross = np.zeros(n)
+    held = np.zeros(n, dtype=np.int64)
+    offsets = np.arange(hold)
+    for start in range(0, n, CHUNK):
+        part = slice(start, start + CHUNK)
+        window = entry_rows[part, None] + offsets
+        inside = window < len(matrix)
+        window = np.minimum(window, len(matrix) - 1)
+        column = columns[part, None]
+        high = np.where(inside, matrix.high[window, column], np.nan)
+        low = np.where(inside, matrix.low[window, column], np.nan)
+        close = np.where(inside, matrix.close[window, column], np.nan)
+        price = entry[part, None]
+        side = sides[part, None]
+        with np.errstate(invalid='ignore'):
+            up = (high / price - 1) * 100
+            down = (low / price - 1) * 100
+            best = np.where(side > 0, up, -down)
+            worst = np.where(side > 0, down, -up)
+            first_tp = _first(best >= take_profit)
+            first_sl = _first(worst <= -stop_loss)
+        # Zaman aşımı: penceredeki son geçerli kapanış
+        closed = ~np.isnan(close)
+        last = hold - 1 - closed[:, ::-1].argmax(axis=1)
+        last_close = close[np.arange(len(last)), last]
+        stopped = (first_sl < hold) & (first_sl <= first_tp)
+        target = (first_tp < hold) & ~stopped
+        outcome[part] = np.select([stopped, target], [-1, 1], 0)
+        gross[part] = np.select([stopped, target], [-stop_loss, take_profit],
+                                sides[part] * (last_close / entry[part] - 1) * 100)
+        held[part] = np.select([stopped, target], [first_sl, first_tp], last) + 1
+
+    keep = np.ones(n, dtype=bool)
+    exit_rows = entry_rows + held - 1
+    if not overlap:
+        # Sinyaller zamana göre sıralı; aynı coinde açık işlem varken gelen sinyal atlanır
+        busy = {}
+        for k, (column, entry_row, exit_row) in enumerate(zip(columns.tolist(), entry_rows.tolist(),
+                                                              exit_rows.tolist())):
+            if busy.get(column, -1) >= entry_row:
+                keep[k] = False
+            else:
+                busy[column] = exit_row
+    trades = {'row': rows, 'column': columns, 'side': sides, 'entry': entry, 'exit_row': exit_rows,
+              'outcome': outcome, 'gross': gross, 'net': gross - 2 * fee, 'bars': held}
+    return {name: values[keep] for name, values in trades.items()}
+
+
+def summarize(trades, minutes=1):
+    """Trade count, win rate, average/total net return (%), profit factor, exits by outcome, average hold"""
+    net = trades['net']
+    n = len(net)
+    if n == 0:
+        return {'trades': 0}
+    gains, losses = net[net > 0].sum(), -net[net < 0].sum()
+    return {
+        'trades': n,
+        'win_rate': round(float((net > 0).mean()), 4),
+        'avg_return': round(float(net.mean()), 4),
+        'total_return': round(float(net.sum()), 2),
+        'profit_factor': round(float(gains / losses), 3) if losses else float('inf'),
+        'take_profit': int((trades['outcome'] == 1).sum()),
+        'stop_loss': int((trades['outcome'] == -1).sum()),
+        'timeout': int((trades['outcome'] == 0).sum()),
+        'avg_hold_min': round(float(trades['bars'].mean() * minutes), 1),
+    }
+
+
+def run_backtest(matrix, profile, replay=None, side='trend', take_profit=TAKE_PROFIT, stop_loss=STOP_LOSS,
+                 max_hold=MAX_HOLD, fee=FEE, step=STEP, overlap=False, top_k=None, moves=None):
+    """
+    Replays matrix through one scoring profile and simulates the picks
+
+    Parameters:
+    - matrix: KlineMatrix
+    - profile: ScoringProfile (scoring.PROFILES)
+    - replay: TickerReplay to reuse across profiles (built from matrix/step when None)
+    - side: 'long', 'short' or 'trend' (direction of the 1h change)
+    - take_profit, stop_loss: %, max_hold: minutes, fee: % per side
+    - moves: replay.forward_moves() to reuse, compares the picks' moves with every symbol's
+
+    Returns:
+    - (summary dict, trades dict)
+    """
+    if side not in SIDES:
+        raise ValueError(f"side şunlardan biri olmalı: {', '.join(SIDES)}")
+    replay = replay or TickerReplay(matrix, step)
+    with span('backtest', profile=profile.name):
+        evals, columns, directions = select(replay, profile, top_k)
+        sides = directions if side == 'trend' else np.full(len(evals), 1 if side == 'long' else -1)
+        trades = simulate(matrix, replay.rows[evals], columns, sides, take_profit, stop_loss, max_hold, fee,
+                          overlap)
+    summary = {'profile': profile.name, 'signals': len(evals)}
+    summary.update(summarize(trades, matrix.minutes))
+    if moves is not None and len(evals):
+        # Seçilen coinler, aynı anda tüm coinlere göre ufuk içinde ne kadar hareket etti
+        with np.errstate(invalid='ignore'):
+            for name, move in moves.items():
+                summary[f'move_{name}'] = round(float(np.nanmean(move[evals, columns])), 3)
+                summary[f'market_move_{name}'] = round(float(np.nanmean(move)), 3)
+    return summary, trades
+
+
+def fetch_history(symbols, days, interval='1m', store_dir=KLINE_STORE_DIR):
+    """Backfills `days` of klines for pairs into the kline store (older pages through CryptoAnalyzer)"""
+    from crypto_analyzer import CryptoAnalyzer
+    analyzer = CryptoAnalyzer(store_dir=store_dir)
+    limit = days * DAY_MINUTES // INTERVAL_MINUTES[interval]
+    for symbol in symbols:
+        try:
+            analyzer.load_klines(symbol.replace('USDT', ''), interval, limit)
+        except Exception as e:
+            print(f"{symbol} geçmişi indirilemedi: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Seçici skorlamasını kline geçmişi üzerinde scalping kurallarıyla test et')
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=sorted(PROFILES))
+    parser.add_argument('--store', default=KLINE_STORE_DIR, help='KlineStore dizini')
+    parser.add_argument('--symbols', nargs='+', help='Çiftler (BTCUSDT), varsayılan depodaki tümü')
+    parser.add_argument('--interval', default='1m', choices=sorted(INTERVAL_MINUTES))
+    parser.add_argument('--fetch', type=int, metavar='DAYS', help='Önce --symbols için bu kadar günlük geçmişi indir')
+    parser.add_argument('--step', type=int, default=STEP, help='Seçici çalıştırma aralığı (dakika)')
+    parser.add_argument('--side', choices=SIDES, default='trend')
+    parser.add_argument('--take-profit', type=float, default=TAKE_PROFIT)
+    parser.add_argument('--stop-loss', type=float, default=STOP_LOSS)
+    parser.add_argument('--max-hold', type=int, default=MAX_HOLD, help='dakika')
+    parser.add_argument('--fee', type=float, default=FEE)
+    parser.add_argument('--overlap', action='store_true', help='Aynı coinde üst üste işlemlere izin ver')
+    args = parser.parse_args(argv)
+
+    if args.fetch:
+        if not args.symbols:
+            parser.error('--fetch için --symbols gerekli')
+        fetch_history(args.symbols, args.fetch, args.interval, args.store)
+
+    start = time.perf_counter()
+    matrix = KlineMatrix.from_store(KlineStore(args.store), args.symbols, args.interval)
+    replay = TickerReplay(matrix, args.step)
+    moves = replay.forward_moves()
+    print(f"{len(matrix.symbols)} coin x {len(matrix)} mum, {len(replay)} seçim anı "
+          f"({time.perf_counter() - start:.2f}s)")
+    for name in args.profiles:
+        start = time.perf_counter()
+        summary, _ = run_backtest(matrix, PROFILES[name], replay, args.side, args.take_profit, args.stop_loss,
+                                  args.max_hold, args.fee, args.step, args.overlap, moves=moves)
+        print(f"\n{name} ({time.perf_counter() - start:.2f}s)")
+        for key, value in summary.items():
+            print(f"  {key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import asyncio
+import random
+from rate_limiter import get_scheduler, request_weight, PRIORITY_DEFAULT
+from instrumentation import span, count
+
+BINANCE_URL = 'https://api.binance.com/api/v3'
+
+# Varsayılan bağlantı ayarları
+TIMEOUT = 10           # saniye
+MAX_CONNECTIONS = 20   # havuzdaki keep-alive bağlantı sayısı
+CONCURRENCY = 10       # aynı anda uçuşta olan istek sayısı (async)
+RETRIES = 3
+BACKOFF = 0.5          # saniye, her denemede iki katına çıkar
+RETRY_STATUS = (500, 502, 503, 504)
+# 429/418 urllib3'e bırakılmaz, WeightScheduler üzerinden tekrar denenir
+RATE_LIMIT_STATUS = (418, 429)
+
+
+class BinanceAPIError(Exception):
+    """Non-2xx response from Binance"""
+
+    def __init__(self, status, payload=None):
+        super().__init__(f"Binance API Hatası: {status} {payload}")
+        self.status = status
+        self.payload = payload
+
+
+class BinanceClient:
+    """
+    Blocking Binance REST client on a shared keep-alive connection pool.
+
+    Every module that talks to Binance goes through get_client() so TCP/TLS
+    connections are reused, every request has a timeout and transient errors
+    (5xx, dropped connections) are retried with exponential backoff. Each
+    request first takes its weight from the shared WeightScheduler; rate
+    limit responses (429/418) are retried once the scheduler lifts the ban.
+    """
+
+    def __init__(self, base_url=BINANCE_URL, timeout=TIMEOUT, max_connections=MAX_CONNECTIONS,
+                 retries=RETRIES, backoff=BACKOFF, scheduler=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.scheduler = scheduler or get_scheduler()
+        # requests (~0.1s import) yalnızca senkron istemci oluşturulurken yüklenir
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUS,
+                      allowed_methods=['GET'], respect_retry_after_header=False,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections,
+                              max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get_json(self, path, params=None, priority=PRIORITY_DEFAULT, parse=None):
+        """
+        GET path and decode the JSON body
+
+        parse: optional callable for the raw body of a 200 response (e.g. orjson.loads),
+        error bodies are always decoded with response.json()
+        """
+        weight = request_weight(path, params)
+        for attempt in range(self.retries + 1):
+            self.scheduler.acquire(weight, priority)
+            with span('binance_request', path=path):
+                response = self.session.get(f'{self.base_url}{path}', params=params, timeout=self.timeout)
+            count('binance_responses', path=path, status=response.status_code)
+            self.scheduler.observe(response.status_code, response.headers)
+            if response.status_code == 200 and parse is not None:
+                return parse(response.content)
+            try:
+                data = response.json()
+            except ValueError:
+                data = response.text
+            if response.status_code == 200:
+                return data
+            if response.status_code not in RATE_LIMIT_STATUS or attempt == self.retries:
+                raise BinanceAPIError(response.status_code, data)
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncBinanceClient:
+    """
+    asyncio Binance REST client (aiohttp) for concurrent fan-outs.
+
+    Use as `async with AsyncBinanceClient() as client:`; the connector keeps
+    connections alive between requests and a semaphore caps how many are in
+    flight at once. Shares the WeightScheduler with BinanceClient.
+    """
+
+    def __init__(self, base_url=BINANCE_URL, timeout=TIMEOUT, max_connections=MAX_CONNECTIONS,
+                 concurrency=CONCURRENCY, retries=RETRIES, backoff=BACKOFF, scheduler=None,
+                 priority=PRIORITY_DEFAULT):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.scheduler = scheduler or get_scheduler()
+        self.priority = priority
+        self.session = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(connector=connector,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_json(self, path, params=None, priority=None, parse=None):
+        """BinanceClient.get_json over aiohttp"""
+        import aiohttp
+        url = f'{self.base_url}{path}'
+        weight = request_weight(path, params)
+        priority = self.priority if priority is None else priority
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+            try:
+                # Ağırlık semaforun dışında alınır ki öncelik sırası tüm istemciler için geçerli olsun
+                await self.scheduler.aacquire(weight, priority)
+                async with self.semaphore:
+                    with span('binance_request', path=path):
+                        async with self.session.get(url, params=params) as response:
+                            self.scheduler.observe(response.status, response.headers)
+                            if response.status == 200 and parse is not None:
+                                body = await response.read()
+                                count('binance_responses', path=path, status=response.status)
+                                return parse(body)
+                            try:
+                                data = await response.json(content_type=None)
+                            except ValueError:
+                                data = await response.text()
+                        count('binance_responses', path=path, status=response.status)
+                        if response.status == 200:
+                            return data
+                        retryable = RETRY_STATUS + RATE_LIMIT_STATUS
+                        if response.status not in retryable or attempt == self.retries:
+                            raise BinanceAPIError(response.status, data)
+                        if response.status in RATE_LIMIT_STATUS:
+                            # Bekleme süresini scheduler yönetir
+                            delay = 0
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(delay)
+
+    async def gather(self, calls, return_exceptions=True):
+        """Runs many (path, params) requests concurrently, results in input order"""
+        return await asyncio.gather(*(self.get_json(path, params) for path, params in calls),
+                                    return_exceptions=return_exceptions)
+
+
+_client = None
+
+
+def get_client():
+    """Process-wide shared BinanceClient"""
+    global _client
+    if _client is None:
+        _client = BinanceClient()
+    return _client
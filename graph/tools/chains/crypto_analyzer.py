@@ -1,60 +1,315 @@
-import pandas as pd
 import numpy as np
-import requests
-import ta
+import time
+import asyncio
+import weakref
 from datetime import datetime
 import warnings
+from indicator_engine import IncrementalIndicators, INDICATOR_COLUMNS
+from vector_indicators import calculate_indicators_batch, CANDLE_FIELDS
+from kline_store import KlineStore, KLINE_STORE_DIR, INTERVAL_MS, empty_klines
+from kline_parser import parse_klines, loads, EXTENDED_COLUMNS
+from resampler import Resampler, BASE_INTERVAL
+from binance_client import get_client, AsyncBinanceClient, CONCURRENCY
+from rate_limiter import PRIORITY_ORDER, PRIORITY_BACKGROUND
+from instrumentation import timed
+# pandas ve ta (~0.4s import) ilk DataFrame oluşturulurken yüklenir
 warnings.filterwarnings('ignore')
 
 class CryptoAnalyzer:
-    def __init__(self):
-        self.base_url = 'https://api.binance.com/api/v3'
+    def __init__(self, incremental=True, store_dir=KLINE_STORE_DIR, client=None, concurrency=CONCURRENCY,
+                 priority=PRIORITY_ORDER, resample=True, dtype=np.float64):
+        self.client = client or get_client()
+        self.base_url = self.client.base_url
+        # get_data işlem yolunda çalışır, get_data_batch taramaları arka planda
+        self.priority = priority
+        # get_data_batch'te aynı anda uçuşta olan istek sayısı
+        self.concurrency = concurrency
+        # (symbol, interval) -> IncrementalIndicators
+        self.incremental = incremental
+        self.engines = {}
+        # Kapanmış mumlar diskte tutulur, store_dir=None ile kapatılır
+        self.store = KlineStore(store_dir) if store_dir else None
+        # Desteklenen aralıklar tek bir 1m serisinden türetilir (sembol başına tek /klines isteği);
+        # 1m geçmişi sayfalanarak depoda tutulduğu için kline store gerektirir
+        self.resampler = Resampler() if resample and self.store is not None else None
+        self._base_locks = weakref.WeakKeyDictionary()   # event loop -> {symbol: asyncio.Lock}
+        # Döndürülen fiyat/hacim sütunlarının tipi; float32 belleği yarıya indirir (depo float64 tutar)
+        self.dtype = np.dtype(dtype)
         
-    def get_data(self, symbol, interval='1h', limit=100):
+    @timed('get_data', mode='sync')
+    def get_data(self, symbol, interval='1h', limit=100, extended=False):
         """
         Fetches cryptocurrency data from Binance
         
         Parameters:
         - symbol: str, e.g., 'BTC', 'ETH', 'BNB'
         - interval: str, e.g., '1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h', '1d', '3d', '1w', '1M'
-        - limit: int, max 1000 candles
+        - limit: int, max 1000 candles (more with the kline store, older history is paged in)
+        - extended: bool, also return quote_volume, trades_count, taker_buy_volume and
+          taker_buy_quote_volume
         
         Returns:
         - DataFrame: timestamp, open, high, low, close, volume and technical indicators
         """
         try:
-            url = f'{self.base_url}/klines'
-            params = {
-                'symbol': f'{symbol}USDT',
-                'interval': interval,
-                'limit': limit
-            }
+            return self._frame(symbol, interval, self.load_klines(symbol, interval, limit), extended)
             
-            response = requests.get(url, params=params)
-            data = response.json()
-            
-            df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 
-                                           'volume', 'close_time', 'quote_volume', 'trades_count',
-                                           'taker_buy_volume', 'taker_buy_quote_volume', 'ignore'])
-            
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(float)
+        except Exception as e:
+            print(f"Error fetching data ({symbol}): {e}")
+            return None
+
+    @timed('get_data', mode='async')
+    async def aget_data(self, client, symbol, interval='1h', limit=100, extended=False):
+        """get_data over an AsyncBinanceClient, for callers that already run an event loop"""
+        try:
+            return self._frame(symbol, interval, await self.aload_klines(client, symbol, interval, limit), extended)
             
+        except Exception as e:
+            print(f"Error fetching data ({symbol}): {e}")
+            return None
+
+    def _frame(self, symbol, interval, columns, extended=False):
+        import pandas as pd
+        if self.dtype != np.float64:
+            columns = {name: values.astype(self.dtype, copy=False) if values.dtype.kind == 'f' else values
+                       for name, values in columns.items()}
+        df = pd.DataFrame(columns)
+        
+        if self.incremental:
+            df = self.update_indicators(symbol, interval, df)
+        else:
             df = self.calculate_indicators(df)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        
+        cols = ['timestamp', 'open', 'high', 'low', 'close', 'volume',
+               'RSI', 'MACD', 'MACD_Signal', 'MACD_Hist',
+               'BB_upper', 'BB_middle', 'BB_lower', 'Stoch_RSI', 'VWAP']
+        if extended:
+            cols += EXTENDED_COLUMNS
+        
+        return df[cols]
+
+    def fetch_klines(self, symbol, interval='1h', limit=100, start_time=None, end_time=None):
+        """Raw kline rows for {symbol}USDT from /klines"""
+        data = self.client.get_json('/klines', self._klines_params(symbol, interval, limit, start_time, end_time),
+                                    priority=self.priority, parse=loads)
+        if not isinstance(data, list):
+            raise ValueError(f"Binance API Hatası: {data}")
+        return data
+
+    async def afetch_klines(self, client, symbol, interval='1h', limit=100, start_time=None, end_time=None):
+        """fetch_klines over an AsyncBinanceClient"""
+        data = await client.get_json('/klines', self._klines_params(symbol, interval, limit, start_time, end_time),
+                                     parse=loads)
+        if not isinstance(data, list):
+            raise ValueError(f"Binance API Hatası: {data}")
+        return data
+
+    def _klines_params(self, symbol, interval, limit, start_time=None, end_time=None):
+        params = {
+            'symbol': f'{symbol}USDT',
+            'interval': interval,
+            'limit': limit
+        }
+        if start_time is not None:
+            params['startTime'] = start_time
+        if end_time is not None:
+            params['endTime'] = end_time
+        return params
+
+    def load_klines(self, symbol, interval='1h', limit=100):
+        """
+        Last `limit` klines as typed columns
+        
+        With the kline store only candles newer than the last stored close_time
+        are requested, closed candles are appended to the store and history is
+        read back from disk. Windows larger than the 1000-candle API limit are
+        backfilled page by page. The last row may be the still-open candle.
+        Intervals the resampler supports are derived from the symbol's 1m
+        series, so every interval of a symbol shares one download.
+        """
+        if not self._resampled(interval, limit):
+            return self._drive(symbol, interval, limit)
+        base = self.resampler.cached_base(symbol, Resampler.base_limit(interval, limit))
+        if base is None:
+            base = self._drive(symbol, BASE_INTERVAL, self.resampler.fetch_limit(symbol, interval, limit))
+            self.resampler.set_base(symbol, base)
+        return self.resampler.bars(symbol, interval, limit, base)
+
+    async def aload_klines(self, client, symbol, interval='1h', limit=100):
+        """load_klines over an AsyncBinanceClient"""
+        if not self._resampled(interval, limit):
+            return await self._adrive(client, symbol, interval, limit)
+        # Aynı sembolün aralıkları eşzamanlı istenirse 1m serisi bir kez çekilir, diğerleri bekleyip onu kullanır
+        locks = self._base_locks.setdefault(asyncio.get_running_loop(), {})
+        async with locks.setdefault(symbol, asyncio.Lock()):
+            base = self.resampler.cached_base(symbol, Resampler.base_limit(interval, limit))
+            if base is None:
+                base = await self._adrive(client, symbol, BASE_INTERVAL,
+                                          self.resampler.fetch_limit(symbol, interval, limit))
+                self.resampler.set_base(symbol, base)
+        return self.resampler.bars(symbol, interval, limit, base)
+
+    def _resampled(self, interval, limit):
+        return self.resampler is not None and self.resampler.supports(interval, limit)
+
+    def _drive(self, symbol, interval, limit):
+        steps = self._load_klines(symbol, interval, limit)
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(self.fetch_klines(symbol, interval, **request))
+        except StopIteration as done:
+            return done.value
+
+    async def _adrive(self, client, symbol, interval, limit):
+        steps = self._load_klines(symbol, interval, limit)
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(await self.afetch_klines(client, symbol, interval, **request))
+        except StopIteration as done:
+            return done.value
+
+    def _load_klines(self, symbol, interval, limit):
+        # fetch_klines argümanlarını yield eder, karşılığında ham satırları alır;
+        # böylece aynı mantık hem senkron hem async sürücüyle çalışır
+        if self.store is None:
+            rows = yield {'limit': limit}
+            return parse_klines(rows, dtype=self.dtype)
+        
+        pair = f'{symbol}USDT'
+        now_ms = int(time.time() * 1000)
+        last_close = self.store.last_close_time(pair, interval)
+        if last_close is None:
+            page = min(limit, 1000)
+            rows = yield {'limit': page}
+            columns = parse_klines(rows)
+            if len(rows) < page:
+                self.store.mark_complete(pair, interval)
+        else:
+            # limit geçen mum sayısına göre (+1 pay): sık yoklamalar en düşük ağırlıkla (1) gider;
+            # uzun bir aradan sonra birden fazla sayfa gerekebilir
+            while True:
+                page = self._delta_limit(interval, last_close, now_ms)
+                rows = yield {'limit': page, 'start_time': last_close + 1}
+                columns = parse_klines(rows)
+                if len(rows) < page:
+                    break
+                self.store.append(pair, interval, columns)
+                last_close = int(columns['close_time'][-1])
+        
+        closed = columns['close_time'] < now_ms
+        self.store.append(pair, interval, {name: values[closed] for name, values in columns.items()})
+        current = {name: values[~closed] for name, values in columns.items()}
+        
+        needed = max(limit - len(current['timestamp']), 0)
+        while self.store.count(pair, interval) < needed and not self.store.is_complete(pair, interval):
+            page = min(needed - self.store.count(pair, interval), 1000)
+            first = self.store.first_open_time(pair, interval)
+            if first is None:
+                break
+            rows = yield {'limit': page, 'end_time': first - 1}
+            self.store.prepend(pair, interval, parse_klines(rows) if rows else empty_klines())
+            if len(rows) < page:
+                self.store.mark_complete(pair, interval)
+        
+        stored = self.store.read(pair, interval, needed) if needed else empty_klines()
+        return {name: np.concatenate([stored[name], current[name]]) for name in current}
+
+    @staticmethod
+    def _delta_limit(interval, last_close, now_ms):
+        """Candles opened since last_close (the open one included) plus one, capped at 1000"""
+        step = INTERVAL_MS.get(interval)
+        if step is None:
+            return 1000
+        return min(max(now_ms - last_close - 1, 0) // step + 2, 1000)
+
+    def get_data_batch(self, symbols, interval='1h', limit=100, as_frame=False):
+        """
+        Fetches data for many symbols and calculates indicators in one vectorized pass
+        
+        Candles are stacked into a (symbols, candles, fields) array, symbols with
+        a shorter history are left-padded with NaN and trimmed again on output.
+        
+        Parameters:
+        - symbols: list of str, e.g., ['BTC', 'ETH']
+        - interval, limit: same as get_data
+        - as_frame: bool, return one long DataFrame with a 'symbol' column
+        
+        Returns:
+        - dict: symbol -> DataFrame with the get_data columns, backed by views of
+          the shared result array (as_frame=False)
+        - DataFrame: all symbols concatenated (as_frame=True)
+        """
+        return self._stack_batch(asyncio.run(self._gather_klines(symbols, interval, limit)), as_frame)
+
+    async def aget_data_batch(self, symbols, interval='1h', limit=100, as_frame=False):
+        """get_data_batch for callers that already run an event loop"""
+        return self._stack_batch(await self._gather_klines(symbols, interval, limit), as_frame)
+
+    async def _gather_klines(self, symbols, interval, limit):
+        # Tüm semboller tek bir eşzamanlı istek dalgasında çekilir
+        async with AsyncBinanceClient(base_url=self.base_url, concurrency=self.concurrency,
+                                      priority=PRIORITY_BACKGROUND) as client:
+            results = await asyncio.gather(*(self.aload_klines(client, symbol, interval, limit)
+                                             for symbol in symbols), return_exceptions=True)
+        raw = {}
+        for symbol, columns in zip(symbols, results):
+            if isinstance(columns, Exception):
+                print(f"Error fetching data ({symbol}): {columns}")
+            elif len(columns['timestamp']):
+                raw[symbol] = columns
+            else:
+                print(f"Error fetching data ({symbol}): no klines")
+        return raw
+
+    def _stack_batch(self, raw, as_frame):
+        import pandas as pd
+        if not raw:
+            return pd.DataFrame() if as_frame else {}
+        
+        try:
+            names = list(raw)
+            length = max(len(columns['timestamp']) for columns in raw.values())
+            fields = len(CANDLE_FIELDS)
+            # result[..., :fields] mumlar, result[..., fields:] indikatörler
+            result = np.full((len(names), length, fields + len(INDICATOR_COLUMNS)), np.nan)
+            timestamps = np.zeros((len(names), length), dtype='int64')
+            pads = []
+            for i, symbol in enumerate(names):
+                columns = raw[symbol]
+                pad = length - len(columns['timestamp'])
+                pads.append(pad)
+                for j, field in enumerate(CANDLE_FIELDS):
+                    result[i, pad:, j] = columns[field]
+                timestamps[i, pad:] = columns['timestamp']
             
-            cols = ['timestamp', 'open', 'high', 'low', 'close', 'volume',
-                   'RSI', 'MACD', 'MACD_Signal', 'MACD_Hist',
-                   'BB_upper', 'BB_middle', 'BB_lower', 'Stoch_RSI', 'VWAP']
+            result[:, :, fields:] = calculate_indicators_batch(result[:, :, :fields])
             
-            return df[cols]
+            cols = CANDLE_FIELDS + INDICATOR_COLUMNS
+            if as_frame:
+                valid = np.arange(length)[None, :] >= np.array(pads)[:, None]
+                df = pd.DataFrame(result[valid], columns=cols)
+                df.insert(0, 'timestamp', pd.to_datetime(timestamps[valid], unit='ms'))
+                df.insert(0, 'symbol', np.repeat(names, valid.sum(axis=1)))
+                return df
+            
+            frames = {}
+            for i, symbol in enumerate(names):
+                pad = pads[i]
+                index = pd.DatetimeIndex(pd.to_datetime(timestamps[i, pad:], unit='ms'), name='timestamp')
+                frames[symbol] = pd.DataFrame(result[i, pad:], columns=cols, index=index, copy=False)
+            return frames
             
         except Exception as e:
-            print(f"Error fetching data ({symbol}): {e}")
-            return None
+            print(f"Error calculating batch indicators: {e}")
+            return pd.DataFrame() if as_frame else {}
 
+    @timed('calculate_indicators')
     def calculate_indicators(self, df):
         """Calculates technical indicators"""
+        import ta
         try:
             # RSI
             df['RSI'] = ta.momentum.RSIIndicator(df['close']).rsi()
@@ -88,6 +343,65 @@ class CryptoAnalyzer:
             print(f"Error calculating indicators: {e}")
             return None
 
+    @timed('update_indicators')
+    def update_indicators(self, symbol, interval, df):
+        """
+        Calculates technical indicators incrementally
+        
+        Closed candles that were already seen for (symbol, interval) are served
+        from the engine history, only new closed candles are pushed into the
+        rolling state and the still-open last candle is evaluated with peek.
+        The engine is reseeded from df when the new window does not overlap
+        the last committed candle or reaches further back than its history.
+        
+        On a cold engine the values equal calculate_indicators (ta) on df. A
+        warm engine keeps the state of every candle since it was seeded, so
+        for a shifted window the values equal ta over that whole series, not
+        ta over df alone: early rows differ (and are filled where ta over df
+        would still be NaN) because the EMAs do not restart at df's first
+        row. Use incremental=False to get ta over the returned window.
+        
+        Parameters:
+        - df: DataFrame with raw millisecond 'timestamp' and 'close_time' columns
+        """
+        try:
+            open_times = df['timestamp'].astype('int64').tolist()
+            close_times = df['close_time'].astype('int64').tolist()
+            highs = df['high'].tolist()
+            lows = df['low'].tolist()
+            closes = df['close'].tolist()
+            volumes = df['volume'].tolist()
+            now_ms = int(time.time() * 1000)
+            
+            key = (symbol, interval)
+            engine = self.engines.get(key)
+            if (engine is None or engine.last_open_time not in set(open_times)
+                    or open_times[0] < next(iter(engine.history), open_times[0])):
+                engine = IncrementalIndicators(history_size=max(len(df), 1000))
+                self.engines[key] = engine
+            elif engine.history_size < len(df):
+                engine.history_size = len(df)
+            
+            rows = []
+            for i, open_time in enumerate(open_times):
+                if engine.last_open_time is not None and open_time <= engine.last_open_time:
+                    rows.append(engine.history.get(open_time))
+                elif close_times[i] < now_ms:
+                    rows.append(engine.update(open_time, highs[i], lows[i], closes[i], volumes[i]))
+                else:
+                    rows.append(engine.peek(open_time, highs[i], lows[i], closes[i], volumes[i]))
+            
+            empty = (float('nan'),) * len(INDICATOR_COLUMNS)
+            values = np.array([row if row is not None else empty for row in rows], dtype=float)
+            values = values.reshape(len(rows), len(INDICATOR_COLUMNS))
+            for j, col in enumerate(INDICATOR_COLUMNS):
+                df[col] = values[:, j]
+            
+            return df
+        except Exception as e:
+            print(f"Error updating indicators ({symbol}): {e}")
+            return None
+
 
 if __name__ == "__main__":
     analyzer = CryptoAnalyzer()
@@ -1,115 +1,64 @@
-import requests
-import pandas as pd
-from datetime import datetime
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
-import os
-from realtime_selector import load_cache
-load_dotenv()
+from llm_models import get_chat_model
+from llm_cache import cached_invoke
+from binance_client import get_client, BinanceAPIError
+from rate_limiter import PRIORITY_BACKGROUND
+from ticker_history import load_history
+from scoring import TickerArrays, get_profile, score
+from prompt_serializer import market_table, CHOOSER_PROMPT_COLUMNS, PROMPT_TOKEN_BUDGET
 
-load_cache()
+# langchain (~1s import) yalnızca LLM çağrısı yapılırken yüklenir; get_tradeable_coins ihtiyaç duymaz
+_crypto_output = None
 
 class CryptoChooser:
-    def __init__(self):
-        self.binance_url = 'https://api.binance.com/api/v3'
+    def __init__(self, profile=None):
+        self.client = get_client()
+        # None: her çağrıda scoring.get_profile('chooser') (sweep.py ile kaydedilmiş profil varsa o)
+        self._profile = profile
+
+    @property
+    def profile(self):
+        return self._profile or get_profile('chooser')
+
+    def score_tradeable_coins(self, top_k=None):
+        """Binance'de işlem gören coinleri skorlar, skora göre sıralı ScoredTickers döner (BinanceAPIError fırlatabilir)"""
+        print("\n=== Binance API Verileri ===")
+        
+        # Binance verilerini al
+        data = self.client.get_json('/ticker/24hr', priority=PRIORITY_BACKGROUND)
+        
+        # USDT çiftlerini tek seferde tipli dizilere çevir
+        arrays = TickerArrays.from_records(data)
+        print(f"\nToplam USDT Çiftleri: {len(arrays)}")
+        
+        # Kısa vadeli scalping filtreleri ve skorları scoring.CHOOSER_PROFILE'da:
+        # - En az 1M USDT hacim, yüksek işlem sayısı, son 24s'de en az %2 hareket, büyük ve stabil coinler hariç
+        # - Momentum %35, volatilite sıralaması x spread bonusu %25, hacim %25, işlem sayısı %15
+        # - Son 1s momentum %20, hacim ivmesi %10 (cache geçmişi varsa, yoksa 24s değişim kullanılır)
+        return score(arrays, self.profile, history=load_history(), top_k=top_k)
 
     def get_tradeable_coins(self):
         """Binance'de işlem gören coinleri analiz eder"""
         try:
-            print("\n=== Binance API Verileri ===")
-            
-            # Binance verilerini al
-            url = f'{self.binance_url}/ticker/24hr'
-            response = requests.get(url)
-            
-            if response.status_code != 200:
-                print(f"Binance API Hatası: {response.status_code}")
+            try:
+                top_coins = self.score_tradeable_coins(top_k=self.profile.top_k)
+            except BinanceAPIError as e:
+                print(f"Binance API Hatası: {e.status}")
                 return "API hatası: Veriler alınamadı"
-                
-            data = response.json()
-            
-            # USDT çiftlerini filtrele
-            usdt_pairs = [item for item in data if item['symbol'].endswith('USDT')]
-            print(f"\nToplam USDT Çiftleri: {len(usdt_pairs)}")
-            
-            # DataFrame oluştur
-            df = pd.DataFrame(usdt_pairs)
-            
-            # Veri tiplerini düzelt
-            numeric_columns = ['volume', 'quoteVolume', 'priceChangePercent', 'lastPrice', 
-                             'highPrice', 'lowPrice', 'count', 'priceChange']
-            for col in numeric_columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            df['coin'] = df['symbol'].str.replace('USDT', '')
-            
-            # Kısa vadeli scalping için filtreleme
-            mask = (
-                (df['volume'] > 1000000) &      # En az 1M USDT hacim (likidite için)
-                (df['count'] > 10000) &         # Yüksek işlem sayısı (spread düşük olsun)
-                (df['lastPrice'] > 0.00001) &   # Çok düşük fiyatlı coinleri ele
-                (abs(df['priceChangePercent']) > 2) &  # Son 24s'de en az %2 hareket
-                # Büyük ve stabil coinleri çıkar
-                (~df['coin'].isin(['BTC', 'ETH', 'BNB', 'USDT', 'USDC', 'BUSD', 'XRP', 'ADA', 'DOGE', 'DOT', 'MATIC', 'SOL', 'AVAX', 'SHIB', 'TRX', 'LINK', 'UNI', 'LTC']))
-            )
-            df_filtered = df.loc[mask].copy()
-            
-            # Anlık momentum skoru (son fiyat değişimi)
-            df_filtered.loc[:, 'momentum_score'] = abs(df_filtered['priceChange'] / df_filtered['lastPrice'] * 100)
-            
-            # Volatilite skoru (yüksek-düşük farkı)
-            df_filtered.loc[:, 'volatility'] = ((df_filtered['highPrice'] - df_filtered['lowPrice']) / df_filtered['lowPrice'] * 100)
-            df_filtered.loc[:, 'volatility_score'] = df_filtered['volatility'].rank(pct=True)
             
-            # Kısa vadeli volatilite bonusu
-            df_filtered.loc[:, 'volatility_bonus'] = df_filtered['volatility'].apply(
-                lambda x: 3.0 if x > 5 else     # %5'den fazla spread
-                         2.0 if x > 3 else      # %3'den fazla spread
-                         1.5 if x > 2 else      # %2'den fazla spread
-                         1.0                     # Normal spread
-            )
-            
-            # Hacim skoru (scalping için önemli)
-            df_filtered.loc[:, 'volume_score'] = df_filtered['volume'].apply(lambda x: min(3.0, max(0.5, (x / 5000000))))
-            
-            # İşlem sayısı skoru (spread için önemli)
-            df_filtered.loc[:, 'trade_score'] = df_filtered['count'].apply(lambda x: min(2.0, max(0.5, (x / 20000))))
-            
-            # Anlık trend skoru
-            df_filtered.loc[:, 'trend_score'] = df_filtered['priceChangePercent'].apply(
-                lambda x: 2.0 if abs(x) > 3 else     # Son 1s'de %3'den fazla hareket
-                         1.5 if abs(x) > 2 else      # Son 1s'de %2'den fazla hareket
-                         1.0 if abs(x) > 1 else      # Son 1s'de %1'den fazla hareket
-                         0.5                          # Yavaş hareket
-            )
-            
-            # Toplam skor (scalping odaklı)
-            df_filtered.loc[:, 'total_score'] = (
-                df_filtered['momentum_score'] * 0.35 +          # Anlık momentum %35
-                df_filtered['volatility_score'] * df_filtered['volatility_bonus'] * 0.25 +  # Volatilite %25
-                df_filtered['volume_score'] * 0.25 +            # Hacim %25 (likidite önemli)
-                df_filtered['trade_score'] * 0.15               # İşlem sayısı %15
-            )
-            
-            # Skora göre sırala
-            df_filtered = df_filtered.sort_values('total_score', ascending=False)
-            
-            # En iyi 10 coini seç
-            top_coins = df_filtered.head(10)
-            
-            result = f"En İyi Scalping Fırsatları (10 Coin):\n\n"
-            for _, row in top_coins.iterrows():
-                result += f"Coin: {row['coin']}\n"
-                result += f"Fiyat: ${row['lastPrice']:.6f}\n"
-                result += f"Son 1s Değişim: %{row['priceChangePercent']:.2f}\n"
-                result += f"Spread: %{row['volatility']:.2f}\n"
-                result += f"24s Hacim: {row['volume']:,.2f} USDT\n"
-                result += f"İşlem Sayısı: {row['count']:,}\n"
-                result += f"Momentum Skoru: {row['momentum_score']:.2f}\n"
-                result += f"Volatilite Bonus: {row['volatility_bonus']:.1f}x\n"
-                result += f"Toplam Skor: {row['total_score']:.3f}\n"
+            c = top_coins.arrays.columns
+            s = top_coins.components
+            
+            result = f"En İyi Scalping Fırsatları ({len(top_coins.coins)} Coin):\n\n"
+            for i, coin in enumerate(top_coins.coins):
+                result += f"Coin: {coin}\n"
+                result += f"Fiyat: ${c['lastPrice'][i]:.6f}\n"
+                result += f"Son 1s Değişim: %{s['short_term_change'][i]:.2f}\n"
+                result += f"Spread: %{s['volatility'][i]:.2f}\n"
+                result += f"24s Hacim: {c['volume'][i]:,.2f} USDT\n"
+                result += f"İşlem Sayısı: {int(c['count'][i]):,}\n"
+                result += f"Momentum Skoru: {s['momentum'][i]:.2f}\n"
+                result += f"Volatilite Bonus: {s['volatility_bonus'][i]:.1f}x\n"
+                result += f"Toplam Skor: {s['total_score'][i]:.3f}\n"
                 result += "-" * 50 + "\n"
             
             return result
@@ -118,19 +67,37 @@ class CryptoChooser:
             print(f"\nHata detayı: {str(e)}")
             return "Coin listesi alınırken hata oluştu"
 
-class CryptoOutput(BaseModel):
-    chosen_coins: list[str] = Field(description="Scalping için seçilen en uygun 3 coinin sembolü")
+def crypto_output():
+    """CryptoOutput structured output schema, built on first use"""
+    global _crypto_output
+    if _crypto_output is None:
+        from langchain_core.pydantic_v1 import BaseModel, Field
 
-def choose_coins():
+        class CryptoOutput(BaseModel):
+            chosen_coins: list[str] = Field(description="Scalping için seçilen en uygun 3 coinin sembolü")
+        _crypto_output = CryptoOutput
+    return _crypto_output
+
+def __getattr__(name):
+    # from crypto_choose_v2 import CryptoOutput
+    if name == 'CryptoOutput':
+        return crypto_output()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def choose_coins(max_tokens=PROMPT_TOKEN_BUDGET):
     crypto_chooser = CryptoChooser()
-    coin_data = crypto_chooser.get_tradeable_coins()
-    coin_data_2 = load_cache()
-    
-    if isinstance(coin_data, str) and "hata" in coin_data.lower():
-        print(f"\nHata: {coin_data}")
+    try:
+        scored = crypto_chooser.score_tradeable_coins()
+    except Exception as e:
+        print(f"\nHata: Coin listesi alınırken hata oluştu ({str(e)})")
         return []
+    
+    # Skora göre sıralı adaylar, token bütçesine sığan kadarı kompakt TSV tablo olarak
+    coin_data, _ = market_table(scored, CHOOSER_PROMPT_COLUMNS, max_tokens)
 
-    llm = ChatOpenAI(model="gpt-4", temperature=0.7)  # Daha tutarlı seçimler için
+    from langchain_core.prompts import ChatPromptTemplate
+    CryptoOutput = crypto_output()
+    llm = get_chat_model("gpt-4", temperature=0.7)  # Daha tutarlı seçimler için
     structured_llm = llm.with_structured_output(CryptoOutput)
 
     prompt = ChatPromptTemplate.from_messages([
@@ -158,15 +125,16 @@ def choose_coins():
         NOT:
         - Seçilen coinler ['BTC', 'ETH', 'XRP'] gibi popüler coinler yerine daha kar potansiyeli yüksek ve 1-2-3-4-5-6 saat içinde işlemden çıkabilecek coinler olsun.
         Verilen coin listesinden, bu kriterlere göre SCALPING için en uygun 3 coini seç."""),
-        ("user", "Yukarıdaki coin listesinden, SCALPING için en uygun 3 coini seç.")
+        ("user", "Coin listesi (skora göre sıralı, TSV):\n{coin_data}\n\nYukarıdaki coin listesinden, SCALPING için en uygun 3 coini seç.")
     ])
 
     chain = prompt | structured_llm
 
     try:
-        result = chain.invoke({
-            "coin_data": coin_data_2
-        })
+        # Aday coinler ve metrikleri (yuvarlanmış) değişmediyse TTL içinde önceki cevap kullanılır
+        result = cached_invoke(chain, {
+            "coin_data": coin_data
+        }, "choose_coins:gpt-4", schema=CryptoOutput)
         
         if not isinstance(result.chosen_coins, list) or len(result.chosen_coins) != 3:
             print("\nHata: Model geçersiz format döndürdü")
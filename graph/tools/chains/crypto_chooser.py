@@ -1,31 +1,31 @@
-import requests
-import pandas as pd
-from datetime import datetime
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
-import os
-from realtime_selector import load_cache
-load_dotenv()
+from llm_models import get_chat_model
+from llm_cache import cached_invoke
+from realtime_selector import load_ticker_arrays
+from ticker_history import load_history
+from scoring import get_profile, score
+from prompt_serializer import market_table, CHOOSER_PROMPT_COLUMNS, PROMPT_TOKEN_BUDGET
 
-load_cache()
 
 
+def choose_coins(max_tokens=PROMPT_TOKEN_BUDGET):
+    # langchain/openai yalnızca seçim yapılırken yüklenir
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.pydantic_v1 import BaseModel, Field
 
-class CryptoOutput(BaseModel):
-    chosen_coins: list[str] = Field(description="Scalping için seçilen en uygun 3 coinin sembolü")
-
-def choose_coins():
-    
+    class CryptoOutput(BaseModel):
+        chosen_coins: list[str] = Field(description="Scalping için seçilen en uygun 3 coinin sembolü")
     
-    coin_data_2 = load_cache()
-    
-    if isinstance(coin_data_2, str) and "hata" in coin_data_2.lower():
-        print(f"\nHata: {coin_data_2}")
+    arrays = load_ticker_arrays()
+    if arrays is None:
+        print("\nHata: Cache verisi alınamadı")
         return []
+    
+    # crypto_choose_v2 ile aynı girdi: chooser profiline göre skorlanmış adaylar,
+    # token bütçesine sığan kadarı kompakt TSV tablo olarak
+    scored = score(arrays, get_profile('chooser'), history=load_history())
+    coin_data, _ = market_table(scored, CHOOSER_PROMPT_COLUMNS, max_tokens)
 
-    llm = ChatOpenAI(model="gpt-4", temperature=0.7)  # Daha tutarlı seçimler için
+    llm = get_chat_model("gpt-4", temperature=0.7)  # Daha tutarlı seçimler için
     structured_llm = llm.with_structured_output(CryptoOutput)
 
     prompt = ChatPromptTemplate.from_messages([
@@ -53,15 +53,16 @@ def choose_coins():
         NOT:
         - Seçilen coinler ['BTC', 'ETH', 'XRP'] gibi popüler coinler yerine daha kar potansiyeli yüksek ve 1-2-3-4-5-6 saat içinde işlemden çıkabilecek coinler olsun.
         Verilen coin listesinden, bu kriterlere göre SCALPING için en uygun 3 coini seç."""),
-        ("user", "Yukarıdaki coin listesinden, SCALPING için en uygun 3 coini seç.")
+        ("user", "Coin listesi (skora göre sıralı, TSV):\n{coin_data}\n\nYukarıdaki coin listesinden, SCALPING için en uygun 3 coini seç.")
     ])
 
     chain = prompt | structured_llm
 
     try:
-        result = chain.invoke({
-            "coin_data": coin_data_2
-        })
+        # Aday coinler ve metrikleri (yuvarlanmış) değişmediyse TTL içinde önceki cevap kullanılır
+        result = cached_invoke(chain, {
+            "coin_data": coin_data
+        }, "crypto_chooser:gpt-4", schema=CryptoOutput)
         
         if not isinstance(result.chosen_coins, list) or len(result.chosen_coins) != 3:
             print("\nHata: Model geçersiz format döndürdü")
@@ -0,0 +1,225 @@
+import math
+from collections import deque, OrderedDict
+
+# get_data'nın döndürdüğü indikatör kolonları (ta varsayılan parametreleri ile)
+INDICATOR_COLUMNS = ['RSI', 'MACD', 'MACD_Signal', 'MACD_Hist',
+                     'BB_upper', 'BB_middle', 'BB_lower', 'Stoch_RSI', 'VWAP']
+
+NAN = float('nan')
+
+
+class _EMA:
+    """Exponential moving average, same recursion as pandas ewm(adjust=False)"""
+
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = None
+        self.count = 0
+
+    def update(self, x):
+        # Baştaki NaN değerler pandas'taki gibi atlanır (MACD sinyal hattı)
+        if x != x:
+            return NAN
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        self.count += 1
+        return self.value if self.count >= self.min_periods else NAN
+
+    def copy(self):
+        other = _EMA(self.alpha, self.min_periods)
+        other.value = self.value
+        other.count = self.count
+        return other
+
+
+class _RollingSum:
+    """Fixed window running sum / sum of squares"""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, x):
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+        return len(self.values) >= self.window
+
+    def mean(self):
+        return self.total / self.window
+
+    def std(self):
+        # ddof=0, ta BollingerBands ile aynı
+        mean = self.mean()
+        return math.sqrt(max(self.total_sq / self.window - mean * mean, 0.0))
+
+    def copy(self):
+        other = _RollingSum(self.window)
+        other.values = deque(self.values)
+        other.total = self.total
+        other.total_sq = self.total_sq
+        return other
+
+
+class _RollingMinMax:
+    """Fixed window min/max with monotonic deques (amortized O(1))"""
+
+    def __init__(self, window):
+        self.window = window
+        self.index = 0
+        self.nan_index = deque()  # penceredeki NaN'ların indexleri
+        self.mins = deque()       # (index, value), artan
+        self.maxs = deque()       # (index, value), azalan
+
+    def update(self, x):
+        i = self.index
+        self.index += 1
+        start = i - self.window + 1
+        while self.nan_index and self.nan_index[0] < start:
+            self.nan_index.popleft()
+        while self.mins and self.mins[0][0] < start:
+            self.mins.popleft()
+        while self.maxs and self.maxs[0][0] < start:
+            self.maxs.popleft()
+        if x != x:
+            self.nan_index.append(i)
+        else:
+            while self.mins and self.mins[-1][1] >= x:
+                self.mins.pop()
+            self.mins.append((i, x))
+            while self.maxs and self.maxs[-1][1] <= x:
+                self.maxs.pop()
+            self.maxs.append((i, x))
+        # pandas rolling(window) gibi: pencere dolu ve NaN içermiyorsa değer üretir
+        if self.index < self.window or self.nan_index:
+            return NAN, NAN
+        return self.mins[0][1], self.maxs[0][1]
+
+    def copy(self):
+        other = _RollingMinMax(self.window)
+        other.index = self.index
+        other.nan_index = deque(self.nan_index)
+        other.mins = deque(self.mins)
+        other.maxs = deque(self.maxs)
+        return other
+
+
+class IncrementalIndicators:
+    """
+    Rolling indicator state for a single (symbol, interval) series.
+
+    Reproduces the `ta` defaults used by CryptoAnalyzer.calculate_indicators
+    (RSI 14, MACD 12/26/9, Bollinger 20/2, StochRSI 14, VWAP 14) but updates
+    in O(1) per candle instead of recomputing the whole DataFrame.
+    `update` commits a closed candle, `peek` evaluates a candle that is still
+    open without touching the state. Every row equals ta run over all the
+    candles committed since the engine was created, not over a later window.
+    """
+
+    def __init__(self, history_size=1000):
+        self.prev_close = None
+        self.rsi_up = _EMA(1 / 14, 14)
+        self.rsi_down = _EMA(1 / 14, 14)
+        self.ema_fast = _EMA(2 / 13, 12)
+        self.ema_slow = _EMA(2 / 27, 26)
+        self.macd_signal = _EMA(2 / 10, 9)
+        self.bb = _RollingSum(20)
+        self.rsi_range = _RollingMinMax(14)
+        self.vwap_pv = _RollingSum(14)
+        self.vwap_volume = _RollingSum(14)
+        self.last_open_time = None
+        self.history_size = history_size
+        self.history = OrderedDict()  # open_time -> indikatör satırı
+
+    def _step(self, high, low, close, volume):
+        # RSI (Wilder): ilk mumda fark NaN olduğu için ta iki yönü de 0 kabul eder
+        if self.prev_close is None:
+            up = down = 0.0
+        else:
+            diff = close - self.prev_close
+            up = diff if diff > 0 else 0.0
+            down = -diff if diff < 0 else 0.0
+        self.prev_close = close
+        avg_up = self.rsi_up.update(up)
+        avg_down = self.rsi_down.update(down)
+        if avg_down != avg_down:
+            rsi = NAN
+        elif avg_down == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - 100 / (1 + avg_up / avg_down)
+
+        # MACD
+        fast = self.ema_fast.update(close)
+        slow = self.ema_slow.update(close)
+        macd = fast - slow
+        signal = self.macd_signal.update(macd)
+        hist = macd - signal
+
+        # Bollinger Bands
+        if self.bb.update(close):
+            bb_middle = self.bb.mean()
+            bb_std = self.bb.std()
+            bb_upper = bb_middle + 2 * bb_std
+            bb_lower = bb_middle - 2 * bb_std
+        else:
+            bb_upper = bb_middle = bb_lower = NAN
+
+        # Stochastic RSI
+        lowest, highest = self.rsi_range.update(rsi)
+        span = highest - lowest
+        if span == 0 or span != span:
+            stoch_rsi = NAN
+        else:
+            stoch_rsi = (rsi - lowest) / span
+
+        # VWAP
+        typical = (high + low + close) / 3.0
+        full_pv = self.vwap_pv.update(typical * volume)
+        self.vwap_volume.update(volume)
+        if full_pv and self.vwap_volume.total != 0:
+            vwap = self.vwap_pv.total / self.vwap_volume.total
+        else:
+            vwap = NAN
+
+        return (rsi, macd, signal, hist, bb_upper, bb_middle, bb_lower, stoch_rsi, vwap)
+
+    def update(self, open_time, high, low, close, volume):
+        """Commits a closed candle and returns its indicator row"""
+        row = self._step(high, low, close, volume)
+        self.last_open_time = open_time
+        self.history[open_time] = row
+        while len(self.history) > self.history_size:
+            self.history.popitem(last=False)
+        return row
+
+    def peek(self, open_time, high, low, close, volume):
+        """Indicator row for a candle that is still open, state is left unchanged"""
+        return self.copy()._step(high, low, close, volume)
+
+    def copy(self):
+        other = IncrementalIndicators.__new__(IncrementalIndicators)
+        other.prev_close = self.prev_close
+        other.rsi_up = self.rsi_up.copy()
+        other.rsi_down = self.rsi_down.copy()
+        other.ema_fast = self.ema_fast.copy()
+        other.ema_slow = self.ema_slow.copy()
+        other.macd_signal = self.macd_signal.copy()
+        other.bb = self.bb.copy()
+        other.rsi_range = self.rsi_range.copy()
+        other.vwap_pv = self.vwap_pv.copy()
+        other.vwap_volume = self.vwap_volume.copy()
+        other.last_open_time = self.last_open_time
+        other.history_size = self.history_size
+        # peek geçmişe yazmaz, paylaşılan referans yeterli
+        other.history = self.history
+        return other
@@ -0,0 +1,261 @@
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INSTRUMENT = os.getenv('INSTRUMENT', '0') == '1'   # kapalıyken span/timed/count neredeyse maliyetsiz
+METRICS_LOG = os.getenv('METRICS_LOG')             # her span için bir JSON satırı, None: log yok
+METRICS_PORT = os.getenv('METRICS_PORT')           # --metrics-port varsayılanı; sunucu yalnızca enable(port=...) ile açılır
+METRIC_PREFIX = 'tradebot_'
+# Saniye cinsinden histogram sınırları: yerel hesaplardan LLM çağrılarına kadar
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _metric_name(name):
+    return METRIC_PREFIX + re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    body = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels)
+    return '{' + body + '}'
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus layout) with sum/count/max"""
+
+    __slots__ = ('counts', 'sum', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bucket bound containing the q quantile (inf past the last bucket)"""
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= target and self.count:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """Thread-safe registry of span histograms and counters, optional JSON-lines log"""
+
+    def __init__(self, log_path=None):
+        self.lock = threading.Lock()
+        self.histograms = {}   # (isim, etiketler) -> Histogram
+        self.counters = {}     # (isim, etiketler) -> float
+        self.log_file = None
+        if log_path:
+            self.open_log(log_path)
+
+    def open_log(self, path):
+        with self.lock:
+            if self.log_file is not None:
+                self.log_file.close()
+            self.log_file = open(path, 'a', buffering=1)
+
+    def observe(self, name, seconds, labels=(), error=False):
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = Histogram()
+            histogram.observe(seconds)
+            if error:
+                key = (name + '_errors', labels)
+                self.counters[key] = self.counters.get(key, 0) + 1
+            if self.log_file is not None:
+                event = {'ts': round(time.time(), 3), 'span': name, 'seconds': round(seconds, 6)}
+                event.update(labels)
+                if error:
+                    event['error'] = True
+                self.log_file.write(json.dumps(event) + '\n')
+
+    def inc(self, name, value=1, labels=()):
+        with self.lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def summary(self):
+        """Per span: count, total/mean/max seconds, approximate p50/p95 (bucket bounds)"""
+        with self.lock:
+            spans = [{'span': name, **dict(labels), 'count': h.count, 'total_s': h.sum,
+                      'mean_s': h.sum / h.count, 'p50_s': h.quantile(0.5), 'p95_s': h.quantile(0.95),
+                      'max_s': h.max} for (name, labels), h in self.histograms.items() if h.count]
+            counters = [{'counter': name, **dict(labels), 'value': v} for (name, labels), v in self.counters.items()]
+        return sorted(spans, key=lambda s: -s['total_s']), counters
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            histograms = sorted(self.histograms.items(), key=lambda kv: kv[0])
+            counters = sorted(self.counters.items(), key=lambda kv: kv[0])
+        for name in sorted({n for (n, _), _ in histograms}):
+            metric = _metric_name(name) + '_seconds'
+            lines.append(f'# TYPE {metric} histogram')
+            for (n, labels), h in histograms:
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{_label_text(labels + (("le", bound),))} {cumulative}')
+                lines.append(f'{metric}_bucket{_label_text(labels + (("le", "+Inf"),))} {h.count}')
+                lines.append(f'{metric}_sum{_label_text(labels)} {h.sum}')
+                lines.append(f'{metric}_count{_label_text(labels)} {h.count}')
+        for name in sorted({n for (n, _), _ in counters}):
+            metric = _metric_name(name) + '_total'
+            lines.append(f'# TYPE {metric} counter')
+            lines.extend(f'{metric}{_label_text(labels)} {v}' for (n, labels), v in counters if n == name)
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics(METRICS_LOG if INSTRUMENT else None)
+
+
+class _Span:
+    __slots__ = ('name', 'labels', 'start')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        metrics.observe(self.name, time.perf_counter() - self.start, self.labels, exc_type is not None)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **labels):
+    """
+    Context manager timing a block into the `name` histogram
+
+    Kapalıyken paylaşılan boş bir context döner; etiketler (ör. path, namespace)
+    ayrı seriler oluşturur, bu yüzden az sayıda farklı değer alanlar kullanılmalı.
+    """
+    if not INSTRUMENT:
+        return _NULL_SPAN
+    return _Span(name, tuple(sorted(labels.items())))
+
+
+def timed(name=None, **labels):
+    """Decorator form of span for sync and async functions, name defaults to the function name"""
+    def decorate(func):
+        span_name = name or func.__name__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not INSTRUMENT:
+                    return await func(*args, **kwargs)
+                with span(span_name, **labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not INSTRUMENT:
+                return func(*args, **kwargs)
+            with span(span_name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1, **labels):
+    """Adds value to the `name` counter"""
+    if INSTRUMENT:
+        metrics.inc(name, value, tuple(sorted(labels.items())))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port, host='0.0.0.0'):
+    """Serves /metrics (Prometheus text) from a daemon thread, returns the server"""
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def enable(log_path=None, port=None):
+    """Turns instrumentation on at runtime, optionally with a JSON log and the /metrics endpoint"""
+    global INSTRUMENT
+    INSTRUMENT = True
+    if log_path:
+        metrics.open_log(log_path)
+    if port:
+        return start_metrics_server(port)
+
+
+def disable():
+    global INSTRUMENT
+    INSTRUMENT = False
+
+
+def print_summary():
+    spans, counters = metrics.summary()
+    if not spans and not counters:
+        return
+    print("\n=== Süre dağılımı (span) ===")
+    for s in spans:
+        labels = ', '.join(f'{k}={v}' for k, v in s.items()
+                           if k not in ('span', 'count', 'total_s', 'mean_s', 'p50_s', 'p95_s', 'max_s'))
+        print(f"{s['span']:<20} {labels:<35} {s['count']:>5}x toplam {s['total_s']:.3f}s - "
+              f"ort {s['mean_s'] * 1000:.1f}ms, p95 <= {s['p95_s'] * 1000:.0f}ms, max {s['max_s'] * 1000:.1f}ms")
+    for c in counters:
+        labels = ', '.join(f'{k}={v}' for k, v in c.items() if k not in ('counter', 'value'))
+        print(f"{c['counter']:<20} {labels:<35} {c['value']:g}")
@@ -0,0 +1,47 @@
+import numpy as np
+from kline_store import KLINE_COLUMNS, empty_klines
+
+# orjson varsa JSON çözme ~2x hızlı; yoksa standart json
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    import json
+    loads = json.loads
+
+KLINE_INDEX = {name: j for j, (name, _) in enumerate(KLINE_COLUMNS)}
+INT_COLUMNS = {name for name, dtype in KLINE_COLUMNS if dtype == 'int64'}
+# get_data(extended=True) ile OHLCV'ye eklenen sütunlar
+EXTENDED_COLUMNS = ['quote_volume', 'trades_count', 'taker_buy_volume', 'taker_buy_quote_volume']
+
+
+def parse_klines(payload, fields=None, dtype=np.float64):
+    """
+    /klines payload -> dict column -> typed array
+
+    Rows are transposed once with zip, then every kept column is written
+    straight into a preallocated array (np.fromiter with count): int64 for
+    the times and trade count, dtype (float64 or float32) for prices and
+    volumes. Columns not in fields are never converted.
+
+    Parameters:
+    - payload: raw response body (bytes/str, decoded with orjson when installed) or decoded rows
+    - fields: column names to keep (kline_store.KLINE_COLUMNS order), None keeps all
+    - dtype: float dtype for prices and volumes
+    """
+    rows = loads(payload) if isinstance(payload, (bytes, bytearray, memoryview, str)) else payload
+    names = [name for name, _ in KLINE_COLUMNS] if fields is None else list(fields)
+    n = len(rows)
+    if n == 0:
+        empty = empty_klines()
+        return {name: empty[name].astype(np.int64 if name in INT_COLUMNS else dtype) for name in names}
+    columns = list(zip(*rows))
+    out = {}
+    for name in names:
+        values = columns[KLINE_INDEX[name]]
+        if name in INT_COLUMNS:
+            out[name] = np.fromiter(values, dtype=np.int64, count=n)
+        else:
+            # Binance sayıları string olarak gönderir
+            out[name] = np.fromiter(map(float, values), dtype=dtype, count=n)
+    return out
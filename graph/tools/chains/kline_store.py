@@ -0,0 +1,151 @@
+import os
+import shutil
+import numpy as np
+
+KLINE_STORE_DIR = 'klines'
+# Sabit uzunluklu aralıklar (ms); 1M değişken olduğu için yok
+INTERVAL_MS = {'1s': 1000, '1m': 60000, '3m': 180000, '5m': 300000, '15m': 900000, '30m': 1800000,
+               '1h': 3600000, '2h': 7200000, '4h': 14400000, '6h': 21600000, '8h': 28800000,
+               '12h': 43200000, '1d': 86400000, '3d': 259200000, '1w': 604800000}
+
+# /klines satırındaki alanlar (son 'ignore' alanı saklanmaz)
+KLINE_COLUMNS = [
+    ('timestamp', 'int64'),
+    ('open', 'float64'),
+    ('high', 'float64'),
+    ('low', 'float64'),
+    ('close', 'float64'),
+    ('volume', 'float64'),
+    ('close_time', 'int64'),
+    ('quote_volume', 'float64'),
+    ('trades_count', 'int64'),
+    ('taker_buy_volume', 'float64'),
+    ('taker_buy_quote_volume', 'float64'),
+]
+COMPLETE_MARKER = 'COMPLETE'
+
+
+def empty_klines():
+    return {name: np.empty(0, dtype=dtype) for name, dtype in KLINE_COLUMNS}
+
+
+class KlineStore:
+    """
+    Append-only columnar kline store on disk.
+
+    Every (symbol, interval) pair is a directory with one raw binary file per
+    column ({root}/{symbol}/{interval}/{column}.bin) that is read back with
+    np.memmap, so history is served from disk without parsing. Only closed
+    candles are stored; they never change, so new candles are appended and
+    older history (backfill) is merged in by rewriting the directory.
+    """
+
+    def __init__(self, root=KLINE_STORE_DIR):
+        self.root = root
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.root, symbol, interval)
+
+    def __len__(self):
+        return sum(1 for _ in self.keys())
+
+    def keys(self):
+        if not os.path.isdir(self.root):
+            return
+        for symbol in sorted(os.listdir(self.root)):
+            for interval in sorted(os.listdir(os.path.join(self.root, symbol))):
+                if not interval.endswith('.tmp') and not interval.endswith('.old'):
+                    yield symbol, interval
+
+    def count(self, symbol, interval):
+        """Number of complete rows (shortest column wins after an interrupted append)"""
+        path = self._path(symbol, interval)
+        if not os.path.isdir(path):
+            return 0
+        counts = []
+        for name, dtype in KLINE_COLUMNS:
+            file = os.path.join(path, f'{name}.bin')
+            size = os.path.getsize(file) if os.path.exists(file) else 0
+            counts.append(size // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    def read(self, symbol, interval, limit=None):
+        """Last `limit` rows as read-only memmap views, dict column -> array"""
+        n = self.count(symbol, interval)
+        if n == 0:
+            return empty_klines()
+        start = 0 if limit is None else max(0, n - limit)
+        path = self._path(symbol, interval)
+        columns = {}
+        for name, dtype in KLINE_COLUMNS:
+            data = np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype, mode='r', shape=(n,))
+            columns[name] = data[start:]
+        return columns
+
+    def first_open_time(self, symbol, interval):
+        if self.count(symbol, interval) == 0:
+            return None
+        return int(self.read(symbol, interval)['timestamp'][0])
+
+    def last_open_time(self, symbol, interval):
+        if self.count(symbol, interval) == 0:
+            return None
+        return int(self.read(symbol, interval, 1)['timestamp'][0])
+
+    def last_close_time(self, symbol, interval):
+        if self.count(symbol, interval) == 0:
+            return None
+        return int(self.read(symbol, interval, 1)['close_time'][0])
+
+    def append(self, symbol, interval, columns):
+        """Appends rows newer than the last stored candle, returns number of rows written"""
+        last = self.last_open_time(symbol, interval)
+        keep = slice(None) if last is None else columns['timestamp'] > last
+        rows = len(columns['timestamp'][keep])
+        if rows == 0:
+            return 0
+        path = self._path(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        n = self.count(symbol, interval)
+        for name, dtype in KLINE_COLUMNS:
+            with open(os.path.join(path, f'{name}.bin'), 'ab') as f:
+                # Yarım kalmış bir önceki yazmanın artıklarını temizle
+                f.truncate(n * np.dtype(dtype).itemsize)
+                f.write(np.ascontiguousarray(columns[name][keep], dtype=dtype).tobytes())
+        return rows
+
+    def prepend(self, symbol, interval, columns):
+        """Merges rows older than the first stored candle (backfill), rewriting the directory"""
+        first = self.first_open_time(symbol, interval)
+        if first is None:
+            return self.append(symbol, interval, columns)
+        keep = columns['timestamp'] < first
+        rows = int(keep.sum())
+        if rows == 0:
+            return 0
+        stored = self.read(symbol, interval)
+        path = self._path(symbol, interval)
+        tmp = path + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, dtype in KLINE_COLUMNS:
+            merged = np.concatenate([np.asarray(columns[name][keep], dtype=dtype), stored[name]])
+            merged.tofile(os.path.join(tmp, f'{name}.bin'))
+        if os.path.exists(os.path.join(path, COMPLETE_MARKER)):
+            open(os.path.join(tmp, COMPLETE_MARKER), 'w').close()
+        del stored
+        old = path + '.old'
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+        return rows
+
+    def is_complete(self, symbol, interval):
+        """True once a backfill reached the first candle Binance has for the pair"""
+        return os.path.exists(os.path.join(self._path(symbol, interval), COMPLETE_MARKER))
+
+    def mark_complete(self, symbol, interval):
+        path = self._path(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        open(os.path.join(path, COMPLETE_MARKER), 'w').close()
@@ -0,0 +1,364 @@
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from indicator_engine import IncrementalIndicators, INDICATOR_COLUMNS
+from ticker_stream import STREAM_URL, RECONNECT_DELAY, MAX_RECONNECT_DELAY
+
+KLINE_STREAM_INTERVALS = tuple(os.getenv('KLINE_STREAM_INTERVALS', '1m').split(','))
+# Abone olunan her coin için REST'ten yüklenen kapanmış mum sayısı (indikatörlerin ısınması için)
+KLINE_STREAM_HISTORY = int(os.getenv('KLINE_STREAM_HISTORY', 200))
+UPDATE_QUEUE_SIZE = 1000   # updates() kuyruğu, dolunca en eski satır atılır
+CANDLE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def stream_name(coin, interval):
+    return f'{coin.lower()}usdt@kline_{interval}'
+
+
+def _offer(queue, row):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(row)
+
+
+class KlineStream:
+    """
+    Live indicator rows for the selected coins from the Binance kline streams.
+
+    Subscribes to `<symbol>@kline_<interval>` on one combined-stream
+    connection. Every event of the open candle is evaluated with
+    IncrementalIndicators.peek; the event that closes it commits it with
+    update, so each candle costs one O(1) indicator step instead of a
+    recomputed window. With an analyzer the engines are warmed from REST
+    before a coin is subscribed, and reseeded when a reconnect left a gap.
+
+    Updated rows go to on_update callbacks and to `async for row in
+    stream` iterators. set_symbols() follows the selected coin set,
+    subscribing and unsubscribing on the open connection.
+    """
+
+    def __init__(self, intervals=KLINE_STREAM_INTERVALS, url=STREAM_URL, analyzer=None,
+                 history=KLINE_STREAM_HISTORY):
+        self.intervals = tuple(intervals)
+        self.url = url
+        self.analyzer = analyzer
+        self.history = history
+        self.symbols = set()       # takip edilen coinler (BTC, ETH, ...)
+        self.engines = {}          # (coin, interval) -> IncrementalIndicators
+        self.latest = {}           # (coin, interval) -> son satır (açık ya da kapanmış mum)
+        self.stale = set()         # boşluk sonrası REST'ten yeniden ısıtılacak (coin, interval)
+        self.reseeded = set()      # yeniden ısıtıldı, boşluk sürerse olduğu gibi devam edilir
+        self.callbacks = []
+        self.queues = []           # (event loop, asyncio.Queue)
+        self.lock = threading.Lock()
+        self.last_event = None
+        self.messages = 0
+        self.running = False
+        self._ids = itertools.count(1)
+        self._ws = None
+        self._client = None
+        self._thread = None
+        self._loop = None
+        self._task = None
+
+    def on_update(self, callback):
+        """Registers callback(row) for every updated row, returns it (usable as a decorator)"""
+        self.callbacks.append(callback)
+        return callback
+
+    async def updates(self, maxsize=UPDATE_QUEUE_SIZE):
+        """Async iterator of updated rows, delivered on the caller's event loop"""
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize))
+        with self.lock:
+            self.queues.append(entry)
+        try:
+            while True:
+                yield await entry[1].get()
+        finally:
+            with self.lock:
+                self.queues.remove(entry)
+
+    def __aiter__(self):
+        return self.updates()
+
+    def streams(self, coins=None):
+        coins = self.symbols if coins is None else coins
+        return [stream_name(coin, interval) for coin in sorted(coins) for interval in self.intervals]
+
+    def apply(self, message):
+        """
+        Applies one stream message (raw str, kline event or combined-stream envelope)
+
+        Returns:
+        - updated rows: symbol, interval, timestamp, OHLCV, closed and the indicator columns
+        """
+        if isinstance(message, (str, bytes)):
+            message = json.loads(message)
+        if isinstance(message, dict) and 'data' in message:
+            message = message['data']
+        if not isinstance(message, dict) or message.get('e') != 'kline':
+            return []   # SUBSCRIBE cevapları vb.
+        k = message['k']
+        coin = k['s'].removesuffix('USDT')
+        key = (coin, k['i'])
+        open_time = k['t']
+        candle = {name: float(k[name[0]]) for name in CANDLE_FIELDS}
+        with self.lock:
+            if coin not in self.symbols or key in self.stale:
+                return []
+            engine = self.engines.get(key)
+            if engine is None:
+                engine = self.engines[key] = IncrementalIndicators(history_size=max(self.history, 1000))
+            last = engine.last_open_time
+            if last is not None and open_time <= last:
+                return []   # kapanmış mumun geç gelen olayı
+            if last is None or open_time <= last + (k['T'] - open_time + 1):
+                self.reseeded.discard(key)
+            else:
+                # Kopma sırasında kapanan mumlar kaçırıldı; REST de henüz yetişmediyse bir kez denenir
+                if self.analyzer is not None and key not in self.reseeded:
+                    self.stale.add(key)
+                    self.reseeded.add(key)
+                    return []
+                if k['x']:
+                    print(f"{datetime.now()} - Kline akışında boşluk ({coin} {k['i']}), "
+                          f"indikatörler atlanan mumlar olmadan devam ediyor")
+            args = (open_time, candle['high'], candle['low'], candle['close'], candle['volume'])
+            values = engine.update(*args) if k['x'] else engine.peek(*args)
+            row = {'symbol': coin, 'interval': k['i'], 'timestamp': open_time, **candle, 'closed': k['x'],
+                   **dict(zip(INDICATOR_COLUMNS, values))}
+            self.latest[key] = row
+            self.last_event = time.time()
+            self.messages += 1
+        self._publish(row)
+        return [row]
+
+    def _publish(self, row):
+        for callback in list(self.callbacks):
+            try:
+                callback(row)
+            except Exception as e:
+                print(f"{datetime.now()} - Kline callback hatası: {str(e)}")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        with self.lock:
+            queues = list(self.queues)
+        for loop, queue in queues:
+            if loop is running:
+                _offer(queue, row)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(_offer, queue, row)
+
+    def get(self, symbol, interval=None):
+        """Latest row of a coin (the first interval by default)"""
+        with self.lock:
+            row = self.latest.get((symbol.upper().removesuffix('USDT'), interval or self.intervals[0]))
+            return dict(row) if row is not None else None
+
+    def age(self):
+        """Seconds since the last applied event (None before the first one)"""
+        return None if self.last_event is None else time.time() - self.last_event
+
+    def set_symbols(self, symbols):
+        """
+        Follows exactly these coins: new ones are warmed and subscribed, dropped
+        ones unsubscribed and forgotten. Safe to call from any thread.
+        """
+        wanted = {s.upper().removesuffix('USDT') for s in symbols}
+        with self.lock:
+            added, removed = wanted - self.symbols, self.symbols - wanted
+            self.symbols = wanted
+            for key in [key for key in self.engines if key[0] in removed]:
+                del self.engines[key]
+            for key in [key for key in self.latest if key[0] in removed]:
+                del self.latest[key]
+            self.stale = {key for key in self.stale if key[0] not in removed}
+            self.reseeded = {key for key in self.reseeded if key[0] not in removed}
+        if self._loop is not None and (added or removed):
+            coro = self._resubscribe(added, removed)
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is self._loop:
+                return self._loop.create_task(coro)
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _send(self, method, streams):
+        if self._ws is not None and streams:
+            await self._ws.send(json.dumps({'method': method, 'params': streams, 'id': next(self._ids)}))
+
+    async def _resubscribe(self, added, removed):
+        try:
+            await self._send('UNSUBSCRIBE', self.streams(removed))
+            await self._warm(added)
+            await self._send('SUBSCRIBE', self.streams(added))
+        except Exception as e:
+            print(f"{datetime.now()} - Kline abonelik hatası: {str(e)}")
+
+    async def _warm(self, coins):
+        # Abone olmadan önce son kapanmış mumları REST'ten yükleyip indikatörleri ısıtır
+        if self.analyzer is None or self._client is None:
+            return
+        keys = [(coin, interval) for coin in coins for interval in self.intervals]
+        await asyncio.gather(*(self._seed(coin, interval) for coin, interval in keys))
+
+    async def _seed(self, coin, interval):
+        try:
+            columns = await self.analyzer.aload_klines(self._client, coin, interval, self.history + 1)
+            engine = IncrementalIndicators(history_size=max(self.history, 1000))
+            closed = columns['close_time'] < int(time.time() * 1000)
+            for args in zip(*(columns[name][closed].tolist()
+                              for name in ('timestamp', 'high', 'low', 'close', 'volume'))):
+                engine.update(*args)
+        except Exception as e:
+            print(f"{datetime.now()} - Kline ısıtma hatası ({coin} {interval}): {str(e)}")
+            engine = None
+        with self.lock:
+            if coin in self.symbols:
+                if engine is not None:
+                    self.engines[(coin, interval)] = engine
+                else:
+                    # Isıtılamadı: ilk olaydan itibaren boş durumla devam edilir
+                    self.engines.pop((coin, interval), None)
+            self.stale.discard((coin, interval))
+
+    def _client_context(self):
+        if self.analyzer is None:
+            return contextlib.nullcontext()
+        from binance_client import AsyncBinanceClient
+        return AsyncBinanceClient(self.analyzer.base_url)
+
+    async def run(self):
+        """Consumes the kline streams until stop(), reconnecting with backoff"""
+        import websockets
+        self.running = True
+        self._loop = asyncio.get_running_loop()
+        delay = RECONNECT_DELAY
+        async with self._client_context() as client:
+            self._client = client
+            try:
+                while self.running:
+                    try:
+                        async with websockets.connect(f'{self.url}/stream', max_size=None) as ws:
+                            delay = RECONNECT_DELAY
+                            with self.lock:
+                                cold = [c for c in self.symbols if not any((c, i) in self.engines
+                                                                           for i in self.intervals)]
+                            await self._warm(cold)
+                            # Isıtma sırasında set_symbols ile eklenenler de dahil güncel kümeye abone olunur
+                            self._ws = ws
+                            with self.lock:
+                                streams = self.streams()
+                            await self._send('SUBSCRIBE', streams)
+                            async for message in ws:
+                                self.apply(message)
+                                if self.stale:
+                                    await asyncio.gather(*(self._seed(*key) for key in list(self.stale)))
+                    except asyncio.CancelledError:
+                        break
+                    except Exception as e:
+                        print(f"{datetime.now()} - Kline stream hatası: {str(e)}")
+                    finally:
+                        self._ws = None
+                    if self.running:
+                        await asyncio.sleep(delay)
+                        delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            finally:
+                self._client = None
+                self._loop = None
+
+    async def follow(self, selector='scores', every=60, max_coins=None, refresh=True):
+        """Re-runs the selector every `every` seconds and follows its coins"""
+        from pipeline import select_coins
+        while True:
+            try:
+                if refresh:
+                    from realtime_cache import update_cache
+                    await asyncio.to_thread(update_cache)
+                coins = await asyncio.to_thread(select_coins, selector, max_coins)
+                self.set_symbols(coins)
+                print(f"{datetime.now()} - Takip edilen coinler: {', '.join(sorted(self.symbols)) or '-'}")
+            except Exception as e:
+                print(f"{datetime.now()} - Coin seçimi hatası: {str(e)}")
+            await asyncio.sleep(every)
+
+    def start(self):
+        """Runs the stream on a background thread with its own event loop"""
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            self._task = loop.create_task(self.run())
+            loop.call_soon(ready.set)
+            try:
+                loop.run_until_complete(self._task)
+            except asyncio.CancelledError:
+                pass
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name='kline-stream', daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        self.running = False
+        loop = self._loop
+        if loop is not None and self._task is not None:
+            loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def print_row(row):
+    state = 'kapandı' if row['closed'] else 'açık'
+    print(f"{datetime.fromtimestamp(row['timestamp'] / 1000):%H:%M} {row['symbol']:<8} {row['interval']:<4} "
+          f"{state:<7} close={row['close']:.6g} RSI={row['RSI']:.1f} MACD_Hist={row['MACD_Hist']:.4g} "
+          f"Stoch_RSI={row['Stoch_RSI']:.2f}")
+
+
+def main(argv=None):
+    from pipeline import SELECTORS
+    parser = argparse.ArgumentParser(description='Seçilen coinlerin kline akışı ve mum kapanışında indikatörler')
+    parser.add_argument('--coins', nargs='+', help='Seçici yerine bu coinleri takip et (ör. BTC ETH)')
+    parser.add_argument('--selector', choices=SELECTORS, default='scores')
+    parser.add_argument('--max-coins', type=int, default=None)
+    parser.add_argument('--every', type=float, default=180, help='Seçiciyi bu aralıkla (saniye) yeniden çalıştır')
+    parser.add_argument('--no-refresh', action='store_true', help='Seçimden önce cache güncelleme')
+    parser.add_argument('--intervals', nargs='+', default=list(KLINE_STREAM_INTERVALS))
+    parser.add_argument('--history', type=int, default=KLINE_STREAM_HISTORY)
+    parser.add_argument('--url', default=STREAM_URL)
+    parser.add_argument('--all', action='store_true', help='Açık mum güncellemelerini de yazdır')
+    args = parser.parse_args(argv)
+
+    from crypto_analyzer import CryptoAnalyzer
+    stream = KlineStream(args.intervals, args.url, CryptoAnalyzer(), args.history)
+
+    async def run():
+        task = asyncio.create_task(stream.run())
+        if args.coins:
+            stream.set_symbols(args.coins)
+        else:
+            asyncio.create_task(stream.follow(args.selector, args.every, args.max_coins, not args.no_refresh))
+        async for row in stream:
+            if row['closed'] or args.all:
+                print_row(row)
+        await task
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from instrumentation import span, count
+
+LLM_CACHE_FILE = os.getenv('LLM_CACHE_FILE', 'llm_cache.sqlite')
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', 900))   # saniye
+LLM_CACHE_SIZE = 256       # bellekteki en fazla kayıt (LRU)
+LLM_CACHE_DISK_SIZE = 5000
+BUCKET_DIGITS = 2          # metrikler bu kadar anlamlı basamağa yuvarlanır
+
+# Harf/rakama bitişik olmayan sayılar (1INCH gibi semboller olduğu gibi kalır)
+NUMBER = re.compile(r'(?<![\w.])-?\d+(?:,\d{3})*(?:\.\d+)?(?:[eE][-+]?\d+)?(?![\w.])')
+
+
+def bucket(value, digits=BUCKET_DIGITS):
+    """Rounds to `digits` significant digits so small metric moves map to the same key"""
+    if value == 0 or not math.isfinite(value):
+        return value
+    return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+
+
+def normalize(value, digits=BUCKET_DIGITS):
+    """JSON-ready canonical form: numbers bucketed (also inside strings), dict keys sorted, sets sorted"""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return bucket(float(value), digits)
+    if isinstance(value, str):
+        return NUMBER.sub(lambda m: repr(bucket(float(m.group().replace(',', '')), digits)), value.strip())
+    if isinstance(value, dict):
+        return {str(k): normalize(v, digits) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (set, frozenset)):
+        return sorted(normalize(v, digits) for v in value)
+    if isinstance(value, (list, tuple)):
+        return [normalize(v, digits) for v in value]
+    if hasattr(value, 'item'):  # NumPy skaler
+        return normalize(value.item(), digits)
+    if hasattr(value, 'tolist'):
+        return normalize(value.tolist(), digits)
+    return str(value)
+
+
+def fingerprint(namespace, inputs, digits=BUCKET_DIGITS):
+    payload = json.dumps([namespace, normalize(inputs, digits)], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    """
+    TTL cache for LLM results: in-memory LRU in front of an SQLite file.
+
+    Values must be JSON-serializable (structured outputs are stored as
+    their dict). Entries older than ttl seconds are misses; the memory tier
+    keeps the max_entries most recently used keys, the disk tier keeps the
+    newest max_disk_entries. path=None keeps everything in memory.
+    """
+
+    def __init__(self, path=LLM_CACHE_FILE, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_SIZE,
+                 max_disk_entries=LLM_CACHE_DISK_SIZE, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.clock = clock
+        self.memory = OrderedDict()   # key -> (created, value)
+        self.lock = threading.Lock()
+        self.metrics = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'disk_hits': 0,
+                        'expired': 0, 'evictions': 0, 'writes': 0}
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute('CREATE TABLE IF NOT EXISTS llm_cache '
+                            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS llm_cache_created ON llm_cache (created)')
+            self.db.commit()
+
+    def _remember(self, key, created, value):
+        self.memory[key] = (created, value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+            self.metrics['evictions'] += 1
+
+    def get(self, key, default=None):
+        now = self.clock()
+        with self.lock:
+            entry = self.memory.get(key)
+            tier = 'memory_hits'
+            if entry is None and self.db is not None:
+                row = self.db.execute('SELECT created, value FROM llm_cache WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+                    tier = 'disk_hits'
+            if entry is not None and now - entry[0] > self.ttl:
+                self.metrics['expired'] += 1
+                self.memory.pop(key, None)
+                entry = None
+            if entry is None:
+                self.metrics['misses'] += 1
+                return default
+            self.metrics['hits'] += 1
+            self.metrics[tier] += 1
+            self._remember(key, *entry)
+            return entry[1]
+
+    def set(self, key, value):
+        created = self.clock()
+        with self.lock:
+            self._remember(key, created, value)
+            self.metrics['writes'] += 1
+            if self.db is not None:
+                self.db.execute('INSERT OR REPLACE INTO llm_cache (key, value, created) VALUES (?, ?, ?)',
+                                (key, json.dumps(value), created))
+                self._prune(created)
+                self.db.commit()
+
+    def _prune(self, now):
+        self.db.execute('DELETE FROM llm_cache WHERE created < ?', (now - self.ttl,))
+        self.db.execute('DELETE FROM llm_cache WHERE key NOT IN '
+                        '(SELECT key FROM llm_cache ORDER BY created DESC LIMIT ?)', (self.max_disk_entries,))
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            if self.db is not None:
+                self.db.execute('DELETE FROM llm_cache')
+                self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.metrics)
+            stats['size'] = len(self.memory)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+_cache = None
+
+
+def get_llm_cache():
+    """Process-wide cache, disabled (None) with LLM_CACHE=0"""
+    global _cache
+    if os.getenv('LLM_CACHE', '1').lower() in ('0', 'false', 'no'):
+        return None
+    if _cache is None:
+        _cache = LLMCache()
+    return _cache
+
+
+def _dump(result):
+    return result.dict() if hasattr(result, 'dict') else result
+
+
+def _load(value, schema):
+    return schema.parse_obj(value) if schema is not None else value
+
+
+def cached_invoke(chain, inputs, namespace, key_inputs=None, schema=None, cache=None):
+    """
+    chain.invoke(inputs), answered from the cache when the fingerprint of
+    key_inputs (default: inputs) was seen within the TTL
+
+    Parameters:
+    - namespace: call site and model, e.g. 'choose_coins:gpt-4'
+    - key_inputs: what the answer depends on (candidate coins, metrics, article IDs)
+    - schema: structured output model used to rebuild cached results
+    """
+    cache = get_llm_cache() if cache is None else cache
+    if cache is None:
+        with span('llm_invoke', namespace=namespace):
+            return chain.invoke(inputs)
+    key = fingerprint(namespace, inputs if key_inputs is None else key_inputs)
+    value = cache.get(key)
+    count('llm_cache', namespace=namespace, result='miss' if value is None else 'hit')
+    if value is not None:
+        return _load(value, schema)
+    with span('llm_invoke', namespace=namespace):
+        result = chain.invoke(inputs)
+    cache.set(key, _dump(result))
+    return result
+
+
+async def acached_invoke(chain, inputs, namespace, key_inputs=None, schema=None, cache=None):
+    """Async twin of cached_invoke (chain.ainvoke)"""
+    cache = get_llm_cache() if cache is None else cache
+    if cache is None:
+        with span('llm_invoke', namespace=namespace):
+            return await chain.ainvoke(inputs)
+    key = fingerprint(namespace, inputs if key_inputs is None else key_inputs)
+    value = cache.get(key)
+    count('llm_cache', namespace=namespace, result='miss' if value is None else 'hit')
+    if value is not None:
+        return _load(value, schema)
+    with span('llm_invoke', namespace=namespace):
+        result = await chain.ainvoke(inputs)
+    cache.set(key, _dump(result))
+    return result
+
+
+async def abatch_cached(chain, inputs, namespace, key_inputs=None, schema=None, max_concurrency=None, cache=None):
+    """
+    chain.abatch over the inputs the cache cannot answer, results in input order
+
+    Failed calls come back as their exception (return_exceptions=True) and
+    are not cached, so one bad input does not fail the batch.
+    """
+    cache = get_llm_cache() if cache is None else cache
+    key_inputs = inputs if key_inputs is None else key_inputs
+    results = [None] * len(inputs)
+    pending = []
+    for i, (item, key_item) in enumerate(zip(inputs, key_inputs)):
+        key = fingerprint(namespace, key_item) if cache is not None else None
+        value = cache.get(key) if cache is not None else None
+        if value is not None:
+            results[i] = _load(value, schema)
+        else:
+            pending.append((i, key))
+    if cache is not None:
+        count('llm_cache', len(inputs) - len(pending), namespace=namespace, result='hit')
+        count('llm_cache', len(pending), namespace=namespace, result='miss')
+    if pending:
+        with span('llm_batch', namespace=namespace):
+            answers = await chain.abatch([inputs[i] for i, _ in pending],
+                                         config={'max_concurrency': max_concurrency},
+                                         return_exceptions=True)
+        for (i, key), answer in zip(pending, answers):
+            results[i] = answer
+            if cache is not None and not isinstance(answer, Exception):
+                cache.set(key, _dump(answer))
+    return results
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import re
+import threading
+import time
+
+LLM_FAKE_ENV = 'LLM_FAKE'   # 1: OpenAI yerine FakeChatModel (çevrimdışı test)
+LLM_FAKE_LATENCY_ENV = 'LLM_FAKE_LATENCY'   # sahte modelin cevap gecikmesi (saniye), benchmarklar için
+
+# Prompt içinde coin adayları: "Coin: SCR" satırları, "SCRUSDT" sembolleri veya TSV tablo satırları
+COIN_PATTERNS = (re.compile(r'Coin: ([A-Z0-9]{2,15})\b'), re.compile(r'\b([A-Z0-9]{2,15})USDT\b'),
+                 re.compile(r'^([A-Z0-9]{2,15})\t', re.M))
+# Hiçbiri yoksa (ör. tek coinlik duygu analizi promptu) büyük harfli ilk kelimeler
+FALLBACK_PATTERN = re.compile(r'\b([A-Z][A-Z0-9]{1,14})\b')
+
+
+def _prompt_text(prompt):
+    if hasattr(prompt, 'to_string'):
+        return prompt.to_string()
+    if isinstance(prompt, dict):
+        return ' '.join(str(v) for v in prompt.values())
+    return str(prompt)
+
+
+def prompt_coins(text):
+    """Coin symbols mentioned in a prompt, first occurrence order"""
+    coins = []
+    for pattern in COIN_PATTERNS:
+        for coin in pattern.findall(text):
+            if coin not in coins:
+                coins.append(coin)
+    return coins or list(dict.fromkeys(FALLBACK_PATTERN.findall(text)))
+
+
+def _default_value(field, text):
+    outer = getattr(field, 'outer_type_', None)
+    kind = getattr(field, 'type_', str)
+    if getattr(outer, '__origin__', None) in (list, tuple):
+        return prompt_coins(text)[:3] if kind is str else []
+    if kind is float:
+        return 0.5
+    if kind is int:
+        return 0
+    if kind is bool:
+        return False
+    if field.name == 'coin_name':
+        coins = prompt_coins(text)
+        return coins[0] if coins else ''
+    return 'Neutral'
+
+
+class FakeChatModel:
+    """
+    Offline stand-in for ChatOpenAI in `prompt | llm.with_structured_output(Schema)` chains.
+
+    responses: None for placeholder values derived from the schema and the
+    prompt (list fields get the first coins mentioned in the prompt), a list
+    of dicts returned in turn, or a callable (schema, prompt_text) -> dict.
+    latency simulates the model round trip; calls counts invocations.
+    """
+
+    def __init__(self, model='fake', responses=None, latency=0.0):
+        self.model_name = model
+        self.responses = responses
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _values(self, schema, text):
+        with self.lock:
+            index = self.calls
+            self.calls += 1
+        if callable(self.responses):
+            return self.responses(schema, text)
+        if self.responses:
+            return self.responses[index % len(self.responses)]
+        return {name: _default_value(field, text) for name, field in schema.__fields__.items()}
+
+    def with_structured_output(self, schema):
+        from langchain_core.runnables import RunnableLambda
+
+        def respond(prompt):
+            if self.latency:
+                time.sleep(self.latency)
+            return schema.parse_obj(self._values(schema, _prompt_text(prompt)))
+
+        async def arespond(prompt):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return schema.parse_obj(self._values(schema, _prompt_text(prompt)))
+
+        return RunnableLambda(respond, afunc=arespond, name=f'{self.model_name}:{schema.__name__}')
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_chat_model(model, temperature=0):
+    """
+    ChatOpenAI, or FakeChatModel when LLM_FAKE=1 (LLM_FAKE_LATENCY seconds per call);
+    one shared instance per (model, temperature), so the HTTP pool stays warm
+    """
+    if os.getenv(LLM_FAKE_ENV, '').lower() in ('1', 'true', 'yes'):
+        return FakeChatModel(model, latency=float(os.getenv(LLM_FAKE_LATENCY_ENV, 0)))
+    with _models_lock:
+        key = (model, temperature)
+        if key not in _models:
+            from dotenv import load_dotenv
+            from langchain_openai import ChatOpenAI
+            load_dotenv()
+            _models[key] = ChatOpenAI(model=model, temperature=temperature)
+        return _models[key]
@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+from ticker_table import read_table, records_to_arrays, TickerSnapshot, TICKER_FIELDS, CACHE_TABLE
+from ticker_snapshot import read_snapshot, SNAPSHOT_FILE
+from binance_client import get_client, BinanceAPIError
+from rate_limiter import PRIORITY_ORDER
+
+CACHE_FILE = 'cache.json'
+MAX_AGE = 300       # saniye, daha eski snapshot verisi yerine REST'ten taze veri alınır
+MAX_SYMBOLS = 100   # tek /ticker/24hr?symbols=[...] isteğindeki en fazla sembol
+
+
+class MarketDataProvider:
+    """
+    Per-symbol 24h ticker lookups without a request per coin.
+
+    Lookups are answered from the shared ticker snapshot the cache process
+    writes (ticker table, else cache.npz, else cache.json) through a
+    symbol -> column index rebuilt only when the snapshot changes. Symbols
+    missing from it, or a snapshot older than max_age, are fetched together
+    with one /ticker/24hr?symbols=[...] request and kept for max_age.
+
+    Quotes are /ticker/24hr style dicts (numeric fields as float) plus
+    'age' (seconds since the data was taken) and 'source' ('snapshot'/'rest').
+    """
+
+    def __init__(self, client=None, max_age=MAX_AGE, table_path=CACHE_TABLE,
+                 snapshot_path=SNAPSHOT_FILE, cache_path=CACHE_FILE):
+        self.client = client or get_client()
+        self.max_age = max_age
+        self.table_path = table_path
+        self.snapshot_path = snapshot_path
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+        self.index = {}
+        self.index_key = None
+        self.files = {}     # dosya yolu -> (mtime, TickerSnapshot)
+        self.fetched = {}   # REST'ten alınan: symbol -> (time.time(), quote)
+        self.stats = {'snapshot': 0, 'rest': 0, 'requests': 0, 'missing': 0}
+
+    def _file_snapshot(self, path, read):
+        mtime = os.path.getmtime(path)
+        cached = self.files.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, read(path))
+            self.files[path] = cached
+        return cached[1]
+
+    def snapshot(self):
+        """Newest shared ticker snapshot, None if the cache process has not written one"""
+        try:
+            snapshot = read_table(self.table_path)
+            if snapshot is not None:
+                return snapshot
+        except FileNotFoundError:
+            pass
+        if os.path.exists(self.snapshot_path):
+            return self._file_snapshot(self.snapshot_path, read_snapshot)
+        if os.path.exists(self.cache_path):
+            def read_json(path):
+                with open(path, 'r') as f:
+                    return TickerSnapshot(*records_to_arrays(json.load(f)), 0, os.path.getmtime(path))
+            return self._file_snapshot(self.cache_path, read_json)
+        return None
+
+    def _indexed(self, snapshot):
+        key = (id(snapshot.symbols), snapshot.version, snapshot.written_at)
+        if key != self.index_key:
+            names = [s.decode() if isinstance(s, bytes) else s for s in snapshot.symbols.tolist()]
+            self.index = {name: i for i, name in enumerate(names)}
+            self.index_key = key
+        return self.index
+
+    @staticmethod
+    def _quote(snapshot, column, symbol, age):
+        row = snapshot.values[:, column].tolist()
+        quote = dict(zip(TICKER_FIELDS, row))
+        quote.update(symbol=symbol, age=age, source='snapshot')
+        return quote
+
+    def _from_snapshot(self, symbols, max_age):
+        found = {}
+        try:
+            snapshot = self.snapshot()
+        except Exception as e:
+            print(f"Ticker snapshot okunamadı: {str(e)}")
+            snapshot = None
+        if snapshot is None or snapshot.age() > max_age:
+            return found
+        age = snapshot.age()
+        for _ in range(2):
+            with self.lock:
+                index = self._indexed(snapshot)
+                found = {symbol: self._quote(snapshot, index[symbol], symbol, age)
+                         for symbol in symbols if symbol in index}
+            # Okuma sırasında yazıcı bu slota döndüyse tutarlı bir kopyadan tekrar oku
+            if snapshot.is_current():
+                break
+            snapshot = snapshot.table.read(copy=True)
+        return found
+
+    def _from_memory(self, symbols, max_age):
+        now = time.time()
+        found = {}
+        for symbol in symbols:
+            entry = self.fetched.get(symbol)
+            if entry is not None and now - entry[0] <= max_age:
+                found[symbol] = dict(entry[1], age=now - entry[0])
+        return found
+
+    @staticmethod
+    def _batches(symbols):
+        for i in range(0, len(symbols), MAX_SYMBOLS):
+            yield {'symbols': json.dumps(symbols[i:i + MAX_SYMBOLS], separators=(',', ':'))}
+
+    def _remember(self, rows):
+        now = time.time()
+        found = {}
+        for row in rows:
+            if not isinstance(row, dict) or 'symbol' not in row:
+                continue
+            quote = {name: float(row[name]) for name in TICKER_FIELDS if name in row}
+            quote.update(symbol=row['symbol'], age=0.0, source='rest')
+            self.fetched[row['symbol']] = (now, quote)
+            found[row['symbol']] = quote
+        return found
+
+    def _lookup(self, symbols, max_age):
+        max_age = self.max_age if max_age is None else max_age
+        symbols = list(dict.fromkeys(symbols))
+        found = self._from_snapshot(symbols, max_age)
+        self.stats['snapshot'] += len(found)
+        found.update(self._from_memory([s for s in symbols if s not in found], max_age))
+        return found, [s for s in symbols if s not in found]
+
+    def get_many(self, symbols, max_age=None):
+        """symbol -> quote for every symbol Binance knows, one batched request for the misses"""
+        found, missing = self._lookup(symbols, max_age)
+        for params in self._batches(missing):
+            self.stats['requests'] += 1
+            try:
+                rows = self.client.get_json('/ticker/24hr', params, priority=PRIORITY_ORDER)
+            except BinanceAPIError as e:
+                if e.status != 400:
+                    raise
+                # Geçersiz tek bir sembol tüm toplu isteği düşürür, semboller tek tek denenir
+                rows = [self._single(symbol) for symbol in json.loads(params['symbols'])]
+            found.update(self._remember(rows))
+        return self._finish(found, missing)
+
+    def _single(self, symbol):
+        self.stats['requests'] += 1
+        try:
+            return self.client.get_json('/ticker/24hr', {'symbol': symbol}, priority=PRIORITY_ORDER)
+        except BinanceAPIError as e:
+            if e.status != 400:
+                raise
+            return None
+
+    async def aget_many(self, client, symbols, max_age=None):
+        """get_many over an AsyncBinanceClient"""
+        found, missing = self._lookup(symbols, max_age)
+        for params in self._batches(missing):
+            self.stats['requests'] += 1
+            try:
+                rows = await client.get_json('/ticker/24hr', params, priority=PRIORITY_ORDER)
+            except BinanceAPIError as e:
+                if e.status != 400:
+                    raise
+                batch = json.loads(params['symbols'])
+                self.stats['requests'] += len(batch)
+                rows = await client.gather([('/ticker/24hr', {'symbol': symbol}) for symbol in batch])
+            found.update(self._remember(rows))
+        return self._finish(found, missing)
+
+    def _finish(self, found, missing):
+        fetched = [s for s in missing if s in found]
+        self.stats['rest'] += len(fetched)
+        self.stats['missing'] += len(missing) - len(fetched)
+        return found
+
+    def get(self, symbol, max_age=None):
+        """Quote for one symbol, None if Binance does not know it"""
+        return self.get_many([symbol], max_age).get(symbol)
+
+
+_provider = None
+
+
+def get_market_data_provider():
+    """Process-wide provider"""
+    global _provider
+    if _provider is None:
+        _provider = MarketDataProvider()
+    return _provider
@@ -1,140 +1,277 @@
-import requests
-from datetime import datetime, timedelta
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+import asyncio
+from llm_models import get_chat_model
+from llm_cache import cached_invoke, abatch_cached
 import os
+from binance_client import get_client, AsyncBinanceClient, TIMEOUT
+from rate_limiter import PRIORITY_ORDER
+from news_store import get_news_store, window_start
+from market_data import MarketDataProvider
+from instrumentation import span, timed, count
 
-load_dotenv()
+NEWS_URL = "https://newsapi.org/v2/everything"   # NEWS_API_URL ile değiştirilebilir
+NEWS_LIMIT = 5  # coin başına prompta giren haber sayısı
+SENTIMENT_CONCURRENCY = 4  # aynı anda en fazla LLM çağrısı
 
 class NewsAnalyzer:
-    def __init__(self):
+    def __init__(self, news_url=None, store=None, market=None):
+        from dotenv import load_dotenv
+        load_dotenv()
         self.news_api_key = os.getenv("NEWS_API_KEY")
+        self.binance = get_client()
+        # Piyasa verileri cache sürecinin ticker snapshot'ından, eksikler tek toplu istekle
+        self.market = market if market is not None else MarketDataProvider(self.binance)
+        self.news_url = news_url or os.getenv("NEWS_API_URL", NEWS_URL)
+        # Yerel haber deposu: coin başına TTL, URL/başlık ile tekilleştirme, yalnızca yeni haberler istenir
+        self.store = store if store is not None else get_news_store()
         
+    @timed('get_news_data', mode='sync')
     def get_news_data(self, coin):
-        """NewsAPI'den kripto haberleri getirir"""
+        """Kripto haberlerini getirir (yerel depodan, TTL dolduysa NewsAPI'den yalnızca yeni haberler)"""
         try:
-            url = "https://newsapi.org/v2/everything"
+            fresh = self.store.is_fresh(coin)
+            count('news_store', result='fresh' if fresh else 'fetch')
+            if not fresh:
+                import requests
+                with span('newsapi_request'):
+                    response = requests.get(self.news_url, params=self.news_params(coin), timeout=TIMEOUT)
+                self.store_news(coin, response.json())
+            return self.store.articles(coin, since=window_start(), limit=NEWS_LIMIT)
             
-            # Son 3 gündeki haberler
-            three_days_ago = (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d')
-            
-            params = {
-                'q': f'(cryptocurrency OR crypto) AND {coin}',
-                'from': three_days_ago,
-                'sortBy': 'relevancy',
-                'language': 'en',
-                'apiKey': self.news_api_key,
-                'pageSize': 10
-            }
-            
-            response = requests.get(url, params=params)
-            data = response.json()
-            
-            if data.get('status') == 'ok':
-                articles = data.get('articles', [])
-                news_data = []
-                for article in articles:
-                    if article['title'] and article['description']:  # Boş haberleri filtrele
-                        news_data.append({
-                            'title': article['title'],
-                            'description': article['description'],
-                            'source': article['source']['name'],
-                            'published_at': article['publishedAt'],
-                            'url': article['url']
-                        })
-                return news_data[:5]  # En alakalı 5 haber
+        except Exception as e:
+            print(f"Haber getirme hatası ({coin}): {e}")
             return []
+
+    @timed('get_news_data', mode='async')
+    async def aget_news_data(self, session, coin):
+        """get_news_data ile aynı, paylaşılan aiohttp oturumu üzerinden"""
+        try:
+            fresh = self.store.is_fresh(coin)
+            count('news_store', result='fresh' if fresh else 'fetch')
+            if not fresh:
+                with span('newsapi_request'):
+                    async with session.get(self.news_url, params=self.news_params(coin)) as response:
+                        data = await response.json(content_type=None)
+                self.store_news(coin, data)
+            return self.store.articles(coin, since=window_start(), limit=NEWS_LIMIT)
             
         except Exception as e:
             print(f"Haber getirme hatası ({coin}): {e}")
             return []
 
+    def store_news(self, coin, data):
+        if data.get('status') == 'ok':
+            self.store.add(coin, self.parse_news(data, limit=None))
+        else:
+            # Kota/hata durumunda depodaki haberlerle devam edilir, TTL sonra tekrar denenir
+            print(f"NewsAPI hatası ({coin}): {data.get('code')} {data.get('message')}")
+
+    def news_params(self, coin):
+        # Son 3 gündeki haberler, daha önce görülen en yeni haberden itibaren
+        since = max(window_start(), self.store.last_published(coin) or '')
+        
+        params = {
+            'q': f'(cryptocurrency OR crypto) AND {coin}',
+            'from': since,
+            'sortBy': 'relevancy',
+            'language': 'en',
+            'apiKey': self.news_api_key,
+            'pageSize': 10
+        }
+        # aiohttp None değerleri kabul etmez (requests atlar)
+        return {k: v for k, v in params.items() if v is not None}
+
+    @staticmethod
+    def parse_news(data, limit=NEWS_LIMIT):
+        if data.get('status') == 'ok':
+            articles = data.get('articles', [])
+            news_data = []
+            for article in articles:
+                if article['title'] and article['description']:  # Boş haberleri filtrele
+                    news_data.append({
+                        'title': article['title'],
+                        'description': article['description'],
+                        'source': article['source']['name'],
+                        'published_at': article['publishedAt'],
+                        'url': article['url']
+                    })
+            return news_data[:limit]  # En alakalı haberler
+        return []
+
     def get_market_data(self, coin):
-        """Binance API'den piyasa verilerini getirir"""
+        """Binance piyasa verilerini getirir (ticker snapshot'ından, yoksa API'den)"""
+        return self.get_market_data_batch([coin])[0]
+
+    def get_market_data_batch(self, coins):
+        """Birden çok coin için piyasa verileri, coins sırasıyla (bulunamayan coin için {})"""
         try:
-            url = f"https://api.binance.com/api/v3/ticker/24hr"
-            params = {
-                'symbol': f'{coin}USDT'
-            }
-            
-            response = requests.get(url, params=params)
-            data = response.json()
-            
-            return {
-                'current_price': float(data['lastPrice']),
-                'price_change_24h': float(data['priceChangePercent']),
-                'volume_24h': float(data['volume']),
-                'high_24h': float(data['highPrice']),
-                'low_24h': float(data['lowPrice']),
-                'total_trades': int(data['count'])
-            }
-            
+            quotes = self.market.get_many([f'{coin}USDT' for coin in coins])
+        except Exception as e:
+            print(f"Piyasa verisi getirme hatası ({', '.join(coins)}): {e}")
+            return [{} for _ in coins]
+        return [self._market_or_empty(coin, quotes) for coin in coins]
+
+    async def aget_market_data_batch(self, client, coins):
+        """get_market_data_batch ile aynı, AsyncBinanceClient üzerinden"""
+        try:
+            quotes = await self.market.aget_many(client, [f'{coin}USDT' for coin in coins])
+        except Exception as e:
+            print(f"Piyasa verisi getirme hatası ({', '.join(coins)}): {e}")
+            return [{} for _ in coins]
+        return [self._market_or_empty(coin, quotes) for coin in coins]
+
+    def _market_or_empty(self, coin, quotes):
+        quote = quotes.get(f'{coin}USDT')
+        if quote is None:
+            print(f"Piyasa verisi getirme hatası ({coin}): sembol bulunamadı")
+            return {}
+        try:
+            return self.parse_market(quote)
         except Exception as e:
+            # Snapshot'ta eksik alanlar NaN olabilir (ör. --mini akışında 'count' yok)
             print(f"Piyasa verisi getirme hatası ({coin}): {e}")
             return {}
 
-class SentimentOutput(BaseModel):
-    coin_name: str = Field(description="Coin adı")
-    news_sentiment: str = Field(description="Haberlerden çıkarılan genel duygu (Positive/Neutral/Negative)")
-    market_sentiment: str = Field(description="Piyasa metriklerine dayalı duygu analizi (Positive/Neutral/Negative)")
-    expert_opinions: str = Field(description="Uzman görüşlerinin özeti")
-    short_term_outlook: str = Field(description="24-48 saatlik kısa vadeli fiyat beklentisi")
-    confidence_score: float = Field(description="Analiz güven skoru (0-1 arası)")
+    @staticmethod
+    def parse_market(data):
+        return {
+            'current_price': float(data['lastPrice']),
+            'price_change_24h': float(data['priceChangePercent']),
+            'volume_24h': float(data['volume']),
+            'high_24h': float(data['highPrice']),
+            'low_24h': float(data['lowPrice']),
+            'total_trades': int(data['count'])
+        }
+
+# Şema ve prompt langchain gerektirir (~1s import), ilk kullanımda bir kez oluşturulur
+_lazy = {}
+
+def sentiment_output():
+    """SentimentOutput structured output schema"""
+    if 'SentimentOutput' not in _lazy:
+        from langchain_core.pydantic_v1 import BaseModel, Field
+
+        class SentimentOutput(BaseModel):
+            coin_name: str = Field(description="Coin adı")
+            news_sentiment: str = Field(description="Haberlerden çıkarılan genel duygu (Positive/Neutral/Negative)")
+            market_sentiment: str = Field(description="Piyasa metriklerine dayalı duygu analizi (Positive/Neutral/Negative)")
+            expert_opinions: str = Field(description="Uzman görüşlerinin özeti")
+            short_term_outlook: str = Field(description="24-48 saatlik kısa vadeli fiyat beklentisi")
+            confidence_score: float = Field(description="Analiz güven skoru (0-1 arası)")
+        _lazy['SentimentOutput'] = SentimentOutput
+    return _lazy['SentimentOutput']
+
+def sentiment_prompt():
+    """Prompt bir kez oluşturulur, coin verileri değişken olarak geçilir"""
+    if 'SENTIMENT_PROMPT' not in _lazy:
+        from langchain_core.prompts import ChatPromptTemplate
+        _lazy['SENTIMENT_PROMPT'] = ChatPromptTemplate.from_messages([
+            ("system", """Sen deneyimli bir kripto piyasası analistisin. 
+    {coin} için aşağıdaki verileri analiz et:
+    
+    Son Haberler:
+    {news_data}
+    
+    {market_info}
+    
+    Şu bilgileri içeren detaylı bir analiz yap:
+    1. Haberlere dayalı genel duygu (positive/neutral/negative)
+    2. Piyasa metriklerine dayalı duygu (positive/neutral/negative)
+    3. Uzman görüşlerinin özeti (haberlerden çıkarım yap)
+    4. 24-48 saatlik fiyat beklentisi
+    5. Veri kalitesi ve miktarına dayalı güven skoru"""),
+            ("user", "Verilen bilgilere dayanarak kapsamlı bir piyasa analizi yap.")
+        ])
+    return _lazy['SENTIMENT_PROMPT']
+
+def __getattr__(name):
+    # from news_analyzer import SentimentOutput / SENTIMENT_PROMPT
+    if name == 'SentimentOutput':
+        return sentiment_output()
+    if name == 'SENTIMENT_PROMPT':
+        return sentiment_prompt()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def format_market_info(market_data):
+    # Market verilerini formatlayalım
+    return f"""
+    24 Saatlik Piyasa Verileri:
+    - Güncel Fiyat: ${market_data.get('current_price', 'N/A')}
+    - 24s Değişim: %{market_data.get('price_change_24h', 'N/A')}
+    - 24s Hacim: {market_data.get('volume_24h', 'N/A')} USDT
+    - 24s En Yüksek: ${market_data.get('high_24h', 'N/A')}
+    - 24s En Düşük: ${market_data.get('low_24h', 'N/A')}
+    - Toplam İşlem: {market_data.get('total_trades', 'N/A')}
+    """
+
+def sentiment_inputs(coin, news_data, market_data):
+    """Prompt değişkenleri ve cache anahtarı (haber URL'leri, yuvarlanmış metrikler)"""
+    inputs = {
+        "coin": coin,
+        "news_data": str(news_data),
+        "market_info": format_market_info(market_data)
+    }
+    key_inputs = {"coin": coin, "news": [n['url'] for n in news_data], "market": market_data}
+    return inputs, key_inputs
+
+def sentiment_chain():
+    llm = get_chat_model("gpt-4", temperature=0)
+    return sentiment_prompt() | llm.with_structured_output(sentiment_output())
 
 def analyze_market_sentiment(coins):
     """Seçilen coinler için piyasa duygu analizi yapar"""
     analyzer = NewsAnalyzer()
-    llm = ChatOpenAI(model="gpt-4", temperature=0)
-    structured_llm = llm.with_structured_output(SentimentOutput)
+    chain = sentiment_chain()
+    
+    # Tüm coinlerin piyasa verileri tek seferde (snapshot'tan ya da tek toplu istekle)
+    markets = analyzer.get_market_data_batch(coins)
     
     results = []
-    for coin in coins:
+    for coin, market_data in zip(coins, markets):
         news_data = analyzer.get_news_data(coin)
-        market_data = analyzer.get_market_data(coin)
+        inputs, key_inputs = sentiment_inputs(coin, news_data, market_data)
         
-        # Market verilerini formatlayalım
-        market_info = f"""
-        24 Saatlik Piyasa Verileri:
-        - Güncel Fiyat: ${market_data.get('current_price', 'N/A')}
-        - 24s Değişim: %{market_data.get('price_change_24h', 'N/A')}
-        - 24s Hacim: {market_data.get('volume_24h', 'N/A')} USDT
-        - 24s En Yüksek: ${market_data.get('high_24h', 'N/A')}
-        - 24s En Düşük: ${market_data.get('low_24h', 'N/A')}
-        - Toplam İşlem: {market_data.get('total_trades', 'N/A')}
-        """
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Sen deneyimli bir kripto piyasası analistisin. 
-            {coin} için aşağıdaki verileri analiz et:
-            
-            Son Haberler:
-            {news_data}
-            
-            {market_info}
-            
-            Şu bilgileri içeren detaylı bir analiz yap:
-            1. Haberlere dayalı genel duygu (positive/neutral/negative)
-            2. Piyasa metriklerine dayalı duygu (positive/neutral/negative)
-            3. Uzman görüşlerinin özeti (haberlerden çıkarım yap)
-            4. 24-48 saatlik fiyat beklentisi
-            5. Veri kalitesi ve miktarına dayalı güven skoru"""),
-            ("user", "Verilen bilgilere dayanarak kapsamlı bir piyasa analizi yap.")
-        ])
-        
-        chain = prompt | structured_llm
-        
-        analysis = chain.invoke({
-            "coin": coin,
-            "news_data": str(news_data),
-            "market_info": market_info
-        })
+        # Aynı haberler (URL) ve yakın piyasa metrikleri için TTL içinde önceki analiz kullanılır
+        analysis = cached_invoke(chain, inputs, "analyze_market_sentiment:gpt-4",
+                                 key_inputs=key_inputs, schema=sentiment_output())
         
         results.append(analysis)
         
     return results
 
+async def analyze_market_sentiment_async(coins, max_concurrency=SENTIMENT_CONCURRENCY):
+    """
+    analyze_market_sentiment'in eşzamanlı sürümü
+
+    Tüm coinlerin haber ve piyasa verileri aynı anda çekilir, LLM çağrıları
+    chain.abatch ile en fazla max_concurrency paralel yapılır. Sonuçlar
+    coins sırasıyla döner; hata veren coin için sonuç None olur, diğerleri
+    etkilenmez.
+    """
+    import aiohttp
+    analyzer = NewsAnalyzer()
+    chain = sentiment_chain()
+    
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session, \
+            AsyncBinanceClient(base_url=analyzer.binance.base_url, priority=PRIORITY_ORDER) as client:
+        news, markets = await asyncio.gather(
+            asyncio.gather(*(analyzer.aget_news_data(session, coin) for coin in coins)),
+            analyzer.aget_market_data_batch(client, coins),
+        )
+    
+    prepared = [sentiment_inputs(coin, n, m) for coin, n, m in zip(coins, news, markets)]
+    analyses = await abatch_cached(chain, [p[0] for p in prepared], "analyze_market_sentiment:gpt-4",
+                                   key_inputs=[p[1] for p in prepared], schema=sentiment_output(),
+                                   max_concurrency=max_concurrency)
+    
+    results = []
+    for coin, analysis in zip(coins, analyses):
+        if isinstance(analysis, Exception):
+            print(f"Duygu analizi hatası ({coin}): {analysis}")
+            analysis = None
+        results.append(analysis)
+    return results
+
 if __name__ == "__main__":
     # Test için örnek coinler
     test_coins = ["PEPE", "ETH", "BNB"]
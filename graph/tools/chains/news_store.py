@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+NEWS_DB_FILE = os.getenv('NEWS_DB_FILE', 'news.sqlite')
+NEWS_TTL = float(os.getenv('NEWS_TTL', 900))   # saniye, bu süre içinde aynı coin için NewsAPI'ye gidilmez
+NEWS_WINDOW_DAYS = 3                            # haberler en fazla bu kadar eski olabilir
+
+
+def article_id(article):
+    """Dedup key: hash of the normalized URL, or of the title when there is no URL"""
+    key = (article.get('url') or '').strip().lower().rstrip('/')
+    if not key:
+        key = 'title:' + ' '.join((article.get('title') or '').lower().split())
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def window_start(days=NEWS_WINDOW_DAYS, now=None):
+    now = datetime.now(timezone.utc) if now is None else now
+    return (now - timedelta(days=days)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class NewsStore:
+    """
+    Local NewsAPI article store in SQLite.
+
+    Articles are stored once (deduplicated by URL/title hash) and linked to
+    every coin whose query returned them; queries remember when they were
+    last fetched and the newest publishedAt seen, so a coin is refetched at
+    most once per ttl and then only for newer articles. publishedAt is kept
+    as the NewsAPI ISO string, which sorts chronologically.
+    """
+
+    def __init__(self, path=NEWS_DB_FILE, ttl=NEWS_TTL, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path if path is not None else ':memory:', check_same_thread=False)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS articles (
+                id TEXT PRIMARY KEY, url TEXT, title TEXT, description TEXT,
+                source TEXT, published_at TEXT, fetched_at REAL);
+            CREATE INDEX IF NOT EXISTS articles_published ON articles (published_at);
+            CREATE TABLE IF NOT EXISTS article_coins (
+                coin TEXT NOT NULL, article_id TEXT NOT NULL, published_at TEXT,
+                PRIMARY KEY (coin, article_id));
+            CREATE INDEX IF NOT EXISTS article_coins_published ON article_coins (coin, published_at);
+            CREATE TABLE IF NOT EXISTS queries (
+                coin TEXT PRIMARY KEY, fetched_at REAL, last_published TEXT);
+        ''')
+        self.db.commit()
+
+    def is_fresh(self, coin):
+        with self.lock:
+            row = self.db.execute('SELECT fetched_at FROM queries WHERE coin = ?', (coin,)).fetchone()
+        return row is not None and self.clock() - row[0] < self.ttl
+
+    def last_published(self, coin):
+        with self.lock:
+            row = self.db.execute('SELECT last_published FROM queries WHERE coin = ?', (coin,)).fetchone()
+        return row[0] or None if row is not None else None
+
+    def add(self, coin, articles):
+        """Stores parsed articles (NewsAnalyzer.parse_news format) for coin, returns how many were new"""
+        now = self.clock()
+        with self.lock:
+            added = 0
+            for article in articles:
+                key = article_id(article)
+                added += self.db.execute('INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                         (key, article.get('url'), article.get('title'), article.get('description'),
+                                          article.get('source'), article.get('published_at'), now)).rowcount
+                self.db.execute('INSERT OR IGNORE INTO article_coins VALUES (?, ?, ?)',
+                                (coin, key, article.get('published_at')))
+            newest = max((a['published_at'] for a in articles if a.get('published_at')), default=None)
+            self.db.execute('''
+                INSERT INTO queries (coin, fetched_at, last_published) VALUES (?, ?, ?)
+                ON CONFLICT (coin) DO UPDATE SET fetched_at = excluded.fetched_at,
+                    last_published = MAX(COALESCE(queries.last_published, ''), COALESCE(excluded.last_published, ''))
+            ''', (coin, now, newest))
+            self.db.commit()
+        return added
+
+    def articles(self, coin, since=None, limit=None):
+        """Articles linked to coin, newest first, optionally only those published at/after since"""
+        query = ('SELECT a.title, a.description, a.source, a.published_at, a.url FROM article_coins c '
+                 'JOIN articles a ON a.id = c.article_id WHERE c.coin = ?')
+        params = [coin]
+        if since is not None:
+            query += ' AND c.published_at >= ?'
+            params.append(since)
+        query += ' ORDER BY c.published_at DESC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self.lock:
+            rows = self.db.execute(query, params).fetchall()
+        return [{'title': r[0], 'description': r[1], 'source': r[2], 'published_at': r[3], 'url': r[4]}
+                for r in rows]
+
+    def prune(self, before=None):
+        """Drops articles published before the news window"""
+        before = window_start() if before is None else before
+        with self.lock:
+            self.db.execute('DELETE FROM article_coins WHERE published_at < ?', (before,))
+            self.db.execute('DELETE FROM articles WHERE published_at < ?', (before,))
+            self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+_store = None
+
+
+def get_news_store():
+    """Process-wide store"""
+    global _store
+    if _store is None:
+        _store = NewsStore()
+        _store.prune()
+    return _store
@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import time
+import numpy as np
+from binance_client import get_client, AsyncBinanceClient, TIMEOUT
+from rate_limiter import PRIORITY_ORDER
+import instrumentation
+from instrumentation import span
+
+QUEUE_SIZE = 4            # aşamalar arası kuyruk kapasitesi, dolunca önceki aşama bekler (backpressure)
+KLINE_WORKERS = 4         # aynı anda kline çeken coin sayısı
+SENTIMENT_WORKERS = 4     # aynı anda duygu analizi yapılan coin sayısı
+INTERVALS = ('15m', '1h')
+SELECTORS = ('scores', 'llm', 'chooser')
+
+_DONE = object()
+
+
+class Stage:
+    """
+    One pipeline step: `workers` coroutines take items from the input queue,
+    await func(item) and pass the item on.
+
+    func fills the item dict in place; an exception is recorded in
+    item['errors'] and the item still moves on, so one bad coin does not
+    stop the others. Per-item latency and the time spent waiting on a full
+    output queue (backpressure) are kept for stats().
+    """
+
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.timings = []
+        self.blocked = 0.0
+        self.errors = 0
+
+    async def _worker(self, inbox, outbox):
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            start = time.perf_counter()
+            try:
+                with span('pipeline_stage', stage=self.name):
+                    await self.func(item)
+            except Exception as e:
+                print(f"Pipeline hatası ({self.name}, {item.get('coin')}): {e}")
+                item['errors'][self.name] = str(e)
+                self.errors += 1
+            elapsed = time.perf_counter() - start
+            item['timings'][self.name] = elapsed
+            self.timings.append(elapsed)
+            start = time.perf_counter()
+            await outbox.put(item)
+            self.blocked += time.perf_counter() - start
+
+    async def run(self, inbox, outbox, downstream_workers):
+        await asyncio.gather(*(self._worker(inbox, outbox) for _ in range(self.workers)))
+        for _ in range(downstream_workers):
+            await outbox.put(_DONE)
+
+    def stats(self):
+        timings = np.array(self.timings)
+        if not len(timings):
+            return {'stage': self.name, 'items': 0, 'errors': self.errors}
+        return {
+            'stage': self.name, 'items': len(timings), 'errors': self.errors, 'workers': self.workers,
+            'mean_s': float(timings.mean()), 'p50_s': float(np.percentile(timings, 50)),
+            'p95_s': float(np.percentile(timings, 95)), 'max_s': float(timings.max()),
+            'busy_s': float(timings.sum()), 'blocked_s': self.blocked,
+        }
+
+
+class Pipeline:
+    """
+    Stages connected by bounded asyncio queues.
+
+    The source (an async iterator of coins) feeds the first queue as soon as
+    a coin is known; every stage works on its own items concurrently, so
+    coin A can be in a later stage while coin B is still being fetched. When
+    a queue is full the stage before it waits, which keeps a slow stage
+    (e.g. the LLM) from piling up fetched data.
+    """
+
+    def __init__(self, stages, queue_size=QUEUE_SIZE):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.source_time = 0.0
+        self.wall_time = 0.0
+
+    async def run(self, source):
+        """Runs every coin from source through the stages, returns the items in the order they finished"""
+        started = time.perf_counter()
+        queues = [asyncio.Queue(self.queue_size) for _ in self.stages] + [asyncio.Queue()]
+        tasks = [asyncio.create_task(stage.run(queues[i], queues[i + 1], nxt.workers if nxt else 1))
+                 for i, (stage, nxt) in enumerate(zip(self.stages, self.stages[1:] + [None]))]
+
+        results = []
+
+        async def collect():
+            while True:
+                item = await queues[-1].get()
+                if item is _DONE:
+                    return
+                item['timings']['total'] = time.perf_counter() - item.pop('_started')
+                results.append(item)
+
+        collector = asyncio.create_task(collect())
+        try:
+            rank = 0
+            async for coin in source:
+                item = {'coin': coin, 'rank': rank, 'timings': {}, 'errors': {}, '_started': time.perf_counter()}
+                rank += 1
+                await queues[0].put(item)
+        finally:
+            for _ in range(self.stages[0].workers if self.stages else 1):
+                await queues[0].put(_DONE)
+            await asyncio.gather(*tasks)
+            await collector
+            self.wall_time = time.perf_counter() - started
+        return results
+
+    def stats(self):
+        return [stage.stats() for stage in self.stages]
+
+    def report(self):
+        print(f"\n=== Pipeline ({self.wall_time:.2f}s, seçim {self.source_time:.2f}s) ===")
+        for s in self.stats():
+            if not s['items']:
+                print(f"{s['stage']:<10} iş yok")
+                continue
+            print(f"{s['stage']:<10} {s['items']} coin, {s['errors']} hata - ort {s['mean_s']:.3f}s, "
+                  f"p95 {s['p95_s']:.3f}s, max {s['max_s']:.3f}s, meşgul {s['busy_s']:.2f}s, "
+                  f"kuyruk bekleme {s['blocked_s']:.2f}s")
+
+
+def select_coins(selector='scores', limit=None):
+    """Coin list from one of the selectors: 'scores' (kural tabanlı), 'llm' (realtime_selector_v2), 'chooser' (crypto_choose_v2)"""
+    if selector == 'scores':
+        from realtime_selector import select_potential_coins
+        coins = select_potential_coins()
+    elif selector == 'llm':
+        from realtime_selector_v2 import select_potential_coins
+        result = select_potential_coins()
+        coins = result[1] if result else []
+    elif selector == 'chooser':
+        from crypto_choose_v2 import choose_coins
+        coins = choose_coins()
+    else:
+        raise ValueError(f"Bilinmeyen seçici: {selector}")
+    coins = [c.upper().removesuffix('USDT') for c in coins or []]
+    return coins[:limit] if limit else coins
+
+
+def build_pipeline(client, session, intervals=INTERVALS, limit=100, sentiment=True,
+                   queue_size=QUEUE_SIZE, analyzer=None, news=None):
+    """klines -> sentiment stages sharing one AsyncBinanceClient and aiohttp session"""
+    from crypto_analyzer import CryptoAnalyzer
+    analyzer = analyzer or CryptoAnalyzer()
+
+    async def klines(item):
+        # aget_data coin alır (BTC), USDT çiftini kendisi oluşturur
+        frames = await asyncio.gather(*(analyzer.aget_data(client, item['coin'], interval, limit)
+                                        for interval in intervals))
+        item['data'] = dict(zip(intervals, frames))
+        failed = [i for i, df in item['data'].items() if df is None]
+        if failed:
+            item['errors']['klines'] = f"veri alınamadı: {', '.join(failed)}"
+
+    stages = [Stage('klines', klines, KLINE_WORKERS)]
+
+    if sentiment:
+        from news_analyzer import NewsAnalyzer, sentiment_output, sentiment_chain, sentiment_inputs
+        from llm_cache import acached_invoke
+        news = news or NewsAnalyzer()
+        chain = sentiment_chain()
+
+        async def analyze(item):
+            coin = item['coin']
+            news_data, markets = await asyncio.gather(news.aget_news_data(session, coin),
+                                                      news.aget_market_data_batch(client, [coin]))
+            inputs, key_inputs = sentiment_inputs(coin, news_data, markets[0])
+            item['market'] = markets[0]
+            item['sentiment'] = await acached_invoke(chain, inputs, "analyze_market_sentiment:gpt-4",
+                                                     key_inputs=key_inputs, schema=sentiment_output())
+
+        stages.append(Stage('sentiment', analyze, SENTIMENT_WORKERS))
+
+    return Pipeline(stages, queue_size)
+
+
+async def run_pipeline(coins=None, selector='scores', intervals=INTERVALS, limit=100, max_coins=None,
+                       refresh=True, sentiment=True, queue_size=QUEUE_SIZE, base_url=None):
+    """
+    Refresh cache -> select -> klines + indicators -> news/market sentiment, overlapped per coin
+
+    Returns:
+    - (results, pipeline) results are item dicts in selection order:
+      coin, rank, data ({interval: DataFrame}), market, sentiment, timings, errors
+    """
+    import aiohttp
+    base_url = base_url or get_client().base_url
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session, \
+            AsyncBinanceClient(base_url=base_url, priority=PRIORITY_ORDER) as client:
+        pipeline = build_pipeline(client, session, intervals, limit, sentiment, queue_size)
+
+        async def source():
+            start = time.perf_counter()
+            if refresh and coins is None:
+                from realtime_cache import update_cache
+                await asyncio.to_thread(update_cache)
+            selected = coins if coins is not None else await asyncio.to_thread(select_coins, selector, max_coins)
+            pipeline.source_time = time.perf_counter() - start
+            for coin in selected:
+                yield coin
+
+        results = await pipeline.run(source())
+    results.sort(key=lambda item: item['rank'])
+    return results, pipeline
+
+
+def print_results(results):
+    for item in results:
+        print(f"\n{'='*50}\nCoin: {item['coin']}")
+        for interval, df in item.get('data', {}).items():
+            if df is not None and len(df):
+                last = df.iloc[-1]
+                print(f"[{interval}] Kapanış: {last['close']:.6g} - RSI: {last['RSI']:.2f} - MACD: {last['MACD']:.6g}")
+        analysis = item.get('sentiment')
+        if analysis is not None:
+            print(f"Haber: {analysis.news_sentiment} - Piyasa: {analysis.market_sentiment} - "
+                  f"Güven: {analysis.confidence_score}")
+            print(f"Kısa Vadeli Beklenti: {analysis.short_term_outlook}")
+        for stage, error in item['errors'].items():
+            print(f"Hata ({stage}): {error}")
+        print("Süreler: " + ", ".join(f"{k} {v:.2f}s" for k, v in item['timings'].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Coin seçimi, kline/indikatörler ve duygu analizi')
+    parser.add_argument('--coins', nargs='+', help='Seçici yerine bu coinleri kullan (ör. BTC ETH)')
+    parser.add_argument('--selector', choices=SELECTORS, default='scores')
+    parser.add_argument('--max-coins', type=int, default=None)
+    parser.add_argument('--intervals', nargs='+', default=list(INTERVALS))
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--no-refresh', action='store_true', help='Cache güncellemeden mevcut cache ile seç')
+    parser.add_argument('--no-sentiment', action='store_true')
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    parser.add_argument('--profile', action='store_true', help='Span sürelerini topla ve sonunda yazdır')
+    parser.add_argument('--metrics-log', help='Span olaylarını JSON satırları olarak bu dosyaya yaz')
+    parser.add_argument('--metrics-port', type=int, default=instrumentation.METRICS_PORT,
+                        help='Prometheus /metrics endpointi (varsayılan: METRICS_PORT)')
+    args = parser.parse_args(argv)
+    if args.profile or args.metrics_log or args.metrics_port:
+        instrumentation.enable(args.metrics_log, args.metrics_port)
+
+    results, pipeline = asyncio.run(run_pipeline(
+        coins=[c.upper().removesuffix('USDT') for c in args.coins] if args.coins else None, selector=args.selector,
+        intervals=tuple(args.intervals), limit=args.limit, max_coins=args.max_coins,
+        refresh=not args.no_refresh, sentiment=not args.no_sentiment, queue_size=args.queue_size))
+    print_results(results)
+    pipeline.report()
+    instrumentation.print_summary()
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import math
+import re
+import numpy as np
+
+PROMPT_TOKEN_BUDGET = 800
+TOKEN_MODEL = 'gpt-4o-mini'
+
+# (başlık, kaynak sütun, biçim) - ScoredTickers sütunları veya skor bileşenleri
+SELECTOR_PROMPT_COLUMNS = [
+    ('coin', 'coin', 'str'),
+    ('price', 'lastPrice', 'price'),
+    ('chg24h%', 'priceChangePercent', 'pct'),
+    ('volat%', 'volatility', 'pct'),
+    ('vol', 'volume', 'compact'),
+    ('trades', 'count', 'compact'),
+    ('score', 'total_score', 'pct'),
+]
+CHOOSER_PROMPT_COLUMNS = [
+    ('coin', 'coin', 'str'),
+    ('price', 'lastPrice', 'price'),
+    ('chg1h%', 'short_term_change', 'pct'),
+    ('chg24h%', 'priceChangePercent', 'pct'),
+    ('spread%', 'volatility', 'pct'),
+    ('vol', 'volume', 'compact'),
+    ('trades', 'count', 'compact'),
+    ('vaccel', 'volume_accel_1h', 'pct'),
+    ('score', 'total_score', 'pct'),
+]
+
+# tiktoken yoksa yaklaşık sayım: BPE sayıları 1-3 haneli parçalara, metni kelimelere böler
+APPROX_TOKEN = re.compile(r'\d{1,3}|[^\W\d_]+|[^\w\s]|_')
+
+_encodings = {}
+
+
+def _encoding(model):
+    if model not in _encodings:
+        try:
+            import tiktoken
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding('o200k_base')
+        except Exception:
+            # tiktoken kurulu değil ya da BPE dosyası indirilemiyor (çevrimdışı)
+            _encodings[model] = None
+    return _encodings[model]
+
+
+def count_tokens(text, model=TOKEN_MODEL):
+    """Token count with tiktoken when installed, otherwise a close approximation"""
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(APPROX_TOKEN.findall(text))
+
+
+def format_value(value, kind):
+    if kind == 'str':
+        return str(value)
+    value = float(value)
+    if math.isnan(value):
+        return ''
+    if kind == 'price':
+        # 4 anlamlı basamak, bilimsel gösterim yok (0.00001234 -> 0.00001234)
+        return np.format_float_positional(value, precision=4, unique=False, fractional=False, trim='-')
+    if kind == 'compact':
+        for limit, suffix in ((1e9, 'B'), (1e6, 'M'), (1e3, 'K')):
+            if abs(value) >= limit:
+                return f'{value / limit:.1f}{suffix}'
+        return f'{value:.0f}'
+    return f'{value:.2f}'
+
+
+def _column(scored, source):
+    if source == 'coin':
+        return scored.arrays.coins
+    if source == 'symbol':
+        return scored.arrays.symbols
+    if source in scored.components:
+        return scored.components[source]
+    return scored.arrays.columns[source]
+
+
+def table_lines(scored, columns=SELECTOR_PROMPT_COLUMNS):
+    """Header and one tab-separated line per row of a ScoredTickers, in score order"""
+    values = [[format_value(v, kind) for v in _column(scored, source)] for _, source, kind in columns]
+    header = '\t'.join(name for name, _, _ in columns)
+    return header, ['\t'.join(row) for row in zip(*values)]
+
+
+def market_table(scored, columns=SELECTOR_PROMPT_COLUMNS, max_tokens=PROMPT_TOKEN_BUDGET, model=TOKEN_MODEL):
+    """
+    Compact TSV of the best-scored coins that fits in max_tokens
+
+    Parameters:
+    - scored: ScoredTickers sorted by total_score (scoring.score)
+    - columns: (header, source, format) triples
+    - max_tokens: token budget of the table, rows are cut from the low-score end
+
+    Returns:
+    - (text, rows) rows is how many coins made it into the table
+    """
+    header, lines = table_lines(scored, columns)
+    # Satır token sayıları toplanır (+1 satır sonu), bütçeye sığan en uzun önek seçilir
+    used = np.cumsum([count_tokens(line, model) + 1 for line in lines]) + count_tokens(header, model)
+    rows = int(np.searchsorted(used, max_tokens, side='right'))
+    text = '\n'.join([header] + lines[:rows])
+    # Yaklaşık toplam sapmasına karşı son kontrol
+    while rows and count_tokens(text, model) > max_tokens:
+        rows -= 1
+        text = '\n'.join([header] + lines[:rows])
+    return text, rows
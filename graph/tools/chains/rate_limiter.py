@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+# Binance REQUEST_WEIGHT limiti: IP başına dakikada 6000, sabit 1 dakikalık pencere
+WEIGHT_LIMIT = 6000
+WINDOW = 60          # saniye
+SAFETY_MARGIN = 0.95  # limitin bu oranına kadar kullan
+
+# Öncelikler: küçük sayı önce çalışır
+PRIORITY_ORDER = 0        # işlem yolundaki piyasa verisi
+PRIORITY_DEFAULT = 5
+PRIORITY_BACKGROUND = 10  # tarama / cache yenileme
+
+POLL_INTERVAL = 0.01
+
+
+def request_weight(path, params=None):
+    """Request weight of the Binance endpoints used in this repo"""
+    params = params or {}
+    if path.endswith('/klines'):
+        limit = int(params.get('limit', 500))
+        if limit <= 100:
+            return 1
+        if limit <= 500:
+            return 2
+        if limit <= 1000:
+            return 5
+        return 10
+    if path.endswith('/ticker/24hr'):
+        if 'symbol' in params:
+            return 2
+        if 'symbols' in params:
+            count = params['symbols'].count(',') + 1
+            if count <= 20:
+                return 2
+            if count <= 100:
+                return 40
+        # Tüm semboller
+        return 80
+    return 2
+
+
+class WeightScheduler:
+    """
+    Request-weight budget shared by every Binance request of the process.
+
+    The budget is a token bucket that refills to the full limit at each
+    minute boundary, matching Binance's fixed 1-minute weight window.
+    Local accounting is corrected with the server-reported
+    X-MBX-USED-WEIGHT-1M header, 429/418 responses block all requests until
+    Retry-After has passed, and waiting requests are granted strictly by
+    priority (then FIFO) so order-path data goes ahead of background scans.
+    """
+
+    def __init__(self, limit=WEIGHT_LIMIT, window=WINDOW, margin=SAFETY_MARGIN, clock=time.time):
+        self.limit = limit
+        self.window = window
+        self.budget = int(limit * margin)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.window_start = self._window_start(clock())
+        self.used = 0
+        self.banned_until = 0.0
+        self.waiters = []  # (priority, seq) heap
+        self.seq = itertools.count()
+        # İstatistikler
+        self.granted = 0
+        self.waited = 0.0
+        self.bans = 0
+
+    def _window_start(self, now):
+        return now - now % self.window
+
+    def _roll(self, now):
+        start = self._window_start(now)
+        if start != self.window_start:
+            self.window_start = start
+            self.used = 0
+
+    def _try(self, ticket, weight):
+        """Grants ticket if it is first in line and fits, otherwise returns seconds to wait"""
+        now = self.clock()
+        self._roll(now)
+        if now < self.banned_until:
+            return self.banned_until - now
+        if self.waiters[0] != ticket:
+            return POLL_INTERVAL
+        if self.used + weight > self.budget and self.used > 0:
+            return self.window_start + self.window - now
+        heapq.heappop(self.waiters)
+        self.used += weight
+        self.granted += 1
+        return 0.0
+
+    def _enqueue(self, priority):
+        ticket = (priority, next(self.seq))
+        with self.lock:
+            heapq.heappush(self.waiters, ticket)
+        return ticket
+
+    def _cancel(self, ticket):
+        with self.lock:
+            if ticket in self.waiters:
+                self.waiters.remove(ticket)
+                heapq.heapify(self.waiters)
+
+    def acquire(self, weight, priority=PRIORITY_DEFAULT):
+        """Blocks until `weight` fits into the current window"""
+        ticket = self._enqueue(priority)
+        start = time.monotonic()
+        try:
+            while True:
+                with self.lock:
+                    wait = self._try(ticket, weight)
+                if wait <= 0:
+                    break
+                time.sleep(min(wait, POLL_INTERVAL))
+        except BaseException:
+            self._cancel(ticket)
+            raise
+        self.waited += time.monotonic() - start
+
+    async def aacquire(self, weight, priority=PRIORITY_DEFAULT):
+        """acquire for coroutines, does not block the event loop"""
+        ticket = self._enqueue(priority)
+        start = time.monotonic()
+        try:
+            while True:
+                with self.lock:
+                    wait = self._try(ticket, weight)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, POLL_INTERVAL))
+        except BaseException:
+            self._cancel(ticket)
+            raise
+        self.waited += time.monotonic() - start
+
+    def observe(self, status, headers):
+        """Feeds a response back: server-side used weight and 429/418 bans"""
+        with self.lock:
+            now = self.clock()
+            self._roll(now)
+            used = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('X-MBX-USED-WEIGHT')
+            if used is not None:
+                self.used = max(self.used, int(used))
+            if status in (418, 429):
+                retry_after = headers.get('Retry-After')
+                # Retry-After yoksa pencere sonuna kadar bekle
+                until = now + float(retry_after) if retry_after else self.window_start + self.window
+                self.banned_until = max(self.banned_until, until)
+                self.bans += 1
+
+    def stats(self):
+        with self.lock:
+            self._roll(self.clock())
+            return {
+                'used_weight': self.used,
+                'budget': self.budget,
+                'waiting': len(self.waiters),
+                'granted': self.granted,
+                'waited_s': round(self.waited, 3),
+                'bans': self.bans,
+                'banned_for_s': max(0.0, round(self.banned_until - self.clock(), 3)),
+            }
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """Process-wide WeightScheduler shared by the sync and async Binance clients"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = WeightScheduler()
+    return _scheduler
@@ -1,48 +1,104 @@
-import requests
-import json
 import time
+import argparse
 from datetime import datetime
+from binance_client import get_client, BinanceAPIError
+from rate_limiter import PRIORITY_BACKGROUND
+from ticker_stream import TickerStream, TICKER_STREAMS, MINI_TICKER_STREAMS, STREAM_URL
+from ticker_table import publish, CACHE_TABLE
+from ticker_snapshot import write_snapshot, write_json, SNAPSHOT_FILE
+from ticker_history import TickerHistory, load_history, HISTORY_FILE
+from instrumentation import timed
 
-BINANCE_URL = 'https://api.binance.com/api/v3'
 CACHE_FILE = 'cache.json'
+# Dosya formatı: 'npz' (ikili, sayılar önceden ayrıştırılmış), 'npz-compressed' veya 'json'
+CACHE_FORMAT = 'npz'
+_table = None    # paylaşımlı ticker tablosu (yazıcı tarafı)
+_history = None  # son snapshot'ların halka tamponu (kısa vadeli momentum için)
 
 
+@timed('fetch_binance_data')
 def fetch_binance_data():
-    url = f"{BINANCE_URL}/ticker/24hr"
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            print(f"{datetime.now()} - Başarılı: {len(data)} adet ticker çekildi.")
-            return data
-        else:
-            print(f"{datetime.now()} - Binance API Hatası: {response.status_code}")
-            return None
+        data = get_client().get_json('/ticker/24hr', priority=PRIORITY_BACKGROUND)
+        print(f"{datetime.now()} - Başarılı: {len(data)} adet ticker çekildi.")
+        return data
+    except BinanceAPIError as e:
+        print(f"{datetime.now()} - Binance API Hatası: {e.status}")
+        return None
     except Exception as e:
         print(f"{datetime.now()} - Veri çekme hatası: {str(e)}")
         return None
 
 
+def record_history(snapshot):
+    global _history
+    if _history is None:
+        _history = load_history(HISTORY_FILE) or TickerHistory()
+    # Dosya yalnızca yeni bir slot açıldığında yazılır (en fazla dakikada bir)
+    if _history.push(snapshot):
+        _history.save(HISTORY_FILE)
+
+
+def write_cache(data, fmt=None):
+    global _table
+    fmt = fmt or CACHE_FORMAT
+    try:
+        # Okuyucular önce paylaşımlı tabloyu kullanır, dosya diğer süreçler ve yeniden başlatmalar için
+        # Dosyalar geçici dosyaya yazılıp rename edilir, okuyucu yarım dosya görmez
+        _table = publish(data, CACHE_TABLE, _table)
+        record_history(_table.read(copy=True))
+        if fmt == 'json':
+            write_json(data, CACHE_FILE)
+        else:
+            write_snapshot(data, SNAPSHOT_FILE, compress=(fmt == 'npz-compressed'))
+        print(f"{datetime.now()} - Cache güncellendi.")
+    except Exception as e:
+        print(f"{datetime.now()} - Cache yazma hatası: {str(e)}")
+
+
 def update_cache():
     data = fetch_binance_data()
     if data is not None:
-        try:
-            with open(CACHE_FILE, 'w') as f:
-                json.dump(data, f)
-            print(f"{datetime.now()} - Cache güncellendi.")
-        except Exception as e:
-            print(f"{datetime.now()} - Cache yazma hatası: {str(e)}")
+        write_cache(data)
     else:
         print(f"{datetime.now()} - Cache güncellenemedi, veri alınamadı.")
 
 
-def start_cache_scheduler(interval=180):
+def start_ticker_stream(streams=TICKER_STREAMS, url=STREAM_URL):
+    # Tabloyu REST ile bir kez doldurur, sonra websocket güncellemeleriyle canlı tutar
+    stream = TickerStream(streams, url)
+    data = fetch_binance_data()
+    if data is not None:
+        stream.seed(data)
+    return stream.start()
+
+
+def start_cache_scheduler(interval=180, mode='rest', streams=TICKER_STREAMS):
     # interval: saniye cinsinden (örneğin 180 saniye = 3 dakika)
-    print(f"Cache scheduler başlatıldı. Her {interval} saniyede bir güncellenecek.")
+    # mode='stream': ticker tablosu websocket ile anlık güncellenir, cache her interval saniyede yazılır
+    print(f"Cache scheduler başlatıldı ({mode}). Her {interval} saniyede bir güncellenecek.")
+    if mode == 'stream':
+        stream = start_ticker_stream(streams)
+        try:
+            while True:
+                time.sleep(interval)
+                write_cache(stream.snapshot())
+        finally:
+            stream.stop()
     while True:
         update_cache()
         time.sleep(interval)
 
 
 if __name__ == '__main__':
-    start_cache_scheduler() 
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=['rest', 'stream'], default='rest')
+    parser.add_argument('--interval', type=float, default=None,
+                        help='cache yazma aralığı (saniye), varsayılan rest: 180, stream: 5')
+    parser.add_argument('--mini', action='store_true', help='!miniTicker@arr akışını kullan')
+    parser.add_argument('--format', choices=['npz', 'npz-compressed', 'json'], default=CACHE_FORMAT)
+    args = parser.parse_args()
+    CACHE_FORMAT = args.format
+    interval = args.interval or (5 if args.mode == 'stream' else 180)
+    streams = MINI_TICKER_STREAMS if args.mini else TICKER_STREAMS
+    start_cache_scheduler(interval, args.mode, streams)
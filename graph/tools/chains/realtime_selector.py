@@ -1,89 +1,86 @@
-import json
-import pandas as pd
+import os
+from ticker_table import read_table, CACHE_TABLE
+from ticker_snapshot import read_cache_file, read_snapshot, SNAPSHOT_FILE
+from ticker_history import load_history
+from scoring import TickerArrays, get_profile, score
 
 CACHE_FILE = 'cache.json'
 
-# Cache dosyasını yükler
+# Cache'i yükler: önce paylaşımlı ticker tablosu, sonra ikili snapshot (cache.npz), en son cache.json
+# Dosya formatı içeriğinden tespit edilir
 def load_cache():
     try:
-        with open(CACHE_FILE, 'r') as f:
-            data = json.load(f)
-        return data
+        snapshot = read_table(CACHE_TABLE)
+        if snapshot is not None:
+            return snapshot.to_records()
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Ticker tablosu okunamadı, cache dosyası kullanılıyor: {str(e)}")
+    try:
+        path = SNAPSHOT_FILE if os.path.exists(SNAPSHOT_FILE) else CACHE_FILE
+        return read_cache_file(path)
     except Exception as e:
         print(f"Cache yüklenirken hata: {str(e)}")
         return None
 
-# Potansiyel coinleri seçer, ek olarak hacim ve işlem sayısı skorlarıyla trade açma potansiyellerini de değerlendirir
-def select_potential_coins():
+# Cache'i NumPy sütunları olarak yükler (tablo için sıfır kopyalı görünüm)
+def load_cache_snapshot():
+    try:
+        snapshot = read_table(CACHE_TABLE)
+        if snapshot is not None:
+            return snapshot
+    except FileNotFoundError:
+        pass
+    if os.path.exists(SNAPSHOT_FILE):
+        return read_snapshot(SNAPSHOT_FILE)
+    return None
+
+# Cache'i skorlamaya hazır tipli dizilere çevirir (USDT çiftleri), string parse yalnızca json cache için
+def load_ticker_arrays():
+    try:
+        snapshot = load_cache_snapshot()
+    except Exception as e:
+        print(f"Ticker snapshot okunamadı, cache dosyası kullanılıyor: {str(e)}")
+        snapshot = None
+    if snapshot is not None:
+        arrays = TickerArrays.from_snapshot(snapshot)
+        # Okuma sırasında yazıcı bu slota geri döndüyse tablodan kopya al
+        if snapshot.is_current():
+            return arrays
+        return TickerArrays.from_snapshot(snapshot.table.read(copy=True))
     data = load_cache()
     if data is None:
+        return None
+    return TickerArrays.from_records(data)
+
+# Potansiyel coinleri seçer, ek olarak hacim ve işlem sayısı skorlarıyla trade açma potansiyellerini de değerlendirir
+# Filtreler ve ağırlıklar scoring.SELECTOR_PROFILE'da (sweep.py ile ayarlanmış profil varsa o kullanılır):
+# - Yüksek hacim ve işlem sayısı, en az %5 en fazla %100 fiyat değişimi, büyük ve stabil coinler hariç
+# - Momentum %50, volatilite %30, hacim %10, işlem sayısı %10
+# - Geçmiş varsa ek olarak: son 1 saat momentumu %30, hacim ivmesi %10
+def select_potential_coins(profile=None):
+    profile = profile or get_profile('selector')
+    arrays = load_ticker_arrays()
+    if arrays is None:
         print("Cache verisi alınamadı.")
         return
     
-    # Sadece USDT çiftlerini al
-    df = pd.DataFrame([d for d in data if d.get('symbol', '').endswith('USDT')])
+    top_coins = score(arrays, profile, history=load_history(), top_k=profile.top_k)
     
-    # Sayısal kolonları dönüştür
-    numeric_columns = ['volume', 'quoteVolume', 'priceChangePercent', 'lastPrice', 
-                       'highPrice', 'lowPrice', 'count', 'priceChange']
-    for col in numeric_columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Coin sembolünü oluştur
-    df['coin'] = df['symbol'].str.replace('USDT', '')
-    
-    # Potansiyel coinler için filtreleme
-    # - Yüksek hacim ve işlem sayısı
-    # - En az %5 fiyat değişimi ve en fazla %100
-    # - Büyük ve stabil coinler hariç
-    mask = (
-        (df['volume'] > 1000000) &
-        (df['count'] > 10000) &
-        (df['lastPrice'] > 0.00001) &
-        (abs(df['priceChangePercent']) > 5) &
-        (abs(df['priceChangePercent']) < 100) &
-        (~df['coin'].isin(['BTC', 'ETH', 'BNB', 'USDT', 'USDC', 'BUSD',
-                           'XRP', 'ADA', 'DOGE', 'DOT', 'MATIC', 'SOL', 'AVAX',
-                           'SHIB', 'TRX', 'LINK', 'UNI', 'LTC']))
-    )
-    df_filtered = df.loc[mask].copy()
-    
-    if df_filtered.empty:
+    if len(top_coins) == 0:
         print("Uygun potansiyel coin bulunamadı.")
         return
     
-    # Anlık momentum: fiyat değişikliğinin mutlak değeri
-    df_filtered['momentum'] = abs(df_filtered['priceChangePercent'])
-    
-    # Volatilite: (yüksek - düşük) / düşük * 100
-    df_filtered['volatility'] = ((df_filtered['highPrice'] - df_filtered['lowPrice']) / df_filtered['lowPrice'] * 100)
-    
-    # Ek özellikler: Hacim ve İşlem Sayısı Skorları
-    # Hacim skoru: Coin'in hacmini milyon USD'lik birimlere bölüp, maksimum 5 puanla sınırlandırıyoruz
-    df_filtered['volume_score'] = df_filtered['volume'].apply(lambda x: min(5, x / 1e6))
-    # İşlem sayısı skoru: İşlem sayısını 10K'lık birimlere bölüp, maksimum 5 puanla sınırlıyoruz
-    df_filtered['trade_score'] = df_filtered['count'].apply(lambda x: min(5, x / 10000))
-    
-    # Toplam potansiyel skoru: momentum, volatilite, hacim ve işlem sayısı skorlarının ağırlıklı ortalaması
-    # Ağırlıklar: momentum %50, volatilite %30, hacim %10, işlem sayısı %10
-    df_filtered['total_score'] = (df_filtered['momentum'] * 0.5 +
-                                  df_filtered['volatility'] * 0.3 +
-                                  df_filtered['volume_score'] * 0.1 +
-                                  df_filtered['trade_score'] * 0.1)
-    
-    # Skora göre sırala
-    df_filtered = df_filtered.sort_values('total_score', ascending=False)
-    
-    # En iyi 3 coin
-    top_coins = df_filtered.head(3)
-    
+    c = top_coins.arrays.columns
+    s = top_coins.components
     print("Potansiyeli yüksek coinler:\n")
-    for _, row in top_coins.iterrows():
-        print(f"Coin: {row['coin']} - Fiyat: ${row['lastPrice']:.6f} - Değişim: %{row['priceChangePercent']:.2f} - "
-              f"Volatilite: %{row['volatility']:.2f} - Volume Score: {row['volume_score']:.2f} - "
-              f"Trade Score: {row['trade_score']:.2f} - Toplam Skor: {row['total_score']:.2f}")
+    for i, coin in enumerate(top_coins.coins):
+        print(f"Coin: {coin} - Fiyat: ${c['lastPrice'][i]:.6f} - Değişim: %{c['priceChangePercent'][i]:.2f} - "
+              f"Volatilite: %{s['volatility'][i]:.2f} - Volume Score: {s['volume_score'][i]:.2f} - "
+              f"Trade Score: {s['trade_score'][i]:.2f} - Toplam Skor: {s['total_score'][i]:.2f}")
     
-    return top_coins['coin'].tolist()
+    return top_coins.coins
 
 
 if __name__ == "__main__":
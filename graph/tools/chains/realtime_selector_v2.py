@@ -1,96 +1,39 @@
-import json
-import pandas as pd
-import requests
-import pandas as pd
-from datetime import datetime
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
-import os
+from llm_models import get_chat_model
+from llm_cache import cached_invoke
+from realtime_selector import load_ticker_arrays
+from scoring import get_profile, score
+from prompt_serializer import market_table, SELECTOR_PROMPT_COLUMNS, PROMPT_TOKEN_BUDGET
 
-load_dotenv()
-CACHE_FILE = 'cache.json'
 selected_coins = []  # Global değişken
 
-# Cache dosyasını yükler
-def load_cache():
-    try:
-        with open(CACHE_FILE, 'r') as f:
-            data = json.load(f)
-        return data
-    except Exception as e:
-        print(f"Cache yüklenirken hata: {str(e)}")
-        return None
-
 # Potansiyel coinleri seçer, ek olarak hacim ve işlem sayısı skorlarıyla trade açma potansiyellerini de değerlendirir
-def select_potential_coins():
+def select_potential_coins(max_tokens=PROMPT_TOKEN_BUDGET):
     global selected_coins
-    data = load_cache()
-    if data is None:
+    arrays = load_ticker_arrays()
+    if arrays is None:
         print("Cache verisi alınamadı.")
         return
     
-    # Sadece USDT çiftlerini al
-    df = pd.DataFrame([d for d in data if d.get('symbol', '').endswith('USDT')])
-    
-    # Sayısal kolonları dönüştür
-    numeric_columns = ['volume', 'quoteVolume', 'priceChangePercent', 'lastPrice', 
-                       'highPrice', 'lowPrice', 'count', 'priceChange']
-    for col in numeric_columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Coin sembolünü oluştur
-    df['coin'] = df['symbol'].str.replace('USDT', '')
+    # Filtreler ve ağırlıklar scoring.SELECTOR_V2_PROFILE'da (momentum %50, volatilite %30, hacim %10, işlem sayısı %10),
+    # sweep.py ile ayarlanmış profil varsa o kullanılır
+    # LLM filtrelenmiş coinleri skora göre sıralı, token bütçesine sığan kadarını görür
+    scored = score(arrays, get_profile('selector_v2'))
     
-    # Potansiyel coinler için filtreleme
-    # - Yüksek hacim ve işlem sayısı
-    # - En az %5 fiyat değişimi ve en fazla %100
-    # - Büyük ve stabil coinler hariç
-    mask = (
-        (df['volume'] > 1000000) &
-        (df['count'] > 10000) &
-        (df['lastPrice'] > 0.00001) &
-        (abs(df['priceChangePercent']) > 5) &
-        (abs(df['priceChangePercent']) < 100) &
-        (~df['coin'].isin(['BTC', 'ETH', 'BNB', 'USDT', 'USDC', 'BUSD',
-                           'XRP', 'ADA', 'DOGE', 'DOT', 'MATIC', 'SOL', 'AVAX',
-                           'SHIB', 'TRX', 'LINK', 'UNI', 'LTC']))
-    )
-    df_filtered = df.loc[mask].copy()
-    
-    if df_filtered.empty:
+    if len(scored) == 0:
         print("Uygun potansiyel coin bulunamadı.")
         return
     
-    # Anlık momentum: fiyat değişikliğinin mutlak değeri
-    df_filtered['momentum'] = abs(df_filtered['priceChangePercent'])
-    
-    # Volatilite: (yüksek - düşük) / düşük * 100
-    df_filtered['volatility'] = ((df_filtered['highPrice'] - df_filtered['lowPrice']) / df_filtered['lowPrice'] * 100)
-    
-    # Ek özellikler: Hacim ve İşlem Sayısı Skorları
-    # Hacim skoru: Coin'in hacmini milyon USD'lik birimlere bölüp, maksimum 5 puanla sınırlandırıyoruz
-    df_filtered['volume_score'] = df_filtered['volume'].apply(lambda x: min(5, x / 1e6))
-    # İşlem sayısı skoru: İşlem sayısını 10K'lık birimlere bölüp, maksimum 5 puanla sınırlıyoruz
-    df_filtered['trade_score'] = df_filtered['count'].apply(lambda x: min(5, x / 10000))
-    
-    # Toplam potansiyel skoru: momentum, volatilite, hacim ve işlem sayısı skorlarının ağırlıklı ortalaması
-    # Ağırlıklar: momentum %50, volatilite %30, hacim %10, işlem sayısı %10
-    df_filtered['total_score'] = (df_filtered['momentum'] * 0.5 +
-                                  df_filtered['volatility'] * 0.3 +
-                                  df_filtered['volume_score'] * 0.1 +
-                                  df_filtered['trade_score'] * 0.1)
-    
-    # Skora göre sırala
-    df_filtered = df_filtered.sort_values('total_score', ascending=False)
-    
     # En iyi 3 coin
-    top_coins = df_filtered.head(3)
-    coins = df_filtered
+    top_coins = scored.head(3)
+    # Skorlamayla ilgili sütunlar, yuvarlanmış sayılarla kompakt TSV tablo olarak
+    coin_data, _ = market_table(scored, SELECTOR_PROMPT_COLUMNS, max_tokens)
+
 
+    # langchain yalnızca LLM çağrısına gelindiğinde yüklenir
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.pydantic_v1 import BaseModel, Field
 
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    llm = get_chat_model("gpt-4o-mini", temperature=0)
     class CryptoOutput(BaseModel):
         chosen_coins: list[str] = Field(description="Scalping için seçilen en uygun 3 coinin sembolü. Çıktı: [BTC, ETH, XRP] gibi sonundaki usdt'yi kaldırın")
     structured_llm = llm.with_structured_output(CryptoOutput)
@@ -103,15 +46,16 @@ def select_potential_coins():
         Tek bir şart var o da seçtiğin coin iş arkadaşına gönderilecek ve o da anlık haber ve teknik analiz yapıp işleme girecek, coini maximum 6 saat içinde işlemden çıkacak şekilde seç.
         
         """),
-        ("user", f"{coins}")
+        ("user", "{coin_data}")
     ])
 
     chain = prompt | structured_llm
 
     
-    result = chain.invoke({
-        "coin_data": coins
-    })
+    # Aday coinler ve metrikleri (yuvarlanmış) değişmediyse TTL içinde önceki cevap kullanılır
+    result = cached_invoke(chain, {
+        "coin_data": coin_data
+    }, "select_potential_coins:gpt-4o-mini", schema=CryptoOutput)
     selected_coins = result.chosen_coins
     #print("LLM Seçilen Coinler:", selected_coins)
     
@@ -121,7 +65,7 @@ def select_potential_coins():
               #f"Volatilite: %{row['volatility']:.2f} - Volume Score: {row['volume_score']:.2f} - "
               #f"Trade Score: {row['trade_score']:.2f} - Toplam Skor: {row['total_score']:.2f}")
     
-    return top_coins['coin'].tolist(), selected_coins
+    return top_coins.coins, selected_coins
 
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+import os
+import time
+import numpy as np
+from kline_store import empty_klines
+
+BASE_INTERVAL = '1m'
+# Tek 1m akışından türetilen aralıklar (dakika); Binance mumları UTC epoch'a hizalı açar
+RESAMPLE_MINUTES = {'1m': 1, '3m': 3, '5m': 5, '15m': 15, '30m': 30, '1h': 60, '2h': 120, '4h': 240}
+# Bundan fazla 1m mum gerektiren istekler (ör. 4h x 200) doğrudan kendi aralığından çekilir
+RESAMPLE_MAX_BARS = int(os.getenv('RESAMPLE_MAX_BARS', 30000))
+# Aynı sembolün 1m serisi bu süre (saniye) içinde tekrar çekilmez, aralıklar aynı seriden türetilir
+RESAMPLE_TTL = float(os.getenv('RESAMPLE_TTL', 5))
+MINUTE_MS = 60000
+
+
+def _take(columns, index):
+    return {name: values[index] for name, values in columns.items()}
+
+
+def _concat(first, second):
+    return {name: np.concatenate([first[name], second[name]]) for name in first}
+
+
+def resample(columns, minutes):
+    """
+    1m kline columns -> `minutes` bars, vectorized with ufunc.reduceat over
+    the bucket boundaries (open of the first 1m bar, max high, min low, close
+    of the last, summed volumes and trade counts). Buckets are aligned to
+    the epoch like Binance's; the first and last one may be partial.
+    """
+    ts = columns['timestamp']
+    if not len(ts):
+        return empty_klines()
+    ms = minutes * MINUTE_MS
+    bucket = ts // ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    opens = bucket[starts] * ms
+    return {
+        'timestamp': opens,
+        'open': columns['open'][starts],
+        'high': np.maximum.reduceat(columns['high'], starts),
+        'low': np.minimum.reduceat(columns['low'], starts),
+        'close': columns['close'][ends],
+        'volume': np.add.reduceat(columns['volume'], starts),
+        'close_time': opens + ms - 1,
+        'quote_volume': np.add.reduceat(columns['quote_volume'], starts),
+        'trades_count': np.add.reduceat(columns['trades_count'], starts),
+        'taker_buy_volume': np.add.reduceat(columns['taker_buy_volume'], starts),
+        'taker_buy_quote_volume': np.add.reduceat(columns['taker_buy_quote_volume'], starts),
+    }
+
+
+class Resampler:
+    """
+    Higher-interval klines derived from one 1m series per symbol.
+
+    The latest 1m columns of every symbol are kept for `ttl` seconds so all
+    intervals requested in that window come from one download. Closed
+    derived bars are kept per (symbol, interval); each call aggregates only
+    the 1m bars from the first bucket that was not closed yet, and the
+    still-open bucket is rebuilt from them every time.
+    """
+
+    def __init__(self, history=1000, ttl=RESAMPLE_TTL, max_bars=RESAMPLE_MAX_BARS):
+        self.history = history
+        self.ttl = ttl
+        self.max_bars = max_bars
+        self.base = {}     # symbol -> (yüklenme zamanı, 1m sütunları)
+        self.limits = {}   # symbol -> istenen en uzun 1m geçmişi
+        self.closed = {}   # (symbol, interval) -> kapanmış mumlar
+
+    @staticmethod
+    def base_limit(interval, limit):
+        # Baştaki yarım kova atıldığı için bir kova fazlası
+        return (limit + 1) * RESAMPLE_MINUTES[interval]
+
+    def supports(self, interval, limit):
+        return interval in RESAMPLE_MINUTES and self.base_limit(interval, limit) <= self.max_bars
+
+    def fetch_limit(self, symbol, interval, limit):
+        """1m bars to load for a request: the longest window any interval of the symbol asked for"""
+        needed = max(self.base_limit(interval, limit), self.limits.get(symbol, 0))
+        self.limits[symbol] = needed
+        return needed
+
+    def cached_base(self, symbol, limit):
+        """
+        1m columns loaded within ttl that cover `limit` bars, else None; also None
+        once the 1m candle that was open at load time has closed, so a derived
+        bar is never finalized from a partial 1m candle
+        """
+        entry = self.base.get(symbol)
+        if entry is None or time.time() - entry[0] > self.ttl or len(entry[1]['timestamp']) < limit:
+            return None
+        close_times = entry[1]['close_time']
+        if len(close_times) and entry[0] * 1000 <= close_times[-1] < time.time() * 1000:
+            return None
+        return entry[1]
+
+    def set_base(self, symbol, columns, at=None):
+        self.base[symbol] = (time.time() if at is None else at, columns)
+
+    def bars(self, symbol, interval, limit, base, now_ms=None):
+        """
+        Last `limit` interval bars from 1m base columns (oldest first, the
+        last row may be the open 1m candle); the last bar is the open bucket
+        while it has not closed
+
+        now_ms: time the base was loaded, defaults to the set_base time of
+        this base (or now); buckets closing after it are never finalized
+        """
+        minutes = RESAMPLE_MINUTES[interval]
+        if minutes == 1:
+            return _take(base, slice(-limit, None))
+        ms = minutes * MINUTE_MS
+        if now_ms is None:
+            entry = self.base.get(symbol)
+            now_ms = int((entry[0] if entry is not None and entry[1] is base else time.time()) * 1000)
+        ts = base['timestamp']
+        if not len(ts):
+            return empty_klines()
+
+        key = (symbol, interval)
+        closed = self.closed.get(key)
+        reseed = (closed is None or not len(closed['timestamp'])
+                  # 1m serisi kaldığımız kovaya yetişmiyor (uzun ara) ya da daha uzun geçmiş isteniyor
+                  or ts[0] > closed['timestamp'][-1] + ms
+                  or (len(closed['timestamp']) < limit - 1 and ts[0] < closed['timestamp'][0]))
+        if reseed:
+            closed = empty_klines()
+            first = ts[0] + (-ts[0]) % ms   # yarım ilk kova atılır
+        else:
+            first = closed['timestamp'][-1] + ms
+        fresh = resample(_take(base, slice(np.searchsorted(ts, first), None)), minutes)
+
+        # Kova yüklenme anında kapanmıştı ve 1m serisi sonuna kadar geldi: bir daha değişmez
+        done = (fresh['close_time'] < now_ms) & (fresh['close_time'] <= base['close_time'][-1])
+        closed = _take(_concat(closed, _take(fresh, done)), slice(-max(self.history, limit), None))
+        self.closed[key] = closed
+        return _take(_concat(closed, _take(fresh, ~done)), slice(-limit, None))
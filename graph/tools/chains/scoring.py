@@ -0,0 +1,319 @@
+import json
+import os
+from dataclasses import dataclass, replace, asdict, fields
+import numpy as np
+from instrumentation import span
+
+NUMERIC_FIELDS = ['volume', 'quoteVolume', 'priceChangePercent', 'lastPrice',
+                  'highPrice', 'lowPrice', 'count', 'priceChange']
+# Büyük ve stabil coinler seçimden çıkarılır
+EXCLUDED_COINS = ('BTC', 'ETH', 'BNB', 'USDT', 'USDC', 'BUSD', 'XRP', 'ADA', 'DOGE', 'DOT',
+                  'MATIC', 'SOL', 'AVAX', 'SHIB', 'TRX', 'LINK', 'UNI', 'LTC')
+
+
+@dataclass(frozen=True)
+class ScoringProfile:
+    """
+    Filter thresholds and score weights of one selector.
+
+    total = momentum * w_momentum + volatility_term * w_volatility
+            + volume_score * w_volume + trade_score * w_trade
+            + |change_1h| * w_short_term + clip(volume_accel_1h - 1, 0, 5) * w_volume_accel
+
+    volatility_term is the raw (high-low)/low % or, with volatility_rank, its
+    percentile rank among the filtered coins times the volatility_bonus tier.
+    """
+    name: str
+    # Filtreler
+    min_volume: float = 1e6
+    min_count: float = 1e4
+    min_price: float = 1e-5
+    min_abs_change: float = 5.0
+    max_abs_change: float = float('inf')
+    excluded: tuple = EXCLUDED_COINS
+    # Momentum: 'change_percent' -> |priceChangePercent|, 'price_change' -> |priceChange / lastPrice| %
+    momentum_source: str = 'change_percent'
+    volatility_rank: bool = False
+    volatility_bonus: tuple = ()    # ((eşik, çarpan), ...) büyükten küçüğe, hiçbiri tutmazsa 1.0
+    volume_divisor: float = 1e6
+    volume_clip: tuple = (-np.inf, 5.0)
+    trade_divisor: float = 1e4
+    trade_clip: tuple = (-np.inf, 5.0)
+    trend_tiers: tuple = ((3, 2.0), (2, 1.5), (1, 1.0))
+    trend_default: float = 0.5
+    # Ağırlıklar
+    w_momentum: float = 0.5
+    w_volatility: float = 0.3
+    w_volume: float = 0.1
+    w_trade: float = 0.1
+    w_short_term: float = 0.0
+    w_volume_accel: float = 0.0
+    top_k: int = 3
+
+    def with_params(self, **params):
+        return replace(self, **params)
+
+
+# realtime_selector.select_potential_coins (kısa vadeli geçmiş skorlarıyla)
+SELECTOR_PROFILE = ScoringProfile(name='selector', max_abs_change=100.0,
+                                  w_short_term=0.3, w_volume_accel=0.1)
+# realtime_selector_v2.select_potential_coins
+SELECTOR_V2_PROFILE = ScoringProfile(name='selector_v2', max_abs_change=100.0)
+# CryptoChooser.get_tradeable_coins (scalping)
+CHOOSER_PROFILE = ScoringProfile(
+    name='chooser', min_abs_change=2.0, momentum_source='price_change',
+    volatility_rank=True, volatility_bonus=((5, 3.0), (3, 2.0), (2, 1.5)),
+    volume_divisor=5e6, volume_clip=(0.5, 3.0), trade_divisor=2e4, trade_clip=(0.5, 2.0),
+    w_momentum=0.35, w_volatility=0.25, w_volume=0.25, w_trade=0.15,
+    w_short_term=0.2, w_volume_accel=0.1, top_k=10)
+
+PROFILES = {p.name: p for p in (SELECTOR_PROFILE, SELECTOR_V2_PROFILE, CHOOSER_PROFILE)}
+# Parametre taramasında (sweep.py) bulunan profiller; varsa yerleşik profillerin yerine kullanılır
+PROFILE_FILE = os.getenv('SCORING_PROFILE_FILE', 'scoring_profiles.json')
+
+_loaded = {}   # path -> (mtime, {isim: ScoringProfile})
+
+
+def _as_tuple(value):
+    return tuple(_as_tuple(v) for v in value) if isinstance(value, list) else value
+
+
+def profile_params(profile):
+    """ScoringProfile -> JSON-ready dict of the fields that differ from the built-in profile of the same name"""
+    base = PROFILES.get(profile.name, ScoringProfile(name=profile.name))
+    params = asdict(profile)
+    return {k: v for k, v in params.items() if k != 'name' and v != getattr(base, k)}
+
+
+def load_profiles(path=PROFILE_FILE):
+    """
+    Tuned profiles from a JSON file ({name: {field: value}}, fields missing
+    from an entry keep the built-in profile's value), {} when there is no
+    file. Re-read only when the file changes, so a running selector picks
+    up a newly saved profile on its next call.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    cached = _loaded.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        names = {f.name for f in fields(ScoringProfile)}
+        profiles = {}
+        for name, params in data.items():
+            base = PROFILES.get(name, ScoringProfile(name=name))
+            params = {k: _as_tuple(v) for k, v in params.items() if k in names and k != 'name'}
+            profiles[name] = base.with_params(**params)
+    except Exception as e:
+        print(f"Profil dosyası okunamadı ({path}): {e}")
+        profiles = {}
+    _loaded[path] = (mtime, profiles)
+    return profiles
+
+
+def get_profile(name, path=PROFILE_FILE):
+    """Tuned profile saved for name, else the built-in one"""
+    return load_profiles(path).get(name) or PROFILES[name]
+
+
+def save_profile(profile, path=PROFILE_FILE):
+    """Writes profile into the profile file under its name (other entries are kept)"""
+    from ticker_snapshot import atomic_write
+    data = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+    data[profile.name] = profile_params(profile)
+    atomic_write(path, lambda f: f.write(json.dumps(data, indent=2).encode()))
+
+
+def _to_float(values):
+    # pd.to_numeric(errors='coerce') gibi: sayıya çevrilemeyen değerler NaN olur
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.empty(len(values))
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+class TickerArrays:
+    """Quote-asset ticker rows parsed once into typed arrays (symbols, coins, numeric columns)"""
+
+    def __init__(self, symbols, coins, columns):
+        self.symbols = symbols
+        self.coins = coins
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def take(self, index):
+        return TickerArrays(self.symbols[index], self.coins[index],
+                            {name: values[index] for name, values in self.columns.items()})
+
+    @classmethod
+    def from_records(cls, records, quote='USDT'):
+        """From a /ticker/24hr list (load_cache / fetch_binance_data)"""
+        rows = [r for r in records if r.get('symbol', '').endswith(quote)]
+        symbols = np.array([r['symbol'] for r in rows], dtype=str)
+        columns = {name: _to_float([r.get(name) for r in rows]) for name in NUMERIC_FIELDS}
+        return cls(symbols, np.char.replace(symbols, quote, ''), columns)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, quote='USDT'):
+        """From a TickerSnapshot (shared ticker table or binary snapshot), no string parsing"""
+        symbols = np.char.decode(snapshot.symbols) if snapshot.symbols.dtype.kind == 'S' else snapshot.symbols
+        mask = np.char.endswith(symbols, quote)
+        symbols = symbols[mask]
+        columns = {name: snapshot.column(name)[mask] for name in NUMERIC_FIELDS}
+        return cls(symbols, np.char.replace(symbols, quote, ''), columns)
+
+
+def rank_pct(values):
+    """pandas Series.rank(pct=True): average rank of ties, NaN stays NaN"""
+    out = np.full(len(values), np.nan)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return out
+    unique, inverse, counts = np.unique(values[valid], return_inverse=True, return_counts=True)
+    starts = np.cumsum(counts) - counts
+    ranks = starts + (counts + 1) / 2
+    out[valid] = ranks[inverse] / valid.sum()
+    return out
+
+
+def tiers(values, thresholds, default):
+    """np.select over ((threshold, value), ...) checked in order with '>'"""
+    if not thresholds:
+        return np.full(len(values), default)
+    return np.select([values > t for t, _ in thresholds], [v for _, v in thresholds], default)
+
+
+class ScoredTickers:
+    """Filtered tickers sorted by total score, with every score component as an array"""
+
+    def __init__(self, arrays, components):
+        self.arrays = arrays
+        self.components = components
+
+    def __len__(self):
+        return len(self.arrays)
+
+    @property
+    def coins(self):
+        return self.arrays.coins.tolist()
+
+    @property
+    def total(self):
+        return self.components['total_score']
+
+    def head(self, k):
+        index = slice(0, k)
+        return ScoredTickers(self.arrays.take(index), {n: v[index] for n, v in self.components.items()})
+
+    def to_frame(self):
+        import pandas as pd
+        data = {'symbol': self.arrays.symbols, 'coin': self.arrays.coins}
+        data.update(self.arrays.columns)
+        data.update(self.components)
+        return pd.DataFrame(data)
+
+
+def filter_mask(arrays, profile):
+    c = arrays.columns
+    change = np.abs(c['priceChangePercent'])
+    with np.errstate(invalid='ignore'):
+        return ((c['volume'] > profile.min_volume) &
+                (c['count'] > profile.min_count) &
+                (c['lastPrice'] > profile.min_price) &
+                (change > profile.min_abs_change) &
+                (change < profile.max_abs_change) &
+                ~np.isin(arrays.coins, profile.excluded))
+
+
+def score(arrays, profile, history=None, top_k=None):
+    """
+    Filters and scores tickers with profile, fully vectorized
+
+    Parameters:
+    - arrays: TickerArrays
+    - profile: ScoringProfile
+    - history: TickerHistory for the 1h change / volume acceleration terms (optional)
+    - top_k: int, keep only the best k (argpartition), None sorts every filtered coin
+
+    Returns:
+    - ScoredTickers sorted by total_score, best first
+    """
+    with span('score', profile=profile.name):
+        return _score(arrays, profile, history, top_k)
+
+
+def _score(arrays, profile, history, top_k):
+    selected = arrays.take(np.flatnonzero(filter_mask(arrays, profile)))
+    c = selected.columns
+    n = len(selected)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if profile.momentum_source == 'price_change':
+            momentum = np.abs(c['priceChange'] / c['lastPrice'] * 100)
+        else:
+            momentum = np.abs(c['priceChangePercent'])
+        volatility = (c['highPrice'] - c['lowPrice']) / c['lowPrice'] * 100
+
+    bonus = tiers(volatility, profile.volatility_bonus, 1.0)
+    if profile.volatility_rank:
+        volatility_term = rank_pct(volatility) * bonus
+    else:
+        volatility_term = volatility
+    volume_score = np.clip(c['volume'] / profile.volume_divisor, *profile.volume_clip)
+    trade_score = np.clip(c['count'] / profile.trade_divisor, *profile.trade_clip)
+
+    features = history.features(selected.symbols.tolist()) if history is not None and n else {}
+    change_1h = features.get('change_1h', np.full(n, np.nan))
+    volume_accel_1h = features.get('volume_accel_1h', np.full(n, np.nan))
+    short_term_change = np.where(np.isnan(change_1h), c['priceChangePercent'], change_1h)
+    short_term_score = np.nan_to_num(np.abs(change_1h))
+    volume_accel_score = np.nan_to_num(np.clip(volume_accel_1h - 1, 0, 5))
+    trend_score = tiers(np.abs(short_term_change), profile.trend_tiers, profile.trend_default)
+
+    total = (momentum * profile.w_momentum +
+             volatility_term * profile.w_volatility +
+             volume_score * profile.w_volume +
+             trade_score * profile.w_trade +
+             short_term_score * profile.w_short_term +
+             volume_accel_score * profile.w_volume_accel)
+
+    # En iyi k: argpartition O(n), yalnızca k eleman sıralanır
+    ranked = np.where(np.isnan(total), -np.inf, total)
+    if top_k is not None and top_k < n:
+        best = np.argpartition(-ranked, top_k - 1)[:top_k]
+        order = best[np.argsort(-ranked[best], kind='stable')]
+    else:
+        order = np.argsort(-ranked, kind='stable')
+
+    components = {
+        'momentum': momentum,
+        'volatility': volatility,
+        'volatility_bonus': bonus,
+        'volume_score': volume_score,
+        'trade_score': trade_score,
+        'change_1h': change_1h,
+        'volume_accel_1h': volume_accel_1h,
+        'short_term_change': short_term_change,
+        'short_term_score': short_term_score,
+        'volume_accel_score': volume_accel_score,
+        'trend_score': trend_score,
+        'total_score': total,
+    }
+    if profile.volatility_rank:
+        components['volatility_score'] = rank_pct(volatility)
+    return ScoredTickers(selected.take(order), {name: values[order] for name, values in components.items()})
@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from binance_client import get_client, AsyncBinanceClient, TIMEOUT
+from rate_limiter import PRIORITY_ORDER
+import instrumentation
+from pipeline import select_coins, build_pipeline, SELECTORS, INTERVALS
+
+SERVICE_HOST = os.getenv('SERVICE_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.getenv('SERVICE_PORT', 8765))
+MAX_LIMIT = 1000   # /get_data için en fazla mum (Binance /klines sınırı)
+
+
+class ServiceError(Exception):
+    """Bad request parameters, answered with HTTP 400"""
+
+
+def frame_json(df, tail=None):
+    """DataFrame -> {'columns', 'rows'}; timestamps as epoch ms, NaN as null"""
+    if df is None:
+        return None
+    if tail:
+        df = df.tail(tail)
+    columns = list(df.columns)
+    data = []
+    for name in columns:
+        values = df[name]
+        if name == 'timestamp':
+            values = values.to_numpy().astype('datetime64[ms]').astype('int64')
+        data.append(values.tolist())
+    rows = [[None if isinstance(v, float) and math.isnan(v) else v for v in row] for row in zip(*data)]
+    return {'columns': columns, 'rows': rows}
+
+
+class TradeService:
+    """
+    Resident state for the HTTP API.
+
+    One asyncio loop thread owns everything that talks to Binance/NewsAPI:
+    the keep-alive AsyncBinanceClient and aiohttp session, the
+    CryptoAnalyzer (kline store and indicator engines) and the NewsAnalyzer
+    (news store, market data index). Handler threads hand work to it with
+    run(), so indicator state is only touched from that thread. Chat models
+    come from get_chat_model, which keeps one client per model; ticker
+    data is read from the shared table the cache process (or --refresh)
+    keeps up to date.
+    """
+
+    def __init__(self, base_url=None, sentiment=True):
+        from crypto_analyzer import CryptoAnalyzer
+        self.base_url = base_url or get_client().base_url
+        self.analyzer = CryptoAnalyzer()
+        self.news = None
+        if sentiment:
+            from news_analyzer import NewsAnalyzer
+            self.news = NewsAnalyzer()
+        self.started_at = time.time()
+        self.requests = {}
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run_loop, name='trade-service-loop', daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._open())
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _open(self):
+        import aiohttp
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=TIMEOUT))
+        self.client = AsyncBinanceClient(base_url=self.base_url, priority=PRIORITY_ORDER)
+        await self.client.__aenter__()
+
+    async def _close(self):
+        await self.client.close()
+        await self.session.close()
+
+    def run(self, coro, timeout=None):
+        """Runs coro on the service loop and waits for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def close(self):
+        self.run(self._close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    def select(self, selector='scores', max_coins=None):
+        if selector not in SELECTORS:
+            raise ServiceError(f"selector şunlardan biri olmalı: {', '.join(SELECTORS)}")
+        return {'selector': selector, 'coins': select_coins(selector, max_coins)}
+
+    def get_data(self, symbol, interval='1h', limit=100, tail=None, extended=False):
+        if not 0 < limit <= MAX_LIMIT:
+            raise ServiceError(f"limit 1-{MAX_LIMIT} arası olmalı")
+        # Coin (BTC) ya da çift (BTCUSDT) kabul edilir; aget_data USDT'yi kendisi ekler
+        coin = symbol.upper().removesuffix('USDT')
+        df = self.run(self.analyzer.aget_data(self.client, coin, interval, limit, extended))
+        if df is None:
+            raise ServiceError(f"{coin} {interval} için veri alınamadı")
+        return {'symbol': coin, 'interval': interval, 'data': frame_json(df, tail)}
+
+    def analyze(self, coins, intervals=INTERVALS, limit=100, sentiment=True):
+        """Klines + indicators and news/market sentiment for coins through the pipeline stages"""
+        if not coins:
+            raise ServiceError("coins boş olamaz")
+        coins = [c.upper().removesuffix('USDT') for c in coins]
+        sentiment = sentiment and self.news is not None
+
+        async def run():
+            pipeline = build_pipeline(self.client, self.session, intervals, limit, sentiment,
+                                      analyzer=self.analyzer, news=self.news)
+
+            async def source():
+                for coin in coins:
+                    yield coin
+
+            results = await pipeline.run(source())
+            return results, pipeline.stats()
+
+        results, stages = self.run(run())
+        results.sort(key=lambda item: item['rank'])
+        coins_out = []
+        for item in results:
+            analysis = item.get('sentiment')
+            coins_out.append({
+                'coin': item['coin'],
+                'indicators': {interval: frame_json(df, tail=1) for interval, df in item.get('data', {}).items()},
+                'market': item.get('market'),
+                'sentiment': analysis.dict() if analysis is not None else None,
+                'timings': item['timings'],
+                'errors': item['errors'],
+            })
+        return {'coins': coins_out, 'stages': stages}
+
+    def health(self):
+        return {'status': 'ok', 'uptime_s': round(time.time() - self.started_at, 1), 'requests': self.requests,
+                'indicator_engines': len(self.analyzer.engines)}
+
+
+def _param(query, name, default=None, cast=str):
+    if name not in query:
+        return default
+    try:
+        return cast(query[name])
+    except ValueError:
+        raise ServiceError(f"geçersiz {name}: {query[name]}")
+
+
+def _flag(value):
+    return value.lower() not in ('0', 'false', 'no')
+
+
+def _list(value):
+    return [v for v in value.replace(',', ' ').split() if v]
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        service = self.server.service
+        routes = {
+            '/select': lambda: service.select(_param(query, 'selector', 'scores'),
+                                              _param(query, 'max_coins', None, int)),
+            '/get_data': lambda: service.get_data(_param(query, 'symbol', 'BTC'),
+                                                  _param(query, 'interval', '1h'),
+                                                  _param(query, 'limit', 100, int),
+                                                  _param(query, 'tail', None, int),
+                                                  _param(query, 'extended', False, _flag)),
+            '/analyze': lambda: service.analyze(_param(query, 'coins', [], _list),
+                                                tuple(_param(query, 'intervals', list(INTERVALS), _list)),
+                                                _param(query, 'limit', 100, int),
+                                                _param(query, 'sentiment', True, _flag)),
+            '/health': service.health,
+        }
+        if url.path == '/metrics':
+            return self._send(200, instrumentation.metrics.render().encode(), 'text/plain; version=0.0.4')
+        if url.path not in routes:
+            return self._json(404, {'error': f"bilinmeyen yol: {url.path}", 'routes': sorted(routes) + ['/metrics']})
+        service.requests[url.path] = service.requests.get(url.path, 0) + 1
+        start = time.perf_counter()
+        try:
+            with instrumentation.span('service_request', path=url.path):
+                result = routes[url.path]()
+        except ServiceError as e:
+            return self._json(400, {'error': str(e)})
+        except Exception as e:
+            print(f"Servis hatası ({url.path}): {e}")
+            return self._json(500, {'error': str(e)})
+        result['elapsed_s'] = round(time.perf_counter() - start, 4)
+        self._json(200, result)
+
+    def _json(self, status, payload):
+        self._send(status, json.dumps(payload, default=str).encode(), 'application/json')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_service(host=SERVICE_HOST, port=SERVICE_PORT, service=None):
+    """HTTP API in a daemon thread, returns the server (server.service is the TradeService)"""
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service or TradeService()
+    threading.Thread(target=server.serve_forever, name='trade-service-http', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sıcak durumlu yerel servis: /select, /analyze, /get_data')
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--refresh', type=float, default=None,
+                        help='Ticker cache\'i bu süre (saniye) aralıkla servis içinde güncelle')
+    parser.add_argument('--stream', action='store_true', help='--refresh ile websocket ticker akışını kullan')
+    parser.add_argument('--no-sentiment', action='store_true')
+    parser.add_argument('--profile', action='store_true', help='Span süreleri /metrics üzerinden')
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        instrumentation.enable()
+    if args.refresh:
+        from realtime_cache import start_cache_scheduler
+        threading.Thread(target=start_cache_scheduler, args=(args.refresh, 'stream' if args.stream else 'rest'),
+                         name='cache-scheduler', daemon=True).start()
+
+    server = start_service(args.host, args.port, TradeService(sentiment=not args.no_sentiment))
+    print(f"Servis http://{args.host}:{args.port} adresinde çalışıyor (/select, /analyze, /get_data, /health)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.service.close()
+
+
+if __name__ == '__main__':
+    main()
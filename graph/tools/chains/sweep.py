@@ -0,0 +1,248 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from kline_store import KlineStore, KLINE_STORE_DIR
+from scoring import PROFILES, PROFILE_FILE, profile_params, save_profile
+from backtest import (KlineMatrix, TickerReplay, run_backtest, INTERVAL_MINUTES, SIDES, STEP,
+                      TAKE_PROFIT, STOP_LOSS, MAX_HOLD, FEE)
+
+# Seçici başına taranan parametreler ve aday değerleri (ilk değerler yerleşik profildekine yakın tutuldu)
+PARAM_SPACES = {
+    'selector': {
+        'min_volume': (3e5, 1e6, 3e6),
+        'min_count': (3e3, 1e4, 3e4),
+        'min_abs_change': (2.0, 3.0, 5.0, 8.0),
+        'w_momentum': (0.3, 0.5, 0.7),
+        'w_volatility': (0.1, 0.3, 0.5),
+        'w_volume': (0.0, 0.1, 0.2),
+        'w_trade': (0.0, 0.1, 0.2),
+        'w_short_term': (0.0, 0.3, 0.5),
+        'w_volume_accel': (0.0, 0.1, 0.3),
+    },
+    'selector_v2': {
+        'min_volume': (3e5, 1e6, 3e6),
+        'min_count': (3e3, 1e4, 3e4),
+        'min_abs_change': (2.0, 3.0, 5.0, 8.0),
+        'w_momentum': (0.3, 0.5, 0.7),
+        'w_volatility': (0.1, 0.3, 0.5),
+        'w_volume': (0.0, 0.1, 0.2),
+        'w_trade': (0.0, 0.1, 0.2),
+    },
+    'chooser': {
+        'min_abs_change': (1.0, 2.0, 3.0, 5.0),
+        'w_momentum': (0.2, 0.35, 0.5),
+        'w_volatility': (0.15, 0.25, 0.35),
+        'w_volume': (0.15, 0.25, 0.35),
+        'w_trade': (0.05, 0.15, 0.25),
+        'volatility_bonus': ((), ((5, 3.0), (3, 2.0), (2, 1.5)), ((4, 2.0), (2, 1.5)),
+                             ((8, 3.0), (5, 2.0), (3, 1.5))),
+    },
+}
+METRICS = ('avg_return', 'total_return', 'win_rate', 'profit_factor')
+MIN_TRADES = 30    # daha az işlemli adaylar sıralamada sona atılır
+ALIGN = 64
+
+
+class SharedArrays:
+    """
+    Named NumPy arrays packed into one shared memory block.
+
+    The parent copies the arrays in once; workers attach with spec (block
+    name plus offset/shape/dtype per array) and get zero-copy views, so
+    the inputs are never pickled per task.
+    """
+
+    def __init__(self, arrays):
+        layout, size = {}, 0
+        for key, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            layout[key] = (size, values.shape, values.dtype.str)
+            size += -(-values.nbytes // ALIGN) * ALIGN
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.spec = (self.shm.name, layout)
+        for key, view in self.views(self.shm, layout).items():
+            view[...] = arrays[key]
+
+    @staticmethod
+    def views(shm, layout):
+        return {key: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+                for key, (offset, shape, dtype) in layout.items()}
+
+    @staticmethod
+    def attach(spec):
+        """(SharedMemory, {key: array view}) in a worker; the block stays owned by the parent"""
+        name, layout = spec
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: kayıt, havuz süreçlerinin ana süreçle paylaştığı resource tracker'a düşer
+            # ve ana sürecin unlink()'i ile silinir
+            shm = shared_memory.SharedMemory(name=name)
+        return shm, SharedArrays.views(shm, layout)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def pack(replay, moves):
+    """Flat {key: array} of everything run_backtest reads (prices for the simulation, replayed tickers)"""
+    arrays = {'rows': replay.rows, 'times': replay.matrix.times}
+    for name in ('open', 'high', 'low', 'close'):
+        arrays[f'matrix.{name}'] = replay.matrix.fields[name]
+    for group, values in (('columns', replay.columns), ('features', replay.features), ('moves', moves)):
+        for name, array in values.items():
+            arrays[f'{group}.{name}'] = array
+    return arrays
+
+
+def unpack(arrays, symbols, interval):
+    """(KlineMatrix, TickerReplay, moves) over the arrays from pack()"""
+    group = lambda prefix: {k.split('.', 1)[1]: v for k, v in arrays.items() if k.startswith(prefix + '.')}
+    matrix = KlineMatrix(arrays['times'], symbols, group('matrix'), interval)
+    replay = TickerReplay.from_arrays(matrix, arrays['rows'], group('columns'), group('features'))
+    return matrix, replay, group('moves')
+
+
+_worker = {}
+
+
+def _init_worker(spec, symbols, interval, rules):
+    shm, arrays = SharedArrays.attach(spec)
+    matrix, replay, moves = unpack(arrays, symbols, interval)
+    _worker.update(shm=shm, matrix=matrix, replay=replay, moves=moves, rules=rules)
+
+
+def _evaluate(task):
+    name, params = task
+    profile = PROFILES[name].with_params(**params)
+    summary, _ = run_backtest(_worker['matrix'], profile, _worker['replay'], moves=_worker['moves'],
+                              **_worker['rules'])
+    return params, summary
+
+
+def grid(space):
+    """Every combination of the candidate values"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+
+def random_search(space, n, seed=0):
+    """n distinct combinations drawn uniformly (all of them when the grid is smaller)"""
+    total = int(np.prod([len(values) for values in space.values()]))
+    if n >= total:
+        return grid(space)
+    rng = random.Random(seed)
+    seen, out = set(), []
+    while len(out) < n:
+        choice = tuple(rng.randrange(len(values)) for values in space.values())
+        if choice not in seen:
+            seen.add(choice)
+            out.append({name: values[i] for (name, values), i in zip(space.items(), choice)})
+    return out
+
+
+def rank(results, metric='avg_return', min_trades=MIN_TRADES):
+    """Results sorted by metric (best first), candidates with fewer than min_trades trades last"""
+    def key(item):
+        summary = item[1]
+        value = summary.get(metric, float('-inf'))
+        return (summary.get('trades', 0) >= min_trades, value, summary.get('total_return', 0))
+    return sorted(results, key=key, reverse=True)
+
+
+def sweep(matrix, name, candidates, replay=None, workers=None, side='trend', take_profit=TAKE_PROFIT,
+          stop_loss=STOP_LOSS, max_hold=MAX_HOLD, fee=FEE, step=STEP, overlap=False):
+    """
+    Backtests the named profile with every candidate parameter set in a process pool
+
+    The replayed tickers are computed once here and shared with the workers
+    through shared memory. The built-in profile ({} params) is always
+    evaluated as the baseline.
+
+    Returns:
+    - [(params, summary), ...] in candidate order
+    """
+    replay = replay or TickerReplay(matrix, step)
+    moves = replay.forward_moves()
+    rules = {'side': side, 'take_profit': take_profit, 'stop_loss': stop_loss, 'max_hold': max_hold,
+             'fee': fee, 'overlap': overlap}
+    tasks = [(name, {})] + [(name, params) for params in candidates if params]
+    shared = SharedArrays(pack(replay, moves))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.spec, matrix.symbols, matrix.interval, rules)) as pool:
+            chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+            return list(pool.map(_evaluate, tasks, chunksize=chunksize))
+    finally:
+        shared.close()
+
+
+def print_report(name, ranked, metric, top=10, min_trades=MIN_TRADES):
+    print(f"\n=== {name}: {len(ranked)} aday, '{metric}' ölçütüne göre (en az {min_trades} işlem) ===")
+    for i, (params, summary) in enumerate(ranked[:top], 1):
+        label = 'yerleşik profil' if not params else ', '.join(f'{k}={v}' for k, v in params.items())
+        print(f"{i:>3}. {metric}={summary.get(metric)} işlem={summary.get('trades', 0)} "
+              f"kazanma={summary.get('win_rate')} toplam={summary.get('total_return')} | {label}")
+    baseline = next(i for i, (params, _) in enumerate(ranked, 1) if not params)
+    print(f"Yerleşik profil {baseline}. sırada")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Seçici eşik ve ağırlıklarını backtest üzerinde tara')
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PARAM_SPACES), default=sorted(PARAM_SPACES))
+    parser.add_argument('--search', choices=('grid', 'random'), default='random')
+    parser.add_argument('--samples', type=int, default=200, help='random aramada aday sayısı')
+    parser.add_argument('--params', nargs='+', help='Yalnızca bu parametreleri tara, diğerleri profildeki gibi')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='Süreç sayısı, varsayılan CPU sayısı')
+    parser.add_argument('--metric', choices=METRICS, default='avg_return')
+    parser.add_argument('--min-trades', type=int, default=MIN_TRADES)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--out', help='Tüm sonuçları bu JSON dosyasına yaz')
+    parser.add_argument('--save', action='store_true', help='Kazanan profilleri profil dosyasına kaydet')
+    parser.add_argument('--profile-file', default=PROFILE_FILE)
+    parser.add_argument('--store', default=KLINE_STORE_DIR, help='KlineStore dizini')
+    parser.add_argument('--symbols', nargs='+', help='Çiftler (BTCUSDT), varsayılan depodaki tümü')
+    parser.add_argument('--interval', default='1m', choices=sorted(INTERVAL_MINUTES))
+    parser.add_argument('--step', type=int, default=STEP)
+    parser.add_argument('--side', choices=SIDES, default='trend')
+    parser.add_argument('--take-profit', type=float, default=TAKE_PROFIT)
+    parser.add_argument('--stop-loss', type=float, default=STOP_LOSS)
+    parser.add_argument('--max-hold', type=int, default=MAX_HOLD)
+    parser.add_argument('--fee', type=float, default=FEE)
+    args = parser.parse_args(argv)
+
+    matrix = KlineMatrix.from_store(KlineStore(args.store), args.symbols, args.interval)
+    replay = TickerReplay(matrix, args.step)
+    report = {}
+    for name in args.profiles:
+        space = PARAM_SPACES[name]
+        if args.params:
+            space = {k: v for k, v in space.items() if k in args.params}
+        candidates = grid(space) if args.search == 'grid' else random_search(space, args.samples, args.seed)
+        start = time.perf_counter()
+        results = sweep(matrix, name, candidates, replay, args.workers, args.side, args.take_profit,
+                        args.stop_loss, args.max_hold, args.fee, args.step)
+        ranked = rank(results, args.metric, args.min_trades)
+        print_report(name, ranked, args.metric, args.top, args.min_trades)
+        print(f"{len(results)} backtest {time.perf_counter() - start:.1f}s")
+        best_params, best = ranked[0]
+        report[name] = [{'params': profile_params(PROFILES[name].with_params(**params)), 'summary': summary}
+                        for params, summary in ranked]
+        if args.save and best.get('trades', 0) >= args.min_trades:
+            save_profile(PROFILES[name].with_params(**best_params), args.profile_file)
+            print(f"{name} profili {args.profile_file} dosyasına kaydedildi")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
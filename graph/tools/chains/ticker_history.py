@@ -0,0 +1,151 @@
+import os
+import time
+import numpy as np
+from ticker_snapshot import atomic_write
+
+HISTORY_FILE = 'cache_history.npz'
+HISTORY_FIELDS = ['lastPrice', 'volume', 'quoteVolume', 'count']
+PRICE, VOLUME, QUOTE_VOLUME, COUNT = range(len(HISTORY_FIELDS))
+
+# Kısa vadeli pencereler (saniye)
+HORIZONS = {'5m': 300, '15m': 900, '1h': 3600}
+HISTORY_SIZE = 128
+MIN_SPACING = 60  # iki kayıt arası en az süre; 128 x 60s ~ 2 saat geçmiş
+
+
+class TickerHistory:
+    """
+    Bounded ring buffer of the last N ticker snapshots.
+
+    Stored as one float32 array [size, len(HISTORY_FIELDS), symbols] plus a
+    timestamp per slot, so short-horizon deltas for every symbol are a
+    couple of vectorized array operations. Snapshots closer together than
+    `min_spacing` seconds replace the newest slot instead of taking a new one.
+    """
+
+    def __init__(self, size=HISTORY_SIZE, min_spacing=MIN_SPACING):
+        self.size = size
+        self.min_spacing = min_spacing
+        self.times = np.full(size, np.nan)
+        self.values = np.full((size, len(HISTORY_FIELDS), 0), np.nan, dtype=np.float32)
+        self.symbols = []
+        self.index = {}    # symbol -> sütun
+        self.head = 0      # bir sonraki yazılacak slot
+        self.count = 0
+        self.opened_at = None  # en yeni slotun açıldığı zaman
+
+    def __len__(self):
+        return self.count
+
+    def _columns(self, symbols):
+        new = [s for s in symbols if s not in self.index]
+        if new:
+            for s in new:
+                self.index[s] = len(self.symbols)
+                self.symbols.append(s)
+            grow = np.full((self.size, len(HISTORY_FIELDS), len(new)), np.nan, dtype=np.float32)
+            self.values = np.concatenate([self.values, grow], axis=2)
+        return np.fromiter((self.index[s] for s in symbols), dtype=np.int64, count=len(symbols))
+
+    def latest_time(self):
+        return None if self.count == 0 else float(self.times[(self.head - 1) % self.size])
+
+    def push(self, snapshot, at=None):
+        """Records a TickerSnapshot (ticker_table / ticker_snapshot), True if it took a new slot"""
+        at = time.time() if at is None else at
+        symbols = [s.decode() if isinstance(s, bytes) else s for s in snapshot.symbols.tolist()]
+        columns = self._columns(symbols)
+        new_slot = self.opened_at is None or at - self.opened_at >= self.min_spacing
+        if new_slot:
+            self.opened_at = at
+            slot = self.head
+            self.head = (self.head + 1) % self.size
+            self.count = min(self.count + 1, self.size)
+        else:
+            slot = (self.head - 1) % self.size
+        self.values[slot] = np.nan
+        for j, name in enumerate(HISTORY_FIELDS):
+            self.values[slot, j, columns] = snapshot.column(name)
+        self.times[slot] = at
+        return new_slot
+
+    def _slot_before(self, seconds):
+        """Newest slot at least `seconds` older than the latest one, None if history is too short"""
+        latest = self.latest_time()
+        if latest is None:
+            return None
+        old = np.where(self.times <= latest - seconds, self.times, -np.inf)
+        slot = int(np.argmax(old))
+        return None if old[slot] == -np.inf else slot
+
+    def deltas(self, horizons=HORIZONS):
+        """
+        Per-symbol short-horizon metrics, arrays aligned with self.symbols
+
+        - change_<h>: last price change over the horizon (%)
+        - volume_accel_<h>: volume traded in the horizon relative to the 24h
+          average pace (1.0 = average, 2.0 = twice as fast). The 24h volume
+          also drops what rolled out of the window; that part is assumed to
+          roll out at the average pace.
+        """
+        result = {}
+        if self.count == 0:
+            return result
+        now_slot = (self.head - 1) % self.size
+        now = self.values[now_slot].astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, seconds in horizons.items():
+                slot = self._slot_before(seconds)
+                if slot is None:
+                    result[f'change_{name}'] = np.full(len(self.symbols), np.nan)
+                    result[f'volume_accel_{name}'] = np.full(len(self.symbols), np.nan)
+                    continue
+                then = self.values[slot].astype(np.float64)
+                elapsed = self.times[now_slot] - self.times[slot]
+                result[f'change_{name}'] = (now[PRICE] / then[PRICE] - 1) * 100
+                average = now[VOLUME] * elapsed / 86400
+                result[f'volume_accel_{name}'] = 1 + (now[VOLUME] - then[VOLUME]) / average
+        return result
+
+    def features(self, symbols, horizons=HORIZONS):
+        """deltas() reindexed to the given symbol order (NaN for unknown symbols)"""
+        deltas = self.deltas(horizons)
+        rows = np.array([self.index.get(s, -1) for s in symbols], dtype=np.int64)
+        known = rows >= 0
+        out = {}
+        for name, values in deltas.items():
+            aligned = np.full(len(rows), np.nan)
+            aligned[known] = values[rows[known]]
+            out[name] = aligned
+        return out
+
+    def save(self, path=HISTORY_FILE):
+        atomic_write(path, lambda f: np.savez(
+            f, times=self.times, values=self.values, symbols=np.array(self.symbols, dtype='U32'),
+            meta=np.array([self.head, self.count, self.min_spacing,
+                           np.nan if self.opened_at is None else self.opened_at], dtype=np.float64)))
+
+    @classmethod
+    def load(cls, path=HISTORY_FILE):
+        with np.load(path) as data:
+            history = cls(size=len(data['times']), min_spacing=float(data['meta'][2]))
+            history.times = data['times']
+            history.values = data['values']
+            history.symbols = data['symbols'].tolist()
+            history.index = {s: i for i, s in enumerate(history.symbols)}
+            history.head = int(data['meta'][0])
+            history.count = int(data['meta'][1])
+            opened_at = float(data['meta'][3])
+            history.opened_at = None if opened_at != opened_at else opened_at
+        return history
+
+
+def load_history(path=HISTORY_FILE):
+    """TickerHistory written by the cache process, None when there is none yet"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return TickerHistory.load(path)
+    except Exception as e:
+        print(f"Ticker geçmişi yüklenemedi: {str(e)}")
+        return None
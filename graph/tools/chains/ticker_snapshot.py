@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from ticker_table import TICKER_FIELDS, TickerSnapshot, TickerTable, records_to_arrays, MAGIC
+
+SNAPSHOT_FILE = 'cache.npz'
+ZIP_MAGIC = b'PK'
+
+
+def atomic_write(path, write):
+    """Calls write(file) on a temp file next to path, then renames it over path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_json(records, path):
+    atomic_write(path, lambda f: f.write(json.dumps(records).encode()))
+
+
+def write_snapshot(records, path=SNAPSHOT_FILE, compress=False):
+    """
+    Atomically writes tickers as a binary .npz snapshot
+
+    Numeric fields are stored pre-parsed as one float64 matrix
+    [n_fields, n] next to the symbol column, so reading needs no string
+    parsing. compress=True uses zip deflate (smaller, slower to write).
+    """
+    symbols, values = records_to_arrays(records)
+    save = np.savez_compressed if compress else np.savez
+    atomic_write(path, lambda f: save(f, symbols=symbols, values=values,
+                                      fields=np.array(TICKER_FIELDS),
+                                      written_at=np.array(time.time())))
+
+
+def read_snapshot(path=SNAPSHOT_FILE):
+    with np.load(path) as data:
+        fields = data['fields'].tolist()
+        values = data['values']
+        if fields != TICKER_FIELDS:
+            # Farklı alan sırasıyla yazılmış dosyalar için yeniden sırala
+            index = {name: i for i, name in enumerate(fields)}
+            values = np.array([values[index[name]] if name in index else np.full(values.shape[1], np.nan)
+                               for name in TICKER_FIELDS])
+        return TickerSnapshot(data['symbols'], values, 0, float(data['written_at']))
+
+
+def detect_format(path):
+    """'npz', 'table' or 'json' from the first bytes of the file"""
+    with open(path, 'rb') as f:
+        head = f.read(8)
+    if head.startswith(ZIP_MAGIC):
+        return 'npz'
+    if head == MAGIC:
+        return 'table'
+    return 'json'
+
+
+def read_cache_file(path):
+    """Ticker list from any cache file format (json, npz snapshot or ticker table)"""
+    fmt = detect_format(path)
+    if fmt == 'npz':
+        return read_snapshot(path).to_records()
+    if fmt == 'table':
+        table = TickerTable.open(path)
+        try:
+            return table.read(copy=True).to_records()
+        finally:
+            table.close()
+    with open(path, 'r') as f:
+        return json.load(f)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+
+STREAM_URL = 'wss://stream.binance.com:9443'
+TICKER_STREAMS = ('!ticker@arr',)
+MINI_TICKER_STREAMS = ('!miniTicker@arr',)
+
+# Stream alan adları -> /ticker/24hr (REST) alan adları
+TICKER_FIELDS = {
+    's': 'symbol', 'p': 'priceChange', 'P': 'priceChangePercent', 'w': 'weightedAvgPrice',
+    'x': 'prevClosePrice', 'c': 'lastPrice', 'Q': 'lastQty', 'b': 'bidPrice', 'B': 'bidQty',
+    'a': 'askPrice', 'A': 'askQty', 'o': 'openPrice', 'h': 'highPrice', 'l': 'lowPrice',
+    'v': 'volume', 'q': 'quoteVolume', 'O': 'openTime', 'C': 'closeTime', 'F': 'firstId',
+    'L': 'lastId', 'n': 'count',
+}
+MINI_TICKER_FIELDS = {
+    's': 'symbol', 'c': 'lastPrice', 'o': 'openPrice', 'h': 'highPrice', 'l': 'lowPrice',
+    'v': 'volume', 'q': 'quoteVolume', 'E': 'closeTime',
+}
+
+RECONNECT_DELAY = 1   # saniye, her kopmada iki katına çıkar
+MAX_RECONNECT_DELAY = 60
+
+
+class TickerStream:
+    """
+    In-memory 24h ticker table fed by the Binance ticker websocket streams.
+
+    Rows use the same keys and value types as /ticker/24hr, so snapshot()
+    is a drop-in replacement for fetch_binance_data(). Seed it once from
+    REST, then every stream event overwrites the fields it carries; the
+    miniTicker stream has no priceChange fields, they are derived from the
+    open and last price.
+    """
+
+    def __init__(self, streams=TICKER_STREAMS, url=STREAM_URL):
+        self.streams = tuple(streams)
+        self.url = url
+        self.table = {}           # symbol -> REST formatında ticker dict'i
+        self.lock = threading.Lock()
+        self.last_event = None    # son olayın yerel zamanı (time.time)
+        self.messages = 0
+        self.running = False
+        self._thread = None
+        self._loop = None
+        self._task = None
+
+    def seed(self, data):
+        """Initial full table from a /ticker/24hr response"""
+        with self.lock:
+            for item in data:
+                self.table[item['symbol']] = dict(item)
+            self.last_event = time.time()
+
+    def apply(self, message):
+        """Applies one stream message (raw str, single event, array or combined-stream envelope)"""
+        if isinstance(message, (str, bytes)):
+            message = json.loads(message)
+        if isinstance(message, dict) and 'data' in message:
+            message = message['data']
+        events = message if isinstance(message, list) else [message]
+        with self.lock:
+            for event in events:
+                kind = event.get('e')
+                if kind == '24hrTicker':
+                    fields = TICKER_FIELDS
+                elif kind == '24hrMiniTicker':
+                    fields = MINI_TICKER_FIELDS
+                else:
+                    continue
+                row = self.table.setdefault(event['s'], {})
+                for key, name in fields.items():
+                    if key in event:
+                        row[name] = event[key]
+                if kind == '24hrMiniTicker':
+                    last = float(event['c'])
+                    first = float(event['o'])
+                    row['priceChange'] = f'{last - first:.8f}'
+                    row['priceChangePercent'] = f'{(last - first) / first * 100:.3f}' if first else '0.000'
+            self.last_event = time.time()
+            self.messages += 1
+
+    def snapshot(self):
+        """Copy of the ticker table as a /ticker/24hr style list"""
+        with self.lock:
+            return [dict(row) for row in self.table.values()]
+
+    def get(self, symbol):
+        with self.lock:
+            row = self.table.get(symbol)
+            return dict(row) if row is not None else None
+
+    def age(self):
+        """Seconds since the last applied event (None before the first one)"""
+        return None if self.last_event is None else time.time() - self.last_event
+
+    def stream_url(self):
+        return f"{self.url}/stream?streams={'/'.join(self.streams)}"
+
+    async def run(self):
+        """Consumes the streams until stop(), reconnecting with backoff"""
+        import websockets
+        self.running = True
+        delay = RECONNECT_DELAY
+        while self.running:
+            try:
+                async with websockets.connect(self.stream_url(), max_size=None) as ws:
+                    delay = RECONNECT_DELAY
+                    async for message in ws:
+                        self.apply(message)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"{datetime.now()} - Ticker stream hatası: {str(e)}")
+            if self.running:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def start(self):
+        """Runs the stream on a background thread with its own event loop"""
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._task = self._loop.create_task(self.run())
+            try:
+                self._loop.run_until_complete(self._task)
+            except asyncio.CancelledError:
+                pass
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -0,0 +1,216 @@
+import mmap
+import os
+import time
+import numpy as np
+
+CACHE_TABLE = 'cache.tbl'
+MAGIC = b'TICKTBL1'
+
+# /ticker/24hr sayısal alanları, tabloda hepsi float64 saklanır
+TICKER_FIELDS = ['priceChange', 'priceChangePercent', 'weightedAvgPrice', 'prevClosePrice',
+                 'lastPrice', 'lastQty', 'bidPrice', 'bidQty', 'askPrice', 'askQty',
+                 'openPrice', 'highPrice', 'lowPrice', 'volume', 'quoteVolume',
+                 'openTime', 'closeTime', 'firstId', 'lastId', 'count']
+INT_FIELDS = {'openTime', 'closeTime', 'firstId', 'lastId', 'count'}
+FIELD_INDEX = {name: i for i, name in enumerate(TICKER_FIELDS)}
+SYMBOL_DTYPE = 'S24'
+DEFAULT_CAPACITY = 4096
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('seq', '<u8'),          # seqlock sayacı, yazma sırasında tek
+    ('active', '<u8'),       # okuyucuların kullandığı slot (0/1)
+    ('capacity', '<u8'),
+    ('n_fields', '<u8'),
+    ('stale', '<u8'),        # 1: dosya daha büyük bir dosyayla değiştirildi, yeniden aç
+    ('rows', '<u8', (2,)),
+    ('written_at', '<f8', (2,)),
+])
+HEADER_SIZE = 128
+
+
+def records_to_arrays(records):
+    """/ticker/24hr dicts -> (symbols, values[n_fields, n]) with strings parsed once"""
+    symbols = np.array([r['symbol'] for r in records], dtype=SYMBOL_DTYPE)
+    values = np.array([[r.get(name, 'nan') for name in TICKER_FIELDS] for r in records],
+                      dtype=np.float64).T
+    return symbols, values.reshape(len(TICKER_FIELDS), len(records))
+
+
+class TickerSnapshot:
+    """Consistent view of one table version: symbols[n] and values[n_fields, n]"""
+
+    def __init__(self, symbols, values, version, written_at, table=None):
+        self.symbols = symbols
+        self.values = values
+        self.version = version
+        self.written_at = written_at
+        self.table = table
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def column(self, name):
+        return self.values[FIELD_INDEX[name]]
+
+    def age(self):
+        return time.time() - self.written_at
+
+    def is_current(self):
+        """False once the writer may have started refilling this slot (the next-but-one write)"""
+        return self.table is None or self.table.version() - self.version < 2
+
+    def to_records(self):
+        """Compatibility list of /ticker/24hr style dicts"""
+        names = [s.decode() for s in self.symbols.tolist()]
+        rows = self.values.T.tolist()
+        records = []
+        for symbol, row in zip(names, rows):
+            record = {'symbol': symbol}
+            for name, value in zip(TICKER_FIELDS, row):
+                record[name] = int(value) if name in INT_FIELDS and value == value else value
+            records.append(record)
+        return records
+
+
+class TickerTable:
+    """
+    Fixed-schema columnar ticker table in a memory-mapped file.
+
+    The cache process writes, selectors in other processes map the same file
+    and read float columns as zero-copy NumPy views. The file holds two slots:
+    the writer fills the inactive one and flips `active` inside a seqlock
+    (seq odd while flipping), so a reader never sees a half-written table and
+    a view it got stays intact until the writer comes back to that slot.
+    """
+
+    def __init__(self, path, mm, writable):
+        self.path = path
+        self.mm = mm
+        self.writable = writable
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=mm, offset=0)
+        self.capacity = int(self.header['capacity'])
+        self.n_fields = int(self.header['n_fields'])
+        self.slot_size = self._slot_size(self.capacity)
+
+    @staticmethod
+    def _slot_size(capacity):
+        return capacity * np.dtype(SYMBOL_DTYPE).itemsize + len(TICKER_FIELDS) * capacity * 8
+
+    @classmethod
+    def create(cls, path=CACHE_TABLE, capacity=DEFAULT_CAPACITY):
+        size = HEADER_SIZE + 2 * cls._slot_size(capacity)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as f:
+            f.truncate(size)
+        with open(tmp, 'r+b') as f:
+            mm = mmap.mmap(f.fileno(), size)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=mm, offset=0)
+        header['magic'] = MAGIC
+        header['capacity'] = capacity
+        header['n_fields'] = len(TICKER_FIELDS)
+        mm.flush()
+        # Eski dosyayı açık tutan okuyuculara yeniden açmalarını söyle
+        if os.path.exists(path):
+            try:
+                old = cls.open(path, writable=True)
+                old.header['stale'] = 1
+                old.close()
+            except Exception:
+                pass
+        os.replace(tmp, path)
+        return cls(path, mm, True)
+
+    @classmethod
+    def open(cls, path=CACHE_TABLE, writable=False):
+        with open(path, 'r+b' if writable else 'rb') as f:
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            mm = mmap.mmap(f.fileno(), 0, access=access)
+        if mm[:8] != MAGIC:
+            mm.close()
+            raise ValueError(f"{path} bir ticker tablosu değil")
+        return cls(path, mm, writable)
+
+    def close(self):
+        self.header = None
+        self.mm.close()
+
+    def _slot(self, slot, rows):
+        offset = HEADER_SIZE + slot * self.slot_size
+        symbols = np.ndarray((self.capacity,), dtype=SYMBOL_DTYPE, buffer=self.mm, offset=offset)
+        offset += self.capacity * np.dtype(SYMBOL_DTYPE).itemsize
+        values = np.ndarray((self.n_fields, self.capacity), dtype=np.float64, buffer=self.mm, offset=offset)
+        return symbols[:rows], values[:, :rows]
+
+    def version(self):
+        return int(self.header['seq'])
+
+    def write(self, records):
+        """Publishes a /ticker/24hr list as the new table version"""
+        return self.write_arrays(*records_to_arrays(records))
+
+    def write_arrays(self, symbols, values):
+        rows = len(symbols)
+        if rows > self.capacity:
+            raise ValueError(f"Ticker tablosu kapasitesi yetersiz: {rows} > {self.capacity}")
+        target = 1 - int(self.header['active'])
+        slot_symbols, slot_values = self._slot(target, rows)
+        slot_symbols[:] = symbols
+        slot_values[:] = values
+        seq = int(self.header['seq'])
+        self.header['seq'] = seq + 1
+        self.header['active'] = target
+        self.header['rows'][target] = rows
+        self.header['written_at'][target] = time.time()
+        self.header['seq'] = seq + 2
+        return seq + 2
+
+    def read(self, copy=False, retries=100):
+        """Consistent snapshot of the active slot (zero-copy views unless copy=True)"""
+        for _ in range(retries):
+            seq = int(self.header['seq'])
+            if seq % 2:
+                time.sleep(0)
+                continue
+            active = int(self.header['active'])
+            rows = int(self.header['rows'][active])
+            written_at = float(self.header['written_at'][active])
+            symbols, values = self._slot(active, rows)
+            if copy:
+                symbols, values = symbols.copy(), values.copy()
+            if int(self.header['seq']) == seq:
+                return TickerSnapshot(symbols, values, seq, written_at, None if copy else self)
+        raise RuntimeError("Ticker tablosu tutarlı okunamadı")
+
+    def is_stale(self):
+        return bool(self.header['stale'])
+
+
+_readers = {}
+
+
+def read_table(path=CACHE_TABLE, copy=False):
+    """Snapshot from a process-wide reader mapping, reopened if the writer replaced the file"""
+    table = _readers.get(path)
+    if table is None or table.is_stale():
+        if table is not None:
+            table.close()
+        table = TickerTable.open(path)
+        _readers[path] = table
+    if table.version() == 0:
+        return None
+    return table.read(copy=copy)
+
+
+def publish(records, path=CACHE_TABLE, table=None):
+    """Writes records into the table at path (creating or growing it), returns the table"""
+    if table is None:
+        try:
+            table = TickerTable.open(path, writable=True)
+        except (FileNotFoundError, ValueError):
+            table = TickerTable.create(path, max(DEFAULT_CAPACITY, len(records)))
+    if len(records) > table.capacity:
+        table.close()
+        table = TickerTable.create(path, 2 * len(records))
+    table.write(records)
+    return table
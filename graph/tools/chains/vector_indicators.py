@@ -0,0 +1,96 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from indicator_engine import INDICATOR_COLUMNS
+
+# candles[..., j] alanları; kısa geçmişi olan semboller soldan NaN ile doldurulur
+CANDLE_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(CANDLE_FIELDS))
+
+
+def ewm(values, alpha, min_periods):
+    """pandas ewm(adjust=False).mean() along axis 1, leading NaNs are skipped per row"""
+    out = np.full(values.shape, np.nan)
+    state = np.full(values.shape[0], np.nan)
+    count = np.zeros(values.shape[0], dtype=np.int64)
+    # Zaman ekseninde döngü, her adım tüm semboller için vektörel
+    for t in range(values.shape[1]):
+        x = values[:, t]
+        valid = ~np.isnan(x)
+        started = ~np.isnan(state)
+        state = np.where(valid & started, state + alpha * (x - state), state)
+        state = np.where(valid & ~started, x, state)
+        count += valid
+        out[:, t] = np.where(count >= min_periods, state, np.nan)
+    return out
+
+
+def rolling(values, window, reducer):
+    """pandas rolling(window) reduction along axis 1, windows containing NaN give NaN"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        out[:, window - 1:] = reducer(sliding_window_view(values, window, axis=1), axis=2)
+    return out
+
+
+def rsi(close, window=14):
+    diff = np.diff(close, axis=1, prepend=np.nan)
+    # ta ilk farkı 0 kabul eder; doldurma (NaN) bölgesi NaN kalır
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    up[np.isnan(close)] = np.nan
+    down[np.isnan(close)] = np.nan
+    avg_up = ewm(up, 1 / window, window)
+    avg_down = ewm(down, 1 / window, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = 100 - 100 / (1 + avg_up / avg_down)
+    return np.where(avg_down == 0, 100.0, result)
+
+
+def calculate_indicators_batch(candles):
+    """
+    Vectorized version of CryptoAnalyzer.calculate_indicators
+
+    Parameters:
+    - candles: ndarray (symbols, candles, len(CANDLE_FIELDS))
+
+    Returns:
+    - ndarray (symbols, candles, len(INDICATOR_COLUMNS))
+    """
+    high = candles[:, :, HIGH]
+    low = candles[:, :, LOW]
+    close = candles[:, :, CLOSE]
+    volume = candles[:, :, VOLUME]
+    out = np.empty(close.shape + (len(INDICATOR_COLUMNS),))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # RSI
+        rsi_values = rsi(close)
+        out[:, :, 0] = rsi_values
+
+        # MACD
+        macd = ewm(close, 2 / 13, 12) - ewm(close, 2 / 27, 26)
+        signal = ewm(macd, 2 / 10, 9)
+        out[:, :, 1] = macd
+        out[:, :, 2] = signal
+        out[:, :, 3] = macd - signal
+
+        # Bollinger Bands
+        middle = rolling(close, 20, np.mean)
+        std = rolling(close, 20, np.std)
+        out[:, :, 4] = middle + 2 * std
+        out[:, :, 5] = middle
+        out[:, :, 6] = middle - 2 * std
+
+        # Stochastic RSI
+        lowest = rolling(rsi_values, 14, np.min)
+        highest = rolling(rsi_values, 14, np.max)
+        stoch = (rsi_values - lowest) / (highest - lowest)
+        out[:, :, 7] = np.where(np.isfinite(stoch), stoch, np.nan)
+
+        # VWAP
+        typical = (high + low + close) / 3.0
+        total_pv = rolling(typical * volume, 14, np.sum)
+        total_volume = rolling(volume, 14, np.sum)
+        out[:, :, 8] = total_pv / total_volume
+
+    return out
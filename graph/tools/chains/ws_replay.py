@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+
+
+def load_frames(path):
+    """Recorded websocket frames, one JSON message per line"""
+    with open(path, 'r') as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+
+async def record_frames(url, path, count=100):
+    """Records `count` raw frames from a live stream into path (jsonl)"""
+    import websockets
+    async with websockets.connect(url) as ws:
+        with open(path, 'w') as f:
+            for _ in range(count):
+                f.write(await ws.recv() + '\n')
+
+
+class ReplayServer:
+    """
+    Local stand-in for the Binance websocket endpoints.
+
+    Every connection receives the recorded frames in order, `delay` seconds
+    apart. SUBSCRIBE / UNSUBSCRIBE / LIST_SUBSCRIPTIONS requests are answered
+    like Binance does, and the frames sent to a connection can be filtered by
+    the streams it subscribed to (combined-stream frames carry a 'stream' key).
+    """
+
+    def __init__(self, frames, delay=0.0, host='127.0.0.1', port=0, loop_frames=False):
+        self.frames = [frame if isinstance(frame, str) else json.dumps(frame) for frame in frames]
+        self.delay = delay
+        self.host = host
+        self.port = port
+        self.loop_frames = loop_frames
+        self.server = None
+        self.connections = 0
+        self.requests = []
+        self._thread = None
+        self._loop = None
+
+    @property
+    def url(self):
+        return f'ws://{self.host}:{self.port}'
+
+    async def _handler(self, websocket, path=None):
+        self.connections += 1
+        subscriptions = set()
+        reader = asyncio.ensure_future(self._read(websocket, subscriptions))
+        try:
+            while True:
+                for frame in self.frames:
+                    stream = json.loads(frame).get('stream') if frame.startswith('{"stream"') else None
+                    if stream is None or not subscriptions or stream in subscriptions:
+                        await websocket.send(frame)
+                    await asyncio.sleep(self.delay)
+                if not self.loop_frames:
+                    break
+            # Kayıt bittikten sonra bağlantıyı açık tut (gerçek sunucu gibi)
+            await reader
+        except Exception:
+            pass
+        finally:
+            reader.cancel()
+
+    async def _read(self, websocket, subscriptions):
+        async for message in websocket:
+            request = json.loads(message)
+            self.requests.append(request)
+            method = request.get('method')
+            if method == 'SUBSCRIBE':
+                subscriptions.update(request.get('params', []))
+                result = None
+            elif method == 'UNSUBSCRIBE':
+                subscriptions.difference_update(request.get('params', []))
+                result = None
+            else:
+                result = sorted(subscriptions)
+            await websocket.send(json.dumps({'result': result, 'id': request.get('id')}))
+
+    async def start(self):
+        import websockets
+        self.server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def start_in_thread(self):
+        """Runs the server on its own event loop thread, returns self"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_thread(self):
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
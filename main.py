@@ -1,15 +1,29 @@
-from graph.tools.crypto_analyzer import CryptoAnalyzer
-
-if __name__ == "__main__":
-    # Tool'u import et
+import os
+import sys
 
+# Zincir modülleri birbirini düz isimle import eder (from realtime_selector import ...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'graph', 'tools', 'chains'))
 
-# Tool'u başlat
-    analyzer = CryptoAnalyzer()
+from pipeline import main
 
-# Herhangi bir coin için veri al
-    btc_data = analyzer.get_data('BTC', interval='1h', limit=100)
-    eth_data = analyzer.get_data('ETH', interval='15m', limit=200)
-    print(btc_data)
-    print(eth_data)
-    
\ No newline at end of file
+if __name__ == "__main__":
+    # Cache güncelle -> coin seç -> kline/indikatörler -> haber/piyasa duygu analizi
+    # Örnek: python main.py --coins BTC ETH --intervals 1h 15m --no-sentiment
+    # Sıcak durumlu yerel servis: python main.py serve --port 8765 --refresh 180
+    # Seçici backtest'i: python main.py backtest --symbols SUIUSDT PEPEUSDT --fetch 30
+    # Seçici parametre taraması: python main.py sweep --profiles chooser --samples 300 --save
+    # Seçilen coinlerin canlı kline/indikatör akışı: python main.py stream --selector scores --every 180
+    if sys.argv[1:2] == ['serve']:
+        from service import main as serve
+        serve(sys.argv[2:])
+    elif sys.argv[1:2] == ['backtest']:
+        from backtest import main as backtest
+        backtest(sys.argv[2:])
+    elif sys.argv[1:2] == ['sweep']:
+        from sweep import main as sweep
+        sweep(sys.argv[2:])
+    elif sys.argv[1:2] == ['stream']:
+        from kline_stream import main as stream
+        stream(sys.argv[2:])
+    else:
+        main()
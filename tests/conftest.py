@@ -0,0 +1,29 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Zincir modülleri birbirini düz isimle import eder; stub sunucular benchmarks altında
+for path in (os.path.join(ROOT, 'graph', 'tools', 'chains'), os.path.join(ROOT, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+STUB_SYMBOLS = ('BTCUSDT', 'ETHUSDT', 'SOLUSDT')
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Modules write relative files (klines/, cache.json, *.sqlite): every test runs in its own directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def stub():
+    """(server, base_url) of the stub Binance REST API; only STUB_SYMBOLS are valid /klines symbols"""
+    from stub_server import start_stub_server
+    tickers = [{'symbol': symbol, 'lastPrice': '100.0'} for symbol in STUB_SYMBOLS]
+    server, base_url = start_stub_server(latency=0.0, tickers=tickers)
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from crypto_analyzer import CryptoAnalyzer
+from indicator_engine import IncrementalIndicators, INDICATOR_COLUMNS
+from fixtures import random_walk_klines
+
+WINDOW = 300
+
+
+@pytest.fixture(scope='module')
+def candles():
+    columns = random_walk_klines(['AUSDT'], 600, seed=7)['AUSDT']
+    return pd.DataFrame({name: columns[name] for name in ('timestamp', 'open', 'high', 'low', 'close', 'volume',
+                                                         'close_time')})
+
+
+def reference(df):
+    """calculate_indicators (ta) over df"""
+    return CryptoAnalyzer(incremental=False, store_dir=None).calculate_indicators(df.copy())[INDICATOR_COLUMNS]
+
+
+def assert_matches(actual, expected):
+    for col in INDICATOR_COLUMNS:
+        assert np.allclose(actual[col].to_numpy(), expected[col].to_numpy(), rtol=1e-9, atol=1e-9,
+                           equal_nan=True), col
+
+
+def test_cold_window_matches_ta(candles):
+    window = candles.iloc[:WINDOW].reset_index(drop=True)
+    analyzer = CryptoAnalyzer(store_dir=None)
+    assert_matches(analyzer.update_indicators('A', '1m', window.copy()), reference(window))
+
+
+def test_warm_window_matches_ta_over_full_history(candles):
+    # Isınmış motor kaydırılmış pencerede ta'yı pencere üzerinde değil, tohumlandığı andan beri
+    # gördüğü tüm seri üzerinde yeniden üretir
+    analyzer = CryptoAnalyzer(store_dir=None)
+    analyzer.update_indicators('A', '1m', candles.iloc[:WINDOW].reset_index(drop=True))
+    shifted = candles.iloc[100:WINDOW + 100].reset_index(drop=True)
+    result = analyzer.update_indicators('A', '1m', shifted.copy())
+    expected = reference(candles.iloc[:WINDOW + 100]).iloc[100:].reset_index(drop=True)
+    assert_matches(result, expected)
+
+
+def test_open_candle_is_peeked_not_committed(candles):
+    window = candles.iloc[:WINDOW].reset_index(drop=True)
+    window.loc[WINDOW - 1, 'close_time'] = 2**62   # son mum hâlâ açık
+    analyzer = CryptoAnalyzer(store_dir=None)
+    result = analyzer.update_indicators('A', '1m', window.copy())
+    assert_matches(result, reference(window))
+    engine = analyzer.engines[('A', '1m')]
+    assert engine.last_open_time == window['timestamp'].iloc[-2]
+
+
+def test_engine_update_matches_ta_row_by_row(candles):
+    engine = IncrementalIndicators()
+    rows = [engine.update(*row) for row in candles[['timestamp', 'high', 'low', 'close', 'volume']]
+            .itertuples(index=False)]
+    assert_matches(pd.DataFrame(rows, columns=INDICATOR_COLUMNS), reference(candles))
@@ -0,0 +1,33 @@
+import pytest
+from binance_client import BinanceClient
+from crypto_analyzer import CryptoAnalyzer
+from rate_limiter import request_weight
+from stub_server import start_stub_server
+
+
+@pytest.mark.parametrize('limit, weight', [(1, 1), (99, 1), (100, 1), (101, 2), (500, 2), (501, 5), (1000, 5)])
+def test_klines_weight_tiers(limit, weight):
+    assert request_weight('/api/v3/klines', {'limit': limit}) == weight
+
+
+def test_warm_poll_requests_only_elapsed_candles(workdir):
+    requests = []
+
+    def klines(symbol, interval, limit, start_time, end_time):
+        requests.append({'limit': limit, 'start_time': start_time})
+        return None   # üretilen mumlar
+
+    server, base_url = start_stub_server(latency=0.0, klines=klines)
+    try:
+        analyzer = CryptoAnalyzer(client=BinanceClient(base_url), store_dir=str(workdir / 'klines'),
+                                  resample=False)
+        assert len(analyzer.load_klines('BTC', '1m', 300)['timestamp']) == 300
+        requests.clear()
+        columns = analyzer.load_klines('BTC', '1m', 300)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert len(columns['timestamp']) == 300
+    # Son kapanmış mumdan sonra yalnızca açık mum (ve bir dakika sınırı geçtiyse bir tane daha) var
+    assert len(requests) == 1 and requests[0]['start_time'] is not None and requests[0]['limit'] <= 3
+    assert request_weight('/api/v3/klines', requests[0]) == 1
@@ -0,0 +1,123 @@
+import asyncio
+import time
+import numpy as np
+import pandas as pd
+from binance_client import BinanceClient
+from crypto_analyzer import CryptoAnalyzer
+from indicator_engine import INDICATOR_COLUMNS
+from kline_stream import KlineStream, stream_name
+from ws_replay import ReplayServer
+
+N = 60
+T0 = 1_700_000_000_000 // 60000 * 60000
+
+
+def kline_frame(coin, t, o, h, l, c, v, closed):
+    k = {'t': t, 'T': t + 59999, 's': f'{coin}USDT', 'i': '1m', 'o': f'{o:.8f}', 'h': f'{h:.8f}',
+         'l': f'{l:.8f}', 'c': f'{c:.8f}', 'v': f'{v:.8f}', 'x': closed}
+    return {'stream': stream_name(coin, '1m'), 'data': {'e': 'kline', 'E': t, 's': f'{coin}USDT', 'k': k}}
+
+
+def random_candles(coins, seed=1):
+    rng = np.random.default_rng(seed)
+    candles = {}
+    for coin in coins:
+        price, rows = 100.0, []
+        for i in range(N):
+            close = round(price * (1 + rng.normal(0, 0.003)), 8)
+            rows.append((T0 + i * 60000, price, round(max(price, close) * 1.001, 8),
+                         round(min(price, close) * 0.999, 8), close, round(rng.uniform(1, 10), 8)))
+            price = close
+        candles[coin] = rows
+    return candles
+
+
+def frames_for(candles):
+    # Her mum için önce açık (yarım hacim), sonra kapanış olayı
+    frames = []
+    for i in range(N):
+        for coin, rows in candles.items():
+            t, o, h, l, c, v = rows[i]
+            frames.append(kline_frame(coin, t, o, h, l, c, v / 2, False))
+            frames.append(kline_frame(coin, t, o, h, l, c, v, True))
+    return frames
+
+
+def reference(rows):
+    df = pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    return CryptoAnalyzer(incremental=False, store_dir=None).calculate_indicators(df)
+
+
+def test_closed_candles_match_ta_and_subscriptions_follow_symbols():
+    candles = random_candles(['AAA', 'BBB', 'CCC'])
+
+    async def run():
+        server = await ReplayServer(frames_for(candles), delay=0.001).start()
+        stream = KlineStream(['1m'], server.url)
+        rows, seen = [], []
+        stream.on_update(rows.append)
+        stream.set_symbols(['AAA', 'BBBUSDT'])
+        task = asyncio.create_task(stream.run())
+
+        async def consume():
+            async for row in stream:
+                seen.append(row)
+                if len(seen) == 40:
+                    stream.set_symbols(['BBB', 'CCC'])
+                if sum(r['symbol'] == 'BBB' and r['closed'] for r in seen) == N:
+                    return
+
+        await asyncio.wait_for(consume(), 10)
+        stream.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await server.stop()
+        return stream, server, rows, seen
+
+    stream, server, rows, seen = asyncio.run(run())
+    assert rows == seen
+    assert server.requests[0] == {'method': 'SUBSCRIBE', 'params': ['aaausdt@kline_1m', 'bbbusdt@kline_1m'], 'id': 1}
+    assert server.requests[1]['method'] == 'UNSUBSCRIBE' and server.requests[1]['params'] == ['aaausdt@kline_1m']
+    assert server.requests[2]['method'] == 'SUBSCRIBE' and server.requests[2]['params'] == ['cccusdt@kline_1m']
+    assert sorted(stream.engines) == [('BBB', '1m'), ('CCC', '1m')]
+
+    # Kapanan her mum motor ile işlenir ve ta ile aynı değerleri verir
+    closed = [r for r in rows if r['symbol'] == 'BBB' and r['closed']]
+    assert [r['timestamp'] for r in closed] == [row[0] for row in candles['BBB']]
+    expected = reference(candles['BBB'])
+    for col in INDICATOR_COLUMNS:
+        assert np.allclose([r[col] for r in closed], expected[col], rtol=1e-9, atol=1e-9, equal_nan=True), col
+    # Açık mum yalnızca peek edilir: kapanışta aynı mum tekrar (tam hacimle) hesaplanır
+    opened = [r for r in rows if r['symbol'] == 'BBB' and not r['closed']]
+    assert [r['timestamp'] for r in opened] == [r['timestamp'] for r in closed]
+    # Çıkarılan coinin olayları abonelik bırakıldıktan sonra gelmez
+    last_aaa = max(r['timestamp'] for r in rows if r['symbol'] == 'AAA')
+    assert last_aaa < candles['AAA'][-1][0]
+
+
+def test_engines_are_warmed_from_rest_and_reseeded_after_gap(stub, workdir):
+    server, base_url = stub
+    now = int(time.time() * 1000) // 60000 * 60000
+    frames = [kline_frame('BTC', t, 100, 102, 99, 101, 5, closed)
+              for t, closed in ((now - 120000, True), (now, False), (now, True), (now + 180000, False),
+                                (now + 180000, True), (now + 240000, True))]
+    replay = ReplayServer(frames, delay=0.02).start_in_thread()
+    analyzer = CryptoAnalyzer(client=BinanceClient(base_url), store_dir=str(workdir / 'klines'))
+    stream = KlineStream(['1m'], replay.url, analyzer, history=150)
+    minutes = []
+    stream.on_update(lambda row: minutes.append((row['timestamp'] - now) // 60000))
+    stream.set_symbols(['BTC'])
+    stream.start()
+    try:
+        deadline = time.time() + 5
+        while time.time() < deadline and minutes[-1:] != [4]:
+            time.sleep(0.02)
+    finally:
+        stream.stop()
+        replay.stop_thread()
+    # Isıtma öncesi kapanmış mum yok sayılır; +3'teki boşlukta motor REST'ten yeniden ısıtılır, ilk olay atlanır
+    assert minutes == [0, 0, 3, 4]
+    assert set(server.kline_symbols) == {'BTCUSDT'}
+    engine = stream.engines[('BTC', '1m')]
+    assert engine.last_open_time == now + 240000
+    assert len(engine.history) >= 150
@@ -0,0 +1,30 @@
+import asyncio
+import math
+from news_analyzer import NewsAnalyzer
+
+QUOTES = {
+    'BTCUSDT': {'lastPrice': 100.0, 'priceChangePercent': 2.5, 'volume': 1e6, 'highPrice': 105.0, 'lowPrice': 95.0,
+                'count': 12345.0},
+    # --mini ticker akışında ilk görülen sembol: count alanı yok, records_to_arrays NaN ile doldurur
+    'NEWUSDT': {'lastPrice': 1.5, 'priceChangePercent': 0.1, 'volume': 5e5, 'highPrice': 1.6, 'lowPrice': 1.4,
+                'count': math.nan},
+}
+
+
+class FakeMarket:
+    """MarketDataProvider stand-in returning fixed snapshot quotes"""
+
+    def get_many(self, symbols):
+        return {s: QUOTES[s] for s in symbols if s in QUOTES}
+
+    async def aget_many(self, client, symbols):
+        return self.get_many(symbols)
+
+
+def test_nan_count_quote_does_not_abort_batch():
+    analyzer = NewsAnalyzer(store=object(), market=FakeMarket())
+    expected = [{'current_price': 100.0, 'price_change_24h': 2.5, 'volume_24h': 1e6, 'high_24h': 105.0,
+                 'low_24h': 95.0, 'total_trades': 12345}, {}, {}]
+    assert analyzer.get_market_data_batch(['BTC', 'NEW', 'MISSING']) == expected
+    assert asyncio.run(analyzer.aget_market_data_batch(None, ['BTC', 'NEW', 'MISSING'])) == expected
+    assert analyzer.get_market_data('NEW') == {}
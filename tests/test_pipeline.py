@@ -0,0 +1,25 @@
+import asyncio
+from binance_client import AsyncBinanceClient
+from crypto_analyzer import CryptoAnalyzer
+from pipeline import build_pipeline
+
+
+def test_klines_stage_requests_usdt_pair_once(stub):
+    server, base_url = stub
+
+    async def run():
+        async with AsyncBinanceClient(base_url) as client:
+            pipeline = build_pipeline(client, None, intervals=('15m', '1h'), limit=50, sentiment=False,
+                                      analyzer=CryptoAnalyzer(client=client, store_dir=None))
+
+            async def source():
+                for coin in ('BTC', 'ETH'):
+                    yield coin
+
+            return await pipeline.run(source())
+
+    results = asyncio.run(run())
+    assert sorted(set(server.kline_symbols)) == ['BTCUSDT', 'ETHUSDT']
+    for item in results:
+        assert not item['errors']
+        assert all(len(df) == 50 for df in item['data'].values())
@@ -0,0 +1,42 @@
+import types
+import numpy as np
+import pandas as pd
+import resampler
+from resampler import Resampler, resample
+from kline_parser import parse_klines
+from stub_server import make_klines
+from fixtures import random_walk_klines
+
+T0 = 1_700_000_100_000 // 300000 * 300000   # 5m kovasına hizalı
+
+
+def test_resample_matches_pandas():
+    columns = random_walk_klines(['AUSDT'], 500)['AUSDT']
+    index = pd.to_datetime(columns['timestamp'], unit='ms')
+    frame = pd.DataFrame({name: columns[name] for name in ('open', 'high', 'low', 'close', 'volume')}, index=index)
+    expected = frame.resample('15min').agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last',
+                                            'volume': 'sum'})
+    bars = resample(columns, 15)
+    assert np.array_equal(bars['timestamp'], expected.index.values.astype('datetime64[ms]').astype('int64'))
+    for name in expected:
+        assert np.allclose(bars[name], expected[name].to_numpy())
+
+
+def test_bucket_is_not_finalized_from_partial_1m_candle(monkeypatch):
+    clock = types.SimpleNamespace(now=0.0)
+    monkeypatch.setattr(resampler, 'time', types.SimpleNamespace(time=lambda: clock.now))
+    # 1m serisi 5m kovasının son mumu hâlâ açıkken yükleniyor
+    loaded_ms = T0 + 10 * 60000 - 1000
+    base = parse_klines(make_klines(30, now_ms=loaded_ms))
+    assert base['close_time'][-1] > loaded_ms
+    sampler = Resampler(ttl=5)
+    clock.now = loaded_ms / 1000
+    sampler.set_base('BTC', base)
+
+    # Kova sınırı TTL içinde geçiyor: önbellekteki taban artık kullanılmamalı
+    clock.now = (T0 + 10 * 60000 + 1000) / 1000
+    assert sampler.cached_base('BTC', 10) is None
+
+    bars = sampler.bars('BTC', '5m', 4, base)
+    assert bars['timestamp'][-1] == T0 + 5 * 60000
+    assert sampler.closed[('BTC', '5m')]['timestamp'][-1] == T0
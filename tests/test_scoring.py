@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fixtures import load_tickers
+from scoring import TickerArrays, score, SELECTOR_PROFILE, SELECTOR_V2_PROFILE, CHOOSER_PROFILE, EXCLUDED_COINS
+
+
+class FakeHistory:
+    """TickerHistory.features stand-in: deterministic 1h change / volume acceleration, NaN for some symbols"""
+
+    def features(self, symbols):
+        rng = np.random.default_rng(len(symbols))
+        change = rng.normal(0, 3, len(symbols))
+        accel = rng.uniform(0, 4, len(symbols))
+        change[::7] = np.nan
+        accel[::5] = np.nan
+        self.seen = dict(zip(symbols, zip(change, accel)))
+        return {'change_1h': change, 'volume_accel_1h': accel}
+
+
+def frame(records):
+    df = pd.DataFrame([d for d in records if d.get('symbol', '').endswith('USDT')])
+    for col in ['volume', 'quoteVolume', 'priceChangePercent', 'lastPrice', 'highPrice', 'lowPrice', 'count',
+                'priceChange']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['coin'] = df['symbol'].str.replace('USDT', '')
+    return df
+
+
+def history_terms(df, history):
+    features = history.features(df['symbol'].tolist()) if history is not None else {}
+    df['change_1h'] = features.get('change_1h', np.nan)
+    df['volume_accel_1h'] = features.get('volume_accel_1h', np.nan)
+    return df['change_1h'].abs().fillna(0), (df['volume_accel_1h'] - 1).clip(0, 5).fillna(0)
+
+
+def old_selector(records, history, short_term=True):
+    # realtime_selector / realtime_selector_v2 döngüsü (vektörleştirme öncesi)
+    df = frame(records)
+    mask = ((df['volume'] > 1000000) & (df['count'] > 10000) & (df['lastPrice'] > 0.00001) &
+            (abs(df['priceChangePercent']) > 5) & (abs(df['priceChangePercent']) < 100) &
+            (~df['coin'].isin(EXCLUDED_COINS)))
+    df = df.loc[mask].copy()
+    df['momentum'] = abs(df['priceChangePercent'])
+    df['volatility'] = (df['highPrice'] - df['lowPrice']) / df['lowPrice'] * 100
+    df['volume_score'] = df['volume'].apply(lambda x: min(5, x / 1e6))
+    df['trade_score'] = df['count'].apply(lambda x: min(5, x / 10000))
+    total = df['momentum'] * 0.5 + df['volatility'] * 0.3 + df['volume_score'] * 0.1 + df['trade_score'] * 0.1
+    if short_term:
+        short_term_score, volume_accel_score = history_terms(df, history)
+        total = total + short_term_score * 0.3 + volume_accel_score * 0.1
+    df['total_score'] = total
+    return df.sort_values('total_score', ascending=False)
+
+
+def old_chooser(records, history):
+    # CryptoChooser.get_tradeable_coins döngüsü (vektörleştirme öncesi)
+    df = frame(records)
+    mask = ((df['volume'] > 1000000) & (df['count'] > 10000) & (df['lastPrice'] > 0.00001) &
+            (abs(df['priceChangePercent']) > 2) & (~df['coin'].isin(EXCLUDED_COINS)))
+    df = df.loc[mask].copy()
+    df['momentum_score'] = abs(df['priceChange'] / df['lastPrice'] * 100)
+    df['volatility'] = (df['highPrice'] - df['lowPrice']) / df['lowPrice'] * 100
+    df['volatility_score'] = df['volatility'].rank(pct=True)
+    df['volatility_bonus'] = df['volatility'].apply(lambda x: 3.0 if x > 5 else 2.0 if x > 3 else
+                                                    1.5 if x > 2 else 1.0)
+    df['volume_score'] = df['volume'].apply(lambda x: min(3.0, max(0.5, (x / 5000000))))
+    df['trade_score'] = df['count'].apply(lambda x: min(2.0, max(0.5, (x / 20000))))
+    short_term_score, volume_accel_score = history_terms(df, history)
+    df['total_score'] = (df['momentum_score'] * 0.35 + df['volatility_score'] * df['volatility_bonus'] * 0.25 +
+                         df['volume_score'] * 0.25 + df['trade_score'] * 0.15 +
+                         short_term_score * 0.2 + volume_accel_score * 0.1)
+    return df.sort_values('total_score', ascending=False)
+
+
+@pytest.fixture(scope='module')
+def records():
+    return load_tickers()
+
+
+@pytest.mark.parametrize('history', [None, FakeHistory()], ids=['no_history', 'history'])
+@pytest.mark.parametrize('profile, old', [
+    (SELECTOR_PROFILE, old_selector),
+    (SELECTOR_V2_PROFILE, lambda records, history: old_selector(records, history, short_term=False)),
+    (CHOOSER_PROFILE, old_chooser),
+], ids=['selector', 'selector_v2', 'chooser'])
+def test_vectorized_scores_match_old_loop(records, profile, old, history):
+    expected = old(records, history)
+    scored = score(TickerArrays.from_records(records), profile, history=history)
+    assert len(scored) == len(expected) > profile.top_k
+    assert np.allclose(scored.total, expected['total_score'].to_numpy(), rtol=1e-12)
+    assert dict(zip(scored.coins, scored.total)) == pytest.approx(
+        dict(zip(expected['coin'], expected['total_score'])), rel=1e-12)
+    # Seçilen ilk k coin (eşit skorlar hariç aynı sıra)
+    top = score(TickerArrays.from_records(records), profile, history=history, top_k=profile.top_k)
+    assert top.coins == expected['coin'].head(profile.top_k).tolist()
+
+
+@pytest.mark.parametrize('top_k', [4, 12])
+def test_chooser_header_follows_profile_top_k(records, top_k, monkeypatch):
+    import binance_client
+    from stub_server import start_stub_server
+    from crypto_choose_v2 import CryptoChooser
+    server, base_url = start_stub_server(latency=0.0, tickers=records)
+    try:
+        monkeypatch.setattr(binance_client, '_client', binance_client.BinanceClient(base_url=base_url))
+        result = CryptoChooser(profile=CHOOSER_PROFILE.with_params(top_k=top_k)).get_tradeable_coins()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert result.startswith(f"En İyi Scalping Fırsatları ({top_k} Coin):")
+    assert result.count('Coin: ') == top_k
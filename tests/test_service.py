@@ -0,0 +1,32 @@
+import json
+import urllib.request
+import pytest
+from service import TradeService, start_service
+
+
+@pytest.fixture
+def service(stub):
+    server = start_service('127.0.0.1', 0, TradeService(stub[1], sentiment=False))
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.service.close()
+
+
+def get(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+@pytest.mark.parametrize('query, pair', [('symbol=ethusdt', 'ETHUSDT'), ('symbol=SOL', 'SOLUSDT'), ('', 'BTCUSDT')])
+def test_get_data_requests_usdt_pair_once(stub, service, query, pair):
+    result = get(f'{service}/get_data?{query}&interval=1h&limit=30&tail=5')
+    assert set(stub[0].kline_symbols) == {pair}
+    assert result['symbol'] == pair.removesuffix('USDT')
+    assert len(result['data']['rows']) == 5
+
+
+def test_analyze_requests_usdt_pair_once(stub, service):
+    result = get(f'{service}/analyze?coins=btc,ETHUSDT&intervals=1h&limit=30&sentiment=0')
+    assert set(stub[0].kline_symbols) == {'BTCUSDT', 'ETHUSDT'}
+    assert [item['coin'] for item in result['coins']] == ['BTC', 'ETH']
+    assert not any(item['errors'] for item in result['coins'])
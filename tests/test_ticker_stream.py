@@ -0,0 +1,45 @@
+import json
+import time
+from ticker_stream import TickerStream, TICKER_STREAMS
+from ws_replay import ReplayServer
+
+
+def ticker_event(symbol, last, volume):
+    return {'e': '24hrTicker', 's': symbol, 'c': last, 'o': '100.0', 'h': '110.0', 'l': '90.0', 'v': volume,
+            'q': '1000.0', 'p': '1.0', 'P': '1.000', 'n': 42}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline and not condition():
+        time.sleep(0.01)
+    return condition()
+
+
+def test_ticker_array_frames_update_seeded_table():
+    frames = [json.dumps({'stream': '!ticker@arr', 'data': [ticker_event('AUSDT', '101.0', '10'),
+                                                            ticker_event('BUSDT', '55.5', '20')]}),
+              json.dumps({'stream': '!ticker@arr', 'data': [ticker_event('AUSDT', '102.5', '11')]})]
+    server = ReplayServer(frames, delay=0.01).start_in_thread()
+    stream = TickerStream(TICKER_STREAMS, server.url)
+    stream.seed([{'symbol': 'AUSDT', 'lastPrice': '99.0', 'volume': '9', 'bidPrice': '98.9'}])
+    stream.start()
+    try:
+        assert wait_for(lambda: stream.messages == 2)
+    finally:
+        stream.stop()
+        server.stop_thread()
+    rows = {row['symbol']: row for row in stream.snapshot()}
+    assert rows['AUSDT']['lastPrice'] == '102.5' and rows['AUSDT']['volume'] == '11'
+    assert rows['AUSDT']['bidPrice'] == '98.9'   # akışta olmayan alan seed'den kalır
+    assert rows['BUSDT']['lastPrice'] == '55.5' and rows['BUSDT']['count'] == 42
+    assert server.connections == 1
+
+
+def test_mini_ticker_derives_price_change():
+    stream = TickerStream()
+    stream.apply(json.dumps([{'e': '24hrMiniTicker', 's': 'AUSDT', 'c': '110.0', 'o': '100.0', 'h': '111.0',
+                              'l': '99.0', 'v': '5', 'q': '500', 'E': 1}]))
+    row = stream.get('AUSDT')
+    assert row['lastPrice'] == '110.0'
+    assert row['priceChange'] == '10.00000000' and row['priceChangePercent'] == '10.000'